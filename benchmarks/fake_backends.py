@@ -0,0 +1,235 @@
+"""Local stand-ins for the OpenAI, Ollama and TTS HTTP APIs with configurable latency.
+
+One server answers all of them:
+
+    /v1/chat/completions, /v1/models     OpenAI chat (streamed as SSE or as one JSON body)
+    /v1/audio/speech                     OpenAI TTS, silent 16-bit PCM at the configured rate
+    /api/generate, /api/chat, /api/tags  Ollama (streamed as NDJSON)
+
+    python benchmarks/fake_backends.py --port 8765 --ttft-ms 300 --tokens-per-second 40
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional
+
+DEFAULT_ANSWER = (
+    "Correct! **Resilient** means able to recover quickly from difficulties. "
+    "For example: *She is resilient and never gives up.*\n\n"
+    "- synonyms: tough, adaptable\n- antonyms: fragile\n"
+)
+
+class FakeBackend:
+    """A threaded HTTP server answering every request with the same text, streamed token by token."""
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttft_ms: float = 0,
+        tokens_per_second: float = 0,
+        answer: str = DEFAULT_ANSWER,
+        audio_ms_per_char: float = 60,
+        sample_rate: int = 24000,
+        realtime_audio: bool = False,
+    ) -> None:
+        self.ttft = ttft_ms / 1000
+        self.token_delay = 1 / tokens_per_second if tokens_per_second > 0 else 0
+        self.tokens = tokenize(answer)
+        self.audio_ms_per_char = audio_ms_per_char
+        self.sample_rate = sample_rate
+        self.realtime_audio = realtime_audio
+        self.requests = 0
+        backend = self
+
+        class Handler(_Handler):
+            pass
+        Handler.backend = backend
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBackend":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeBackend":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def paced_tokens(self, tokens: Optional[List[str]] = None) -> Iterator[str]:
+        if self.ttft:
+            time.sleep(self.ttft)
+        for i, token in enumerate(self.tokens if tokens is None else tokens):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield token
+
+def answer_tokens(backend: FakeBackend, body: dict) -> List[str]:
+    """The fixed answer, or all-correct JSON grades when the prompt is a quiz round (a JSON array of numbered items)."""
+    prompt = body.get("prompt") or next((m.get("content", "") for m in reversed(body.get("messages") or []) if m.get("role") == "user"), "")
+    try:
+        items = json.loads(prompt)
+    except ValueError:
+        return backend.tokens
+    if not isinstance(items, list) or not all(isinstance(item, dict) and "n" in item for item in items):
+        return backend.tokens
+    return tokenize(json.dumps([{"n": item["n"], "correct": True, "explanation": "Well done."} for item in items]))
+
+def tokenize(text: str) -> List[str]:
+    """Word-sized tokens that keep their trailing whitespace, like BPE pieces roughly do."""
+    tokens, current = [], ""
+    for char in text:
+        current += char
+        if char in " \n":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+class _Handler(BaseHTTPRequestHandler):
+    backend: FakeBackend
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.backend.requests += 1
+        if self.path.startswith("/v1/models"):
+            self._json({"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "bench"}]})
+        elif self.path.startswith("/api/tags"):
+            self._json({"models": [{"name": "fake"}]})
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def do_POST(self) -> None:
+        self.backend.requests += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.startswith("/v1/chat/completions"):
+            self._openai_chat(body)
+        elif self.path.startswith("/v1/audio/speech"):
+            self._speech(body)
+        elif self.path.startswith("/api/generate"):
+            self._ollama(body, lambda token: {"response": token})
+        elif self.path.startswith("/api/chat"):
+            self._ollama(body, lambda token: {"message": {"role": "assistant", "content": token}})
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def _openai_chat(self, body: dict) -> None:
+        model = body.get("model", "fake")
+        tokens = answer_tokens(self.backend, body)
+        if not body.get("stream"):
+            text = "".join(self.backend.paced_tokens(tokens))
+            self._json({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(self.backend.tokens), "total_tokens": len(self.backend.tokens)},
+            })
+            return
+
+        def chunk(delta: dict, finish: Optional[str] = None) -> bytes:
+            data = {
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        self._start_chunked("text/event-stream")
+        for token in self.backend.paced_tokens(tokens):
+            self._chunk(chunk({"content": token}))
+        self._chunk(chunk({}, "stop"))
+        self._chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _ollama(self, body: dict, make) -> None:
+        model = body.get("model", "fake")
+        if not body.get("prompt", True) and "messages" not in body:
+            # An empty prompt only loads the model
+            self._json({"model": model, "response": "", "done": True})
+            return
+        tokens = answer_tokens(self.backend, body)
+        if body.get("stream") is False:
+            text = "".join(self.backend.paced_tokens(tokens))
+            self._json({"model": model, **make(text), "done": True, "done_reason": "stop"})
+            return
+        self._start_chunked("application/x-ndjson")
+        for token in self.backend.paced_tokens(tokens):
+            self._chunk((json.dumps({"model": model, **make(token), "done": False}) + "\n").encode())
+        final = {"model": model, **make(""), "done": True, "done_reason": "stop", "eval_count": len(self.backend.tokens)}
+        self._chunk((json.dumps(final) + "\n").encode())
+        self._end_chunked()
+
+    def _speech(self, body: dict) -> None:
+        backend = self.backend
+        duration = len(body.get("input", "")) * backend.audio_ms_per_char / 1000
+        total = int(duration * backend.sample_rate) * 2
+        block = 4096
+        self._start_chunked("audio/pcm")
+        if backend.ttft:
+            time.sleep(backend.ttft)
+        sent = 0
+        while sent < total:
+            size = min(block, total - sent)
+            self._chunk(b"\x00" * size)
+            sent += size
+            if backend.realtime_audio:
+                time.sleep(size / 2 / backend.sample_rate)
+        self._end_chunked()
+
+    def _json(self, data: dict, status: int = 200) -> None:
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=0, help="Delay before the first token or audio chunk")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Token rate, 0 sends all tokens at once")
+    parser.add_argument("--realtime-audio", action="store_true", help="Send TTS audio no faster than it plays")
+    args = parser.parse_args()
+
+    backend = FakeBackend(args.host, args.port, args.ttft_ms, args.tokens_per_second, realtime_audio=args.realtime_audio)
+    print(f"Serving fake OpenAI/Ollama/TTS APIs on {backend.url}")
+    try:
+        backend.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Load test for `eng serve` against the fake LLM backend.
+
+A synthetic database and a FakeBackend are prepared as in suite.py, the server is started
+in a background thread, and N simulated learners each open a trainer session and play
+rounds (next riddle, a guess) mixed with dictionary lookups, each with its own profile. Latency percentiles per
+endpoint, time to the first streamed token, throughput and errors are printed as JSON.
+
+    python benchmarks/load_test.py --learners 200 --rounds 5 --ttft-ms 300 --tokens-per-second 40
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fake_backends import FakeBackend
+from suite import prepare_workspace
+
+class Client:
+    """One keep-alive HTTP/1.1 connection; SSE responses close it, so it reconnects as needed."""
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, bytes, Optional[float]]:
+        """Returns the status, the body and, for event streams, seconds to the first event."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        started = time.perf_counter()
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        first = None
+        if headers.get("content-type") == "text/event-stream":
+            chunks = []
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                if first is None and line.startswith(b"event:"):
+                    first = time.perf_counter() - started
+                chunks.append(line)
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.readexactly(int(headers.get("content-length") or 0))
+        if headers.get("connection") == "close" or headers.get("content-type") == "text/event-stream":
+            self.close()
+        return status, data, first
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latency: Dict[str, List[float]] = {}
+        self.first_event: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.requests = 0
+
+    def add(self, name: str, seconds: float, status: int, first: Optional[float]) -> None:
+        self.requests += 1
+        self.latency.setdefault(name, []).append(seconds * 1000)
+        if first is not None:
+            self.first_event.append(first * 1000)
+        if status >= 400:
+            self.errors[f"{name} {status}"] = self.errors.get(f"{name} {status}", 0) + 1
+
+def percentiles(values: List[float]) -> Dict:
+    values = sorted(values)
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 2)
+    return {'count': len(values), 'p50_ms': pick(0.5), 'p90_ms': pick(0.9), 'p99_ms': pick(0.99), 'max_ms': round(values[-1], 2)}
+
+async def learner(index: int, host: str, port: int, args, words: List[str], recorder: Recorder) -> None:
+    rng = random.Random(index)
+    client = Client(host, port)
+
+    async def call(name: str, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        started = time.perf_counter()
+        try:
+            status, data, first = await client.request(method, path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            client.close()
+            status, data, first = 599, b"", None
+        recorder.add(name, time.perf_counter() - started, status, first)
+        return status, data
+
+    status, data = await call("create_session", "POST", "/sessions", {'mode': 'trainer', 'category': f"unit{index % args.categories + 1}", 'learner': f"learner{index}"})
+    if status != 201:
+        return
+    session = json.loads(data)['session_id']
+    for _ in range(args.rounds):
+        await call("trainer_next", "POST", f"/sessions/{session}/trainer/next")
+        await call("trainer_guess", "POST", f"/sessions/{session}/trainer/guess", {'guess': "a wrong guess"})
+        if words and rng.random() < args.lookups:
+            await call("word_lookup", "GET", f"/words/{quote(rng.choice(words))}")
+    await call("delete_session", "DELETE", f"/sessions/{session}")
+    client.close()
+
+def start_server(llm_workers: int):
+    from word_app.english.server import WordServer
+    loop = asyncio.new_event_loop()
+    server = WordServer("127.0.0.1", 0, llm_workers)
+    ready = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="word-server", daemon=True).start()
+    ready.wait()
+    return server, loop
+
+async def run_learners(port: int, args, words: List[str]) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    started = time.perf_counter()
+    await asyncio.gather(*(learner(i, "127.0.0.1", port, args, words, recorder) for i in range(args.learners)))
+    return recorder, time.perf_counter() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=200, help="Concurrent simulated learners")
+    parser.add_argument("--rounds", type=int, default=5, help="Riddles per learner")
+    parser.add_argument("--lookups", type=float, default=0.5, help="Chance of a dictionary lookup after each round")
+    parser.add_argument("--categories", type=int, default=10, help="Learners are spread over this many categories")
+    parser.add_argument("--size", type=int, default=10000, help="Words in the synthetic database")
+    parser.add_argument("--llm-workers", type=int, default=256)
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Upper bound of the LLM scheduler's concurrency limit")
+    parser.add_argument("--backend", choices=("openai", "ollama"), default="openai")
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--workdir", default=str(Path.home() / ".cache" / "word_app_bench"))
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from word_app.utils.metrics import metrics
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    with FakeBackend(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second) as backend:
+        prepare_workspace(workdir, args.size, backend, args)
+        from word_app.config import get_llm_config
+        get_llm_config().setdefault('scheduler', {})['max_concurrency'] = args.max_concurrency
+        metrics.reset()
+        server, loop = start_server(args.llm_workers)
+        words = [w.word for w in asyncio.run_coroutine_threadsafe(server.db.run(server.db.manager.fetch_words, 'unit1'), loop).result()]
+        recorder, elapsed = asyncio.run(run_learners(server.port, args, words))
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    report = {
+        'params': vars(args),
+        'elapsed_s': round(elapsed, 3),
+        'requests': recorder.requests,
+        'requests_per_second': round(recorder.requests / elapsed, 1),
+        'errors': recorder.errors,
+        'first_event': percentiles(recorder.first_event) if recorder.first_event else {},
+        'endpoints': {name: percentiles(values) for name, values in sorted(recorder.latency.items())},
+        'llm_backend_requests': backend.requests,
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""CPU cost of rendering a streamed LLM answer, per 1k tokens.
+
+Compares repainting the whole accumulated markdown on every token (the old
+behaviour) with UIManager's frame-capped incremental StreamRenderer.
+
+    python benchmarks/stream_render.py --tokens 4000 --rate 300
+"""
+import io
+import sys
+import time
+import json
+import argparse
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from rich.console import Console
+from rich.live import Live
+from word_app.english.ui_manager import UIManager
+
+PARAGRAPH = (
+    "The word **resilient** describes someone who recovers quickly from difficulties. "
+    "For example: *She is resilient and never gives up.* "
+)
+
+def make_tokens(count: int) -> List[str]:
+    """Split a synthetic markdown answer with paragraphs, lists and code into word-sized tokens."""
+    tokens = []
+    block = 0
+    while len(tokens) < count:
+        if block % 4 == 3:
+            text = "\n\n- first item\n- second item\n\n```\nexample code\n```\n\n"
+        else:
+            text = PARAGRAPH * 3 + "\n\n"
+        tokens.extend(token + " " for token in text.split(" "))
+        block += 1
+    return tokens[:count]
+
+def paced(tokens: List[str], rate: float) -> Iterator[str]:
+    """Yield tokens at a fixed rate, like a fast local model would."""
+    delay = 1 / rate if rate > 0 else 0
+    for token in tokens:
+        if delay:
+            time.sleep(delay)
+        yield token
+
+def naive(tokens: Iterator[str], live: Live) -> str:
+    answer = ""
+    for token in tokens:
+        answer += token
+        UIManager.update_converation_output(answer, live)
+    return answer
+
+def incremental(tokens: Iterator[str], live: Live) -> str:
+    return UIManager.stream_conversation_output(tokens, live)
+
+def measure(render: Callable[[Iterator[str], Live], str], tokens: List[str], rate: float) -> dict:
+    console = Console(file=io.StringIO(), force_terminal=True, width=100, height=40)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    with Live(console=console, auto_refresh=False) as live:
+        render(paced(tokens, rate), live)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    return {
+        "cpu_ms_per_1k_tokens": round(cpu * 1000 / len(tokens) * 1000, 2),
+        "wall_s": round(wall, 3),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000, help="Number of streamed tokens")
+    parser.add_argument("--rate", type=float, default=0, help="Tokens per second, 0 streams as fast as possible")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    results = {
+        "tokens": args.tokens,
+        "rate": args.rate,
+        "naive": measure(naive, tokens, args.rate),
+        "incremental": measure(incremental, tokens, args.rate),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ("naive", "incremental"):
+            print(f"{name:<12} {results[name]['cpu_ms_per_1k_tokens']:>10.1f} CPU ms / 1k tokens   {results[name]['wall_s']:.2f} s wall")
+
+if __name__ == "__main__":
+    main()
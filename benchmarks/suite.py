@@ -0,0 +1,288 @@
+"""End-to-end benchmark suite on synthetic databases and local fake backends.
+
+For every database size a workspace is prepared (config, database, empty vault), the app
+is pointed at a FakeBackend standing in for the LLM and TTS servers, and the main paths
+are timed. Results are written as JSON, so runs on different commits can be compared.
+
+    python benchmarks/suite.py --sizes 1000,100000 --ttft-ms 200 --tokens-per-second 50
+    python benchmarks/suite.py --sizes 1000000 --only fetch_words_all,show_all_words
+    python benchmarks/suite.py --compare benchmarks/results/abc1234.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import yaml
+from rich.console import Console
+
+from fake_backends import FakeBackend
+from synthetic_db import build_database
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+def benchmark(name: str, repeat: int = 5):
+    def register(func: Callable) -> Callable:
+        func.repeat = repeat
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+class Screen:
+    """Enough of a curses window for MyPager.draw_screen."""
+    def __init__(self, height: int = 40, width: int = 160) -> None:
+        self.size = (height, width)
+
+    def getmaxyx(self):
+        return self.size
+
+    def move(self, y, x): pass
+    def clrtoeol(self): pass
+    def addstr(self, y, x, text): pass
+    def refresh(self): pass
+
+class Context:
+    """The app objects under test for one database size."""
+    def __init__(self, console: Console) -> None:
+        from word_app.english.training import WordsTutor, WordDictionary
+        from word_app.english.word_manager import WordManager
+        self.console = console
+        self.manager = WordManager()
+        self.tutor = WordsTutor()
+        self.tutor.auto_speak = False
+        self.tutor.set_category(None)
+        self.dictionary = WordDictionary()
+        self.dictionary.auto_speak = False
+        # Answer "save the word" and "chat about it" prompts without a terminal
+        self.dictionary.process_command = lambda *args, **kwargs: "y bench"
+        self.tutor.process_command = lambda *args, **kwargs: "n"
+        self.new_words = 0
+        self.pack = None
+        self.run_id = time.strftime("%Y%m%d%H%M%S")
+
+def prepare_workspace(workdir: Path, size: int, backend: FakeBackend, args) -> Path:
+    """Write a config for this size and make the app load it. Returns the database path."""
+    import word_app.config
+    from word_app.english.word_manager import WordManager
+
+    with open(ROOT / "config" / "config.yaml.example", "r") as file:
+        config = yaml.safe_load(file)
+    db_path = workdir / f"words-{size}.db"
+    vault = workdir / "vault"
+    vault.mkdir(parents=True, exist_ok=True)
+    config['llm'].update({'base_url': backend.url, 'use_openai': args.backend == 'openai', 'openai_api_key': 'sk-bench'})
+    config['llm']['models'] = {'main': 'fake', 'translator': 'fake'}
+    config['llm']['prompts']['system']['base_path'] = str(ROOT / "config" / "prompts")
+    config['database']['path'] = str(db_path)
+    config['obsidian'] = {'english_dir': str(vault), 'flush_delay': 60}
+    config['voice'].update({'base_url': f"{backend.url}/v1", 'voice': 'alloy'})
+    config['app'].update({'warmup': False})
+    (workdir / "config").mkdir(exist_ok=True)
+    with open(workdir / "config" / "config.yaml", "w") as file:
+        yaml.safe_dump(config, file)
+
+    os.chdir(workdir)
+    os.environ['OPENAI_BASE_URL'] = f"{backend.url}/v1"
+    word_app.config._config = None
+    if WordManager._instance is not None:
+        WordManager._instance.conn.close()
+        WordManager._instance = None
+
+    if args.rebuild or not db_path.exists():
+        started = time.perf_counter()
+        build_database(WordManager().conn, size, seed=args.seed)
+        print(f"  built {db_path.name} in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return db_path
+
+def timed(func: Callable[[Context], None], context: Context, repeat: int) -> Dict:
+    func(context)  # warm up caches and connections
+    runs: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(context)
+        runs.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(runs), 3),
+        'median_ms': round(statistics.median(runs), 3),
+        'mean_ms': round(statistics.fmean(runs), 3),
+    }
+
+@benchmark("fetch_words_all")
+def fetch_words_all(ctx: Context) -> None:
+    ctx.manager.fetch_words('all')
+
+@benchmark("fetch_words_category", repeat=20)
+def fetch_words_category(ctx: Context) -> None:
+    ctx.manager.fetch_words('unit1')
+
+@benchmark("complete_prefix_x10", repeat=20)
+def complete_prefix(ctx: Context) -> None:
+    """Ten keystrokes of prompt completion."""
+    for prefix in ("k", "ka", "kal", "kalo", "Ka", "m", "mi", "ren", "re", "r"):
+        ctx.manager.complete('words', prefix)
+
+@benchmark("select_word_x20", repeat=5)
+def select_word(ctx: Context) -> None:
+    ctx.tutor.used_words.clear()
+    for _ in range(20):
+        ctx.tutor.select_word(ctx.tutor.available_words)
+
+@benchmark("stats_render", repeat=10)
+def stats_render(ctx: Context) -> None:
+    from word_app.english.stats import SessionStats
+    stats = SessionStats(ctx.manager, (w.state for w in ctx.tutor.available_words))
+    ctx.tutor.ui_manager.show_state_counts(ctx.console, stats.counts)
+
+@benchmark("words_stats_render")
+def words_stats_render(ctx: Context) -> None:
+    ctx.tutor.ui_manager.show_words_stats(ctx.console, ctx.manager)
+
+@benchmark("categories_render", repeat=3)
+def categories_render(ctx: Context) -> None:
+    ctx.tutor.ui_manager.show_categories(ctx.console, ctx.manager)
+
+@benchmark("show_all_words", repeat=10)
+def show_all_words(ctx: Context) -> None:
+    """Open the words pager, page down twice, jump to a letter and filter."""
+    from word_app.english.ui_manager import UIManager
+    from word_app.utils import MyPager
+    pager = MyPager("Word", source=UIManager.words_source(ctx.manager), separator=True)
+    screen = Screen()
+    for start in (0, 18, 36):
+        pager.draw_screen(screen, start)
+    pager.draw_screen(screen, pager._jump('m', 0))
+    pager.filter_mode = True
+    for char in "kalo":
+        pager.filter_text += char
+        pager._apply_filter()
+        pager.draw_screen(screen, 0)
+
+@benchmark("grading_round_x5", repeat=3)
+def grading_round(ctx: Context) -> None:
+    """Five wrong guesses graded by the (fake) LLM, which answers 'Correct!'."""
+    for _ in range(5):
+        word = ctx.tutor.select_word(ctx.tutor.available_words)
+        ctx.tutor.grade_guess(word, "a wrong guess")
+
+@benchmark("quiz_round_x5", repeat=3)
+def quiz_round(ctx: Context) -> None:
+    """The same five wrong guesses graded in one batched request (/round)."""
+    answers = [(ctx.tutor.select_word(ctx.tutor.available_words), "a wrong guess") for _ in range(5)]
+    ctx.tutor.grade_answers(answers)
+
+@benchmark("dictionary_new", repeat=3)
+def dictionary_new(ctx: Context) -> None:
+    """Explain, translate and save a new word."""
+    ctx.new_words += 1
+    ctx.dictionary.process_word(f"benchword {ctx.run_id} {ctx.new_words}")
+
+@benchmark("dictionary_lookup", repeat=10)
+def dictionary_lookup(ctx: Context) -> None:
+    ctx.dictionary.process_word(ctx.tutor.available_words[0].word)
+
+@benchmark("pack_lookup_x100", repeat=10)
+def pack_lookup(ctx: Context) -> None:
+    """A hundred lookups, half of them in another case, in a pack of the database's words."""
+    from word_app.english.pack import DictionaryPack, build_pack, pack_entries
+    if ctx.pack is None:
+        build_pack(pack_entries(), "base.pack")
+        ctx.pack = DictionaryPack("base.pack")
+        ctx.pack_queries = [w.word for w in ctx.tutor.available_words[:50]] + [w.word.upper() for w in ctx.tutor.available_words[:50]]
+    for query in ctx.pack_queries:
+        ctx.pack.lookup(query)
+
+@benchmark("tts_synthesis", repeat=3)
+def tts_synthesis(ctx: Context) -> None:
+    voice = ctx.dictionary.voice
+    voice.pick_voice()
+    for _ in voice._synthesize("She is resilient and never gives up."):
+        pass
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: Dict, baseline_path: str) -> None:
+    with open(baseline_path, "r") as file:
+        baseline = json.load(file)
+    print(f"\nmedian ms, {baseline['commit']} -> {results['commit']}")
+    for size, benchmarks in results['sizes'].items():
+        for name, result in benchmarks.items():
+            before = baseline['sizes'].get(size, {}).get(name)
+            if before:
+                ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+                print(f"{size:>8} {name:<22} {before['median_ms']:>10.2f} {result['median_ms']:>10.2f}  x{ratio:.2f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000", help="Comma-separated word counts, e.g. 1000,100000,1000000")
+    parser.add_argument("--only", default="", help="Comma-separated benchmark names, all by default")
+    parser.add_argument("--backend", choices=("openai", "ollama"), default="openai", help="Which API the fake server is used as")
+    parser.add_argument("--ttft-ms", type=float, default=0, help="Fake backend time to first token/audio chunk")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Fake backend token rate, 0 for no delay")
+    parser.add_argument("--workdir", default=str(Path.home() / ".cache" / "word_app_bench"), help="Where synthetic databases are kept between runs")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate the databases even if they exist")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="", help="Result file, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--compare", default="", help="A previous result file to compare with")
+    args = parser.parse_args()
+
+    selected = [name for name in args.only.split(",") if name] or list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    import word_app.english.training as training
+    console = Console(file=io.StringIO(), force_terminal=True, width=120, height=40)
+    training.console = console
+
+    output = args.output or str(ROOT / "benchmarks" / "results" / f"{git_commit()}.json")
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'backend': args.backend, 'ttft_ms': args.ttft_ms, 'tokens_per_second': args.tokens_per_second, 'seed': args.seed},
+        'sizes': {},
+    }
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    cwd = os.getcwd()
+    with FakeBackend(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second) as backend:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"{size} words", file=sys.stderr)
+            prepare_workspace(workdir, size, backend, args)
+            context = Context(console)
+            size_results = results['sizes'][str(size)] = {}
+            for name in selected:
+                func = BENCHMARKS[name]
+                size_results[name] = timed(func, context, func.repeat)
+                console.file.seek(0)
+                console.file.truncate()
+                print(f"  {name:<22} {size_results[name]['median_ms']:>10.2f} ms", file=sys.stderr)
+            context.tutor.obsidian.flush()
+    os.chdir(cwd)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
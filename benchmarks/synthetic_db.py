@@ -0,0 +1,70 @@
+"""Synthetic word databases for the benchmark suite.
+
+Words, verbs and themes are generated from a seeded RNG, so every size is reproducible.
+The schema, FTS index and triggers come from WordManager itself; rows are bulk inserted
+in a single transaction.
+"""
+import random
+import sqlite3
+from typing import Iterator, Tuple
+
+SYLLABLES = ("ka", "lo", "mi", "ren", "tus", "ve", "dra", "po", "sil", "an", "ber", "que", "ot", "ni", "zu", "cha")
+WORDS_PER_CATEGORY = 100
+MAX_CATEGORIES = 200
+
+def make_word(rng: random.Random, index: int) -> str:
+    """A pronounceable pseudo word. The index suffix keeps it unique; every tenth entry is a phrase."""
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    if index % 10 == 0:
+        word += " " + "".join(rng.choice(SYLLABLES) for _ in range(2))
+    return f"{word}{index}"
+
+def make_text(rng: random.Random, chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+def word_rows(count: int, explanation_chars: int, seed: int) -> Iterator[Tuple]:
+    rng = random.Random(seed)
+    categories = [f"unit{i}" for i in range(1, min(MAX_CATEGORIES, max(1, count // WORDS_PER_CATEGORY)) + 1)]
+    for i in range(count):
+        category = rng.choice(categories) if rng.random() > 0.05 else ''
+        yield (
+            make_word(rng, i),
+            category,
+            make_text(rng, explanation_chars),
+            make_text(rng, explanation_chars * 3 // 4),
+            rng.randint(1, 20),
+            rng.randint(0, 8),
+        )
+
+def build_database(conn: sqlite3.Connection, words: int, verbs: int = 200, themes: int = 50,
+                   explanation_chars: int = 200, seed: int = 1, learner: str = 'default') -> None:
+    """Fill the tables created by WordManager. Existing rows are replaced; the progress
+    columns of the generated rows belong to the given learner."""
+    rng = random.Random(seed)
+    with conn:
+        for table in ("words", "word_progress", "irregular_verbs", "verb_progress", "grammar_themes"):
+            conn.execute(f"DELETE FROM {table}")
+        rows = list(word_rows(words, explanation_chars, seed))
+        conn.executemany(
+            "INSERT INTO words (word, category, explanation_en, explanation_ru, lookup_key) VALUES (?, ?, ?, ?, lookup_key(?))",
+            (row[:4] + row[:1] for row in rows),
+        )
+        conn.executemany(
+            "INSERT INTO word_progress VALUES (?, ?, ?, ?)",
+            ((learner, row[0], row[4], row[5]) for row in rows),
+        )
+        conn.executemany("INSERT INTO irregular_verbs VALUES (?, ?, ?)", ((f"verb{i}", f"verbed{i}", f"verbt{i}") for i in range(verbs)))
+        conn.executemany(
+            "INSERT INTO verb_progress VALUES (?, ?, ?, ?)",
+            ((learner, f"verb{i}", rng.randint(1, 20), rng.randint(0, 8)) for i in range(verbs)),
+        )
+        conn.executemany(
+            "INSERT INTO grammar_themes VALUES (?, ?)",
+            ((f"theme{i}", make_text(rng, 120)) for i in range(themes)),
+        )
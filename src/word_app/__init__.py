@@ -1,4 +1,18 @@
-from .english.word_manager import WordManager, Word, IrregularVerb
-from .english.training import WordDictionary, WordsTutor, GrammarTutor, VerbsTutor
+from typing import TYPE_CHECKING
+from ._lazy import lazy_exports
 
-__all__ = ['WordManager', 'Word', 'IrregularVerb', 'WordDictionary', 'WordsTutor', 'GrammarTutor', 'VerbsTutor']
\ No newline at end of file
+if TYPE_CHECKING:
+    from .english.word_manager import WordManager, Word, IrregularVerb
+    from .english.training import WordDictionary, WordsTutor, GrammarTutor, VerbsTutor
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'WordManager': '.english.word_manager',
+    'Word': '.english.word_manager',
+    'IrregularVerb': '.english.word_manager',
+    'WordDictionary': '.english.training',
+    'WordsTutor': '.english.training',
+    'GrammarTutor': '.english.training',
+    'VerbsTutor': '.english.training',
+})
+
+__all__ = ['WordManager', 'Word', 'IrregularVerb', 'WordDictionary', 'WordsTutor', 'GrammarTutor', 'VerbsTutor']
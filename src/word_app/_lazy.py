@@ -0,0 +1,16 @@
+import sys
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """The module __getattr__ and __dir__ of a package whose exports are imported on first
+    attribute access, to keep CLI startup fast. exports maps a name to the submodule defining it."""
+    def __getattr__(name: str):
+        if name in exports:
+            return getattr(import_module(exports[name], package), name)
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,7 +1,6 @@
 import os
-import yaml
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 import logging
 
 class Config:
@@ -21,6 +20,7 @@ class Config:
         raise FileNotFoundError("Config file not found")
 
     def _load_config(self) -> Dict:
+        import yaml
         with open(self.config_path, 'r') as file:
             return yaml.safe_load(file)
 
@@ -40,36 +40,88 @@ class Config:
     def get_database_path(self):
         return self._resolve_path(self.config['database']['path'])
 
+    def get_pack_path(self) -> Optional[str]:
+        path = self.config['database'].get('pack')
+        if not path:
+            return None
+        if not os.path.isabs(path):
+            path = os.path.abspath(os.path.join(os.path.dirname(self.config_path), path))
+        return path
+
     def get_obsidian_config(self):
         return self.config['obsidian']
 
     def get_streak_threshold(self) -> int:
         return self.config['app']['streak_threshold']
 
+    def get_warmup_enabled(self) -> bool:
+        return self.config['app'].get('warmup', True)
+
+    def get_metrics_config(self) -> Dict:
+        return self.config['app'].get('metrics') or {}
+
+    def get_quiz_round_size(self) -> int:
+        return self.config['app'].get('quiz_round_size', 5)
+
+    def get_profile(self) -> str:
+        return self.config['app'].get('profile') or 'default'
+
     def get_prompt_path(self, prompt_name):
         base_path = self.config['llm']['prompts']['system']['base_path']
         file_name = self.config['llm']['prompts']['system']['files'].get(prompt_name)
         if file_name:
             full_path = self._resolve_path(os.path.join(base_path, file_name))
             return full_path
+        # Prompts added after a config was written are found by their default file name
+        default_path = self._resolve_path(os.path.join(base_path, f"{prompt_name}.txt"))
+        if os.path.exists(default_path):
+            return default_path
         raise ValueError(f"Prompt '{prompt_name}' not found in config")
 
-config = Config()
+_config: Optional[Config] = None
+_profile: Optional[str] = None
+
+def get_config() -> Config:
+    """The config is loaded on first use, not at import time."""
+    global _config
+    if _config is None:
+        _config = Config()
+    return _config
 
 def get_llm_config() -> Dict:
-    return config.get_llm_config()
+    return get_config().get_llm_config()
 
 def get_database_path() -> str:
-    return config.get_database_path()
+    return get_config().get_database_path()
+
+def get_pack_path() -> Optional[str]:
+    return get_config().get_pack_path()
 
 def get_prompt_path(prompt_name) -> str:
-    return config.get_prompt_path(prompt_name)
+    return get_config().get_prompt_path(prompt_name)
 
 def get_voice_config() -> Dict:
-    return config.get_voice_config()
+    return get_config().get_voice_config()
 
 def get_obsidian_config() -> Dict:
-    return config.get_obsidian_config()
+    return get_config().get_obsidian_config()
 
 def get_streak_threshold() -> int:
-    return config.get_streak_threshold()
\ No newline at end of file
+    return get_config().get_streak_threshold()
+
+def get_warmup_enabled() -> bool:
+    return get_config().get_warmup_enabled()
+
+def get_metrics_config() -> Dict:
+    return get_config().get_metrics_config()
+
+def get_quiz_round_size() -> int:
+    return get_config().get_quiz_round_size()
+
+def set_profile(name: str) -> None:
+    """Select the learner for this process, overriding app.profile (the --profile option)."""
+    global _profile
+    _profile = name
+
+def get_profile() -> str:
+    return _profile or get_config().get_profile()
@@ -1,6 +1,27 @@
-from .word_manager import WordManager, Word, IrregularVerb
-from .training import WordsTutor, WordDictionary, GrammarTutor, VerbsTutor
-from .ui_manager import UIManager
-from .llm import Teacher
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
 
-__all__ = ['WordManager', 'Word', 'IrregularVerb', 'WordDictionary', 'WordsTutor', 'GrammarTutor', 'VerbsTutor', 'UIManager', 'Teacher']
\ No newline at end of file
+if TYPE_CHECKING:
+    from .word_manager import WordManager, Word, IrregularVerb
+    from .training import WordsTutor, WordDictionary, GrammarTutor, VerbsTutor
+    from .ui_manager import UIManager
+    from .llm import Teacher
+    from .stream import LLMStream, StreamChunk
+    from .obsidian_sync import VaultExporter
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'WordManager': '.word_manager',
+    'Word': '.word_manager',
+    'IrregularVerb': '.word_manager',
+    'WordsTutor': '.training',
+    'WordDictionary': '.training',
+    'GrammarTutor': '.training',
+    'VerbsTutor': '.training',
+    'UIManager': '.ui_manager',
+    'Teacher': '.llm',
+    'LLMStream': '.stream',
+    'StreamChunk': '.stream',
+    'VaultExporter': '.obsidian_sync',
+})
+
+__all__ = ['WordManager', 'Word', 'IrregularVerb', 'WordDictionary', 'WordsTutor', 'GrammarTutor', 'VerbsTutor', 'UIManager', 'Teacher', 'LLMStream', 'StreamChunk', 'VaultExporter']
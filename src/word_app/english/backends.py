@@ -0,0 +1,329 @@
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..utils.metrics import metrics, Histogram
+from .scheduler import INTERACTIVE, get_scheduler
+from .stream import StreamChunk
+
+MIN_SAMPLES = 20
+
+class BackendUnavailable(TimeoutError):
+    """No backend started answering within the task's timeout, or every backend failed."""
+
+class BackendHealth:
+    """Time to first token per task, and strikes: an error or a lost hedge counts one, a
+    timely answer clears them. After max_strikes in a row the backend is demoted for
+    cooldown seconds, i.e. tried after the healthy ones."""
+    def __init__(self, max_strikes: int = 3, cooldown: float = 60) -> None:
+        self.max_strikes = max_strikes
+        self.cooldown = cooldown
+        self.ttft: Dict[str, Histogram] = {}
+        self.strikes = 0
+        self.demoted_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def demoted(self) -> bool:
+        return time.monotonic() < self.demoted_until
+
+    def p95(self, task: str) -> Optional[float]:
+        histogram = self.ttft.get(task)
+        if histogram is None or histogram.count < MIN_SAMPLES:
+            return None
+        return histogram.quantile(0.95)
+
+    def success(self, task: str, ttft_ms: float) -> None:
+        with self._lock:
+            self.ttft.setdefault(task, Histogram()).observe(ttft_ms)
+            self.strikes = 0
+
+    def strike(self) -> bool:
+        """Count a failure. Returns True if the backend has just been demoted."""
+        with self._lock:
+            self.strikes += 1
+            if self.strikes < self.max_strikes:
+                return False
+            self.strikes = 0
+            self.demoted_until = time.monotonic() + self.cooldown
+            return True
+
+class Backend:
+    """One LLM server (OpenAI-compatible or Ollama) with its models, scheduler and health."""
+    def __init__(self, name: str, config: Dict, stream: bool = True, scheduler_config: Optional[Dict] = None, health: Optional[BackendHealth] = None) -> None:
+        self.name = name
+        self.use_openai = config.get('use_openai', False)
+        self.models: Dict[str, str] = config['models']
+        self.stream = stream
+        timeout = config.get('request_timeout', 120)
+        # The client libraries are slow to import, so only the ones in use are loaded
+        if self.use_openai:
+            import openai
+            self.client = openai.OpenAI(api_key=config.get('openai_api_key'), base_url=config.get('openai_base_url'), timeout=timeout)
+        else:
+            import ollama
+            self.client = ollama.Client(host=config['base_url'], timeout=timeout)
+        self.scheduler = get_scheduler(name, scheduler_config or {})
+        self.health = health or BackendHealth()
+
+    def model(self, role: str = '') -> str:
+        """The model for a role ('main', 'translator', ...). Unknown roles are taken as model names."""
+        role = role or 'main'
+        return self.models.get(role, role)
+
+    def warm_up(self) -> None:
+        """Open a keep-alive connection to the backend. Ollama also loads the models into memory,
+        which it does for a generate request with an empty prompt."""
+        if self.use_openai:
+            self.client.models.list()
+        else:
+            for model in dict.fromkeys(self.models.values()):
+                self.client.generate(model=model, prompt='')
+
+    def generate(self, prompt: str, role: str, options: Dict, system: str) -> Iterator[StreamChunk]:
+        model = self.model(role)
+        if self.use_openai:
+            messages = [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ]
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=self.stream,
+                **options
+            )
+            yield from self._openai_chunks(response)
+        else:
+            response = self.client.generate(
+                model=model,
+                system=system,
+                prompt=prompt,
+                options=options,
+                stream=self.stream
+            )
+            yield from self._ollama_chunks(response, lambda part: part['response'])
+
+    def chat(self, messages: List[Dict], role: str, options: Dict) -> Iterator[StreamChunk]:
+        model = self.model(role)
+        if self.use_openai:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=self.stream,
+                **options
+            )
+            yield from self._openai_chunks(response)
+        else:
+            response = self.client.chat(
+                model=model,
+                messages=messages,
+                options=options,
+                stream=self.stream
+            )
+            yield from self._ollama_chunks(response, lambda part: part['message']['content'])
+
+    def _openai_chunks(self, response) -> Iterator[StreamChunk]:
+        if not self.stream:
+            choice = response.choices[0]
+            yield StreamChunk(choice.message.content or "", True, choice.finish_reason)
+            return
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            text = choice.delta.content or ""
+            if text or choice.finish_reason:
+                yield StreamChunk(text, choice.finish_reason is not None, choice.finish_reason)
+
+    def _ollama_chunks(self, response, get_text: Callable) -> Iterator[StreamChunk]:
+        parts = response if self.stream else [response]
+        for part in parts:
+            done = bool(part.get('done'))
+            yield StreamChunk(get_text(part) or "", done, part.get('done_reason') if done else None)
+
+class _Attempt:
+    """A request to one backend, read on its own thread into the pool's event queue.
+    A 'dispatched' event tells when the backend's scheduler let the request through."""
+    def __init__(self, backend: Backend, call: Callable[[Backend], Iterator[StreamChunk]], priority: int, events: queue.Queue) -> None:
+        self.backend = backend
+        self.started = time.monotonic()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(call, priority, events), name=f"llm-{backend.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self, call: Callable[[Backend], Iterator[StreamChunk]], priority: int, events: queue.Queue) -> None:
+        def dispatch() -> Iterator[StreamChunk]:
+            if self.cancelled.is_set():
+                # The race was settled while this attempt waited in the scheduler's queue
+                return iter(())
+            events.put((self, 'dispatched', time.monotonic()))
+            return call(self.backend)
+
+        stream = None
+        try:
+            stream = self.backend.scheduler.run(dispatch, priority)
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                events.put((self, 'chunk', chunk))
+            events.put((self, 'end', None))
+        except Exception as e:
+            events.put((self, 'error', e))
+        finally:
+            if stream is not None:
+                stream.close()
+
+class BackendPool:
+    """The configured backends, in order of preference, with failover and hedging.
+
+    A request goes to the first healthy backend. If its first token has not arrived by the
+    hedge deadline (the backend's p95 time to first token for the task times p95_factor, or
+    after_ms until there are enough samples), the same request is sent to the next backend;
+    whichever streams first wins and the other is cancelled. A backend that fails before its
+    first token is replaced at once. If nothing streams within the task's timeout, counted
+    from when the request left the scheduler's queue, the request fails with
+    BackendUnavailable, so a stalled server cannot hang the caller. Without a timeout and with
+    a single backend, requests are streamed directly, without a reader thread."""
+    def __init__(self, backends: List[Backend], timeouts: Optional[Dict] = None, hedging: Optional[Dict] = None) -> None:
+        self.backends = backends
+        self.timeouts = timeouts or {}
+        hedging = hedging or {}
+        self.hedging = hedging.get('enabled', True) and len(backends) > 1
+        self.hedge_after_ms = hedging.get('after_ms', 3000)
+        self.p95_factor = hedging.get('p95_factor', 1.5)
+        self.hedge_min_ms = hedging.get('min_ms', 500)
+
+    @property
+    def primary(self) -> Backend:
+        return self.ordered()[0]
+
+    def ordered(self) -> List[Backend]:
+        return sorted(self.backends, key=lambda backend: backend.health.demoted)
+
+    def timeout(self, task: str) -> float:
+        """Seconds to the first token, 0 for no limit."""
+        return self.timeouts.get(task, self.timeouts.get('default', 0)) / 1000
+
+    def hedge_delay(self, backend: Backend, task: str) -> float:
+        p95 = backend.health.p95(task)
+        delay_ms = max(self.hedge_min_ms, p95 * self.p95_factor) if p95 is not None else self.hedge_after_ms
+        return delay_ms / 1000
+
+    def stream(self, task: str, call: Callable[[Backend], Iterator[StreamChunk]], priority: int = INTERACTIVE) -> Iterator[StreamChunk]:
+        timeout = self.timeout(task)
+        if len(self.backends) == 1 and not timeout:
+            backend = self.backends[0]
+            return backend.scheduler.run(lambda: call(backend), priority)
+        return self._race(task, call, priority, timeout)
+
+    def _race(self, task: str, call: Callable[[Backend], Iterator[StreamChunk]], priority: int, timeout: float) -> Iterator[StreamChunk]:
+        started = time.monotonic()
+        events: queue.Queue = queue.Queue()
+        candidates = self.ordered()
+        attempts: List[_Attempt] = []
+        failed: List[_Attempt] = []
+        last_error: Optional[Exception] = None
+
+        def launch() -> None:
+            attempts.append(_Attempt(candidates[len(attempts)], call, priority, events))
+
+        launch()
+        hedge_at = started + self.hedge_delay(candidates[0], task) if self.hedging else None
+        # Time spent waiting for a scheduler slot (e.g. behind a cold model load) is not counted
+        dispatched_at: Optional[float] = None
+        winner: Optional[_Attempt] = None
+        first: Optional[StreamChunk] = None
+        try:
+            while winner is None:
+                timeout_at = dispatched_at + timeout if timeout and dispatched_at is not None else None
+                deadlines = [d for d in (timeout_at, hedge_at) if d is not None]
+                wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                try:
+                    attempt, kind, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        if len(attempts) < len(candidates):
+                            metrics.inc('llm_hedges_total', task=task, backend=candidates[len(attempts)].name)
+                            launch()
+                        continue
+                    names = ", ".join(a.backend.name for a in attempts)
+                    for attempt in attempts:
+                        self._strike(attempt.backend)
+                    raise BackendUnavailable(f"No answer from {names} within {timeout:g} s")
+                if attempt in failed:
+                    continue
+                if kind == 'dispatched':
+                    dispatched_at = payload if dispatched_at is None else dispatched_at
+                    continue
+                if kind == 'error':
+                    last_error = payload
+                    failed.append(attempt)
+                    logging.warning(f"LLM backend {attempt.backend.name} failed: {payload}")
+                    self._strike(attempt.backend)
+                    if len(attempts) < len(candidates):
+                        metrics.inc('llm_failovers_total', task=task, backend=candidates[len(attempts)].name)
+                        launch()
+                    elif len(failed) == len(attempts):
+                        if len(attempts) == 1:
+                            raise payload
+                        raise BackendUnavailable(f"Every LLM backend failed, the last with: {payload}") from payload
+                    continue
+                winner, first = attempt, payload
+            self._settle(task, winner, attempts, failed)
+            if first is not None:
+                yield first
+                while True:
+                    attempt, kind, payload = events.get()
+                    if attempt is not winner:
+                        continue
+                    if kind == 'chunk':
+                        yield payload
+                    elif kind == 'error':
+                        raise payload
+                    else:
+                        break
+        finally:
+            for attempt in attempts:
+                attempt.cancelled.set()
+
+    def _settle(self, task: str, winner: _Attempt, attempts: List[_Attempt], failed: List[_Attempt]) -> None:
+        """Cancel the losers, record the winner's time to first token and strike slower backends
+        that were asked first."""
+        ttft_ms = (time.monotonic() - winner.started) * 1000
+        winner.backend.health.success(task, ttft_ms)
+        metrics.inc('llm_backend_wins_total', task=task, backend=winner.backend.name)
+        for attempt in attempts:
+            if attempt is winner:
+                continue
+            attempt.cancelled.set()
+            if attempt not in failed and attempt.started < winner.started:
+                self._strike(attempt.backend)
+
+    @staticmethod
+    def _strike(backend: Backend) -> None:
+        if backend.health.strike():
+            logging.warning(f"LLM backend {backend.name} is demoted for {backend.health.cooldown:g} s")
+            metrics.inc('llm_backend_demotions_total', backend=backend.name)
+
+def build_pool(config: Dict, stream: bool = True) -> BackendPool:
+    """The backends of the llm config section: llm.backends if present, otherwise one backend
+    made of the top-level use_openai, base_url and models keys."""
+    hedging = config.get('hedging') or {}
+    health_config = {'max_strikes': hedging.get('max_strikes', 3), 'cooldown': hedging.get('cooldown_s', 60)}
+    scheduler_config = config.get('scheduler') or {}
+    entries = config.get('backends') or [{'name': 'openai' if config.get('use_openai') else config['base_url'], **config}]
+    backends = [
+        Backend(
+            entry.get('name') or f"backend{i}",
+            {**entry, 'models': entry.get('models') or config['models']},
+            stream,
+            {**scheduler_config, **(entry.get('scheduler') or {})},
+            BackendHealth(**health_config),
+        )
+        for i, entry in enumerate(entries)
+    ]
+    return BackendPool(backends, config.get('timeouts'), hedging)
@@ -0,0 +1,34 @@
+from typing import Dict, Iterable, Iterator
+
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.document import Document
+
+from .word_manager import WordManager
+
+class PrefixCompleter(Completer):
+    """Completes prompt input from the database. sources maps what is typed to a completion
+    source of WordManager.complete: 'specific' is plain input, a command such as '/i' is its
+    argument. A bare /command is completed from the command names."""
+    def __init__(self, manager: WordManager, sources: Dict[str, str], commands: Iterable[str] = (), limit: int = 20) -> None:
+        self.manager = manager
+        self.sources = sources
+        self.commands = sorted(command for command in commands if command.startswith('/'))
+        self.limit = limit
+
+    def get_completions(self, document: Document, complete_event) -> Iterator[Completion]:
+        text = document.text_before_cursor.lstrip()
+        if text.startswith('/'):
+            command, space, text = text.partition(' ')
+            if not space:
+                for name in self.commands:
+                    if name.startswith(command):
+                        yield Completion(name, start_position=-len(command))
+                return
+            source = self.sources.get(command)
+            text = text.lstrip()
+        else:
+            source = self.sources.get('specific')
+        if source is None:
+            return
+        for entry in self.manager.complete(source, text, self.limit):
+            yield Completion(entry, start_position=-len(text))
@@ -1,23 +1,76 @@
-from typing import Generator, Dict, Tuple
-import ollama
-import openai
+import re
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from ..config import get_llm_config, get_prompt_path
 from ..utils import Utils
+from ..utils.metrics import metrics
+from ..utils.traces import traces
+from .stream import LLMStream, StreamChunk
+from .singleflight import flights, request_key
+from .scheduler import BACKGROUND, INTERACTIVE
+from .backends import build_pool
+from .router import ModelRouter
 
 DEFAULT_OPTIONS = {'temperature': 0.5, 'max_tokens': 2048}
+GRADE_VERDICTS = ('correct', 'wrong', 'incorrect')
+
+def _grade_head(text: str) -> str:
+    """The grader answer from its first letter on, lowercased. Models often wrap the verdict
+    in markdown, quotes or an emoji: **Correct!**, "Wrong!"."""
+    return re.sub(r'^[\W_]+', '', text).lower()
+
+def grade_format(text: str) -> Optional[bool]:
+    """Whether a grader answer starts as the prompt asks ("Correct!" or "Wrong!"): True if it does,
+    False if it cannot, None while the text is too short to tell."""
+    head = _grade_head(text)
+    if head.startswith(GRADE_VERDICTS):
+        return True
+    if any(verdict.startswith(head) for verdict in GRADE_VERDICTS):
+        return None
+    return False
+
+def grade_verdict(text: str) -> bool:
+    """Whether a grader answer says the guess is correct. Anything else counts as wrong."""
+    return _grade_head(text).startswith('correct')
+
+@dataclass
+class RoundItem:
+    """One answer of a quiz round to be graded."""
+    question: str
+    expected: str
+    answer: str
+
+def parse_round_grades(text: str, count: int) -> Optional[List[Tuple[bool, str]]]:
+    """(correct, explanation) for items 1..count from a batch grader reply, None if the reply
+    is not the JSON array the prompt asks for or misses an item."""
+    start, end = text.find('['), text.rfind(']')
+    if start < 0 or end < start:
+        return None
+    try:
+        entries = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    grades = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get('n'), int) and isinstance(entry.get('correct'), bool):
+            grades[entry['n']] = (entry['correct'], str(entry.get('explanation') or ''))
+    if any(n not in grades for n in range(1, count + 1)):
+        return None
+    return [grades[n] for n in range(1, count + 1)]
 
 class Teacher:
     """A class to manage the ollama teacher assistant."""
     def __init__(self, stream: bool = True) -> None:
         self.config = get_llm_config()
-        self.main_model = self.config['models']['main']
-        self.translator_model = self.config['models']['translator']
-        self.use_openai = self.config.get('use_openai', False)
-        if self.use_openai:
-            self.client = openai.OpenAI(api_key=self.config.get('openai_api_key'))
-        else:
-            self.client = ollama.Client(host=self.config['base_url'])
         self.stream = stream
+        # One or more backends with failover and hedging; each has a scheduler shared by the whole process
+        self.backends = build_pool(self.config, stream)
+        # Identical completions requested while one is in flight share its stream
+        self.single_flight = self.config.get('single_flight', True)
+        self.background_tasks = set((self.config.get('scheduler') or {}).get('background_tasks') or [])
+        # The model of each task, picked from recent latency and answer quality when llm.routing.auto is on
+        self.router = ModelRouter(self.config.get('routing'))
 
         self.system_explain = self._load_prompt('explain')
         self.system_translate = self._load_prompt('translate')
@@ -28,6 +81,7 @@ class Teacher:
         self.system_grader = self._load_prompt('grader')
         self.system_grammar = self._load_prompt('grammar')
         self.system_verbs = self._load_prompt('verbs')
+        self.system_batch_grader = self._load_prompt('batch_grader')
 
         self.explain_options = self._load_options('explain')
         self.translate_options = self._load_options('translate')
@@ -38,9 +92,21 @@ class Teacher:
         self.grader_options = self._load_options('grader')
         self.grammar_options = self._load_options('grammar')
         self.verbs_options = self._load_options('verbs')
+        self.batch_grader_options = self._load_options('batch_grader')
 
         self.chat_history = []
 
+    def warm_up(self) -> None:
+        """Connect to every backend and load their models. A backend that is down is skipped."""
+        errors = []
+        for backend in self.backends.backends:
+            try:
+                backend.warm_up()
+            except Exception as e:
+                errors.append(e)
+        if len(errors) == len(self.backends.backends):
+            raise errors[0]
+
     def _load_prompt(self, prompt_name: str) -> str:
         prompt_path = get_prompt_path(prompt_name)
         with open(prompt_path, 'r', encoding='utf-8') as file:
@@ -48,39 +114,52 @@ class Teacher:
         
     def _load_options(self, prompt_name: str) -> Dict:
         generic = self.config['options']['generic']
-        specific = self.config['options']['specific'][prompt_name]
+        specific = self.config['options']['specific'].get(prompt_name) or {}
         return {**generic, **specific}
 
-    def text_gen(self, prompt: str, model: str = '', options: Dict = DEFAULT_OPTIONS, system: str = '') -> Generator[dict, None, None]:
-        """Generate a text. Completion mode."""
-        the_model = model if model else self.main_model
-        
-        if self.use_openai:
-            messages = [
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt}
-            ]
-            response = self.client.chat.completions.create(
-                model=the_model,
-                messages=messages,
-                stream=self.stream,
-                **options
-            )
-            if self.stream:
-                for chunk in response:
-                    if chunk.choices[0].delta.content is not None:
-                        yield {"response": chunk.choices[0].delta.content}
-            else:
-                yield {"response": response.choices[0].message.content}
-        else:
-            return self.client.generate(
-                model=the_model,
-                system=system,
-                prompt=prompt,
-                options=options,
-                stream=self.stream
-            )
-    
+    def text_gen(self, prompt: str, model: str = '', options: Dict = DEFAULT_OPTIONS, system: str = '', task: str = 'text') -> LLMStream:
+        """Generate a text. Completion mode. model is a role of llm.models ('main', 'translator', ...)
+        or a model name; by default the router picks it for the task. Each backend resolves roles to its own models."""
+        return LLMStream(self._completion(prompt, model or self.router.choose(task), options, system, task), task, record=False)
+
+    def _completion(self, prompt: str, role: str, options: Dict, system: str, task: str) -> Iterator[StreamChunk]:
+        """The chunks of one completion. Its metrics are recorded here, once per upstream request,
+        not by the LLMStream of each caller that shares it."""
+        request = {'model': self.backends.backends[0].model(role), 'system': system, 'prompt': prompt, 'options': options}
+        start = lambda: LLMStream(traces.stream('llm', request, lambda: self._text_gen(prompt, role, options, system, task)), task)
+        if self.single_flight:
+            return flights.stream(request_key(request), start, task)
+        return iter(start())
+
+    def _text_gen(self, prompt: str, role: str, options: Dict, system: str, task: str) -> Iterator[StreamChunk]:
+        chunks = self.backends.stream(task, lambda backend: backend.generate(prompt, role, options, system), self._priority(task))
+        return self.router.timed(task, role, chunks)
+
+    def _escalating(self, task: str, role: str, start: Callable[[str], Iterator[StreamChunk]], check: Callable[[str], Optional[bool]]) -> Iterator[StreamChunk]:
+        """Stream start(role), holding back the first chunks until check() can tell whether the answer
+        is usable. An unusable one is dropped and the request repeated on the next larger model of
+        the task, if there is one, so the caller only sees the answer it keeps."""
+        while True:
+            chunks = start(role)
+            held, text, usable = [], '', None
+            for chunk in chunks:
+                if not isinstance(chunk, StreamChunk):
+                    chunk = StreamChunk(**chunk)
+                held.append(chunk)
+                text += chunk.text
+                usable = check(text)
+                if usable is not None or chunk.done:
+                    break
+            self.router.record_outcome(task, role, usable is not False)
+            larger = self.router.escalate(task, role) if usable is False else None
+            if larger is None:
+                yield from held
+                yield from chunks
+                return
+            chunks.close()
+            metrics.inc('llm_escalations_total', task=task, model=larger)
+            role = larger
+
     def init_convrsation(self, word: str) -> None:
         """Append the initial system message to the chat history."""
         mode, count = self.get_mode(word)
@@ -115,40 +194,37 @@ class Teacher:
         """Append the assistant's response to the chat history."""
         self.chat_history.append({'role': role, 'content': content})
     
-    def conversation(self, prompt: str, options: Dict=DEFAULT_OPTIONS) -> Generator[dict, None, None]:
+    def conversation(self, prompt: str, options: Dict=DEFAULT_OPTIONS, task: str = 'conversation') -> LLMStream:
         """Append the user's message to the chat history and generate a response. Chat mode."""
         self.chat_history.append({'role': 'user', 'content': prompt})
-        
-        if self.use_openai:
-            response = self.client.chat.completions.create(
-                model=self.main_model,
-                messages=self.chat_history,
-                stream=self.stream,
-                **options
-            )
-            if self.stream:
-                for chunk in response:
-                    if chunk.choices[0].delta.content is not None:
-                        yield {"response": chunk.choices[0].delta.content}
-            else:
-                yield {"response": response.choices[0].message.content}
-        else:
-            return self.client.chat(
-                model=self.main_model,
-                messages=self.chat_history,
-                options=options,
-                stream=self.stream
-            )
-
-    def explainer(self, word: str) -> Generator[dict, None, None]:
+        return self.chat(self.chat_history, options, task)
+
+    def chat(self, messages: List[Dict], options: Dict=DEFAULT_OPTIONS, task: str = 'conversation') -> LLMStream:
+        """Generate a response to an explicit message history. Used when several chats share one Teacher."""
+        messages = list(messages)
+        role = self.router.choose(task)
+        request = {'model': self.backends.backends[0].model(role), 'messages': messages, 'options': options}
+        return LLMStream(traces.stream('llm', request, lambda: self._chat(messages, role, options, task)), task)
+
+    def _chat(self, messages: List[Dict], role: str, options: Dict, task: str) -> Iterator[StreamChunk]:
+        chunks = self.backends.stream(task, lambda backend: backend.chat(messages, role, options), self._priority(task))
+        return self.router.timed(task, role, chunks)
+
+    def _priority(self, task: str) -> int:
+        """Tasks listed in llm.scheduler.background_tasks (pregeneration and other batch work)
+        wait behind interactive ones in the backends' schedulers."""
+        return BACKGROUND if task in self.background_tasks else INTERACTIVE
+
+    def explainer(self, word: str) -> LLMStream:
         """Generate an explanation for a word. Using a main model."""
         prompt = f'Explain "{word}".'
         mode, count = self.get_mode(word)
         return self.text_gen(prompt, 
                              system=self.system_explain.format(mode=mode), 
-                             options=self.explain_options)
+                             options=self.explain_options,
+                             task='explain')
     
-    def translator(self, text: str) -> Generator[dict, None, None]:
+    def translator(self, text: str) -> LLMStream:
         """Translate a text from English to a selected language. Using a translator model."""
         prompt = f'The text to translate:\n{text}'
         # print(self.translator_model)
@@ -157,19 +233,20 @@ class Teacher:
         # print(prompt)
 
         return self.text_gen(prompt, 
-                             model=self.translator_model, 
                              system=self.system_translate, 
-                             options=self.translate_options)
+                             options=self.translate_options,
+                             task='translate')
     
-    def game_intro(self, counter: int) -> Generator[dict, None, None]:
+    def game_intro(self, counter: int) -> LLMStream:
         """Generate a game introduction message."""
         prompt = "I'm not ready"
         system = self.system_game_intro.format(N=counter)
         return self.text_gen(prompt, 
                              system=system, 
-                             options=self.game_intro_options)
+                             options=self.game_intro_options,
+                             task='game_intro')
     
-    def riddler(self, word: str) -> Tuple[Generator[dict, None, None], str]:
+    def riddler(self, word: str) -> Tuple[LLMStream, str, int]:
         """Generate a riddle based on the prompt."""
         prompt = f'The word is "{word}".'
         mode, count = self.get_mode(word)
@@ -177,17 +254,42 @@ class Teacher:
         system = self.system_riddle.format(mode=mode)
         return self.text_gen(prompt, 
                              system=system, 
-                             options=self.riddle_options), count_clue, count
+                             options=self.riddle_options,
+                             task='riddle'), count_clue, count
        
-    def grader(self, word: str, answer: str) -> Generator[dict, None, None]:
-        """Grade the user's answer to the riddle."""
+    def grader(self, word: str, answer: str) -> LLMStream:
+        """Grade the user's answer to the riddle. An answer that does not start with the verdict
+        is retried on a larger model (see llm.routing)."""
         prompt = f'The answer is "{answer}".'
         mode, count = self.get_mode(word)
         system = self.system_grader.format(WORD=word, mode=mode)
-        return self.text_gen(prompt, 
-                             system=system, 
-                             options=self.grader_options)
+        start = lambda role: self._completion(prompt, role, self.grader_options, system, 'grader')
+        return LLMStream(self._escalating('grader', self.router.choose('grader'), start, grade_format), 'grader', record=False)
     
+    def grade_round(self, items: List[RoundItem]) -> List[Tuple[bool, str]]:
+        """Grade every answer of a quiz round in one request. Returns (correct, explanation) per item.
+        A reply that does not parse is retried on the next larger model of the batch_grader task;
+        if none gives a usable one, the items are graded one by one."""
+        prompt = json.dumps([
+            {'n': n, 'question': item.question, 'expected': item.expected, 'answer': item.answer}
+            for n, item in enumerate(items, 1)
+        ], ensure_ascii=False)
+        role = self.router.choose('batch_grader')
+        while role is not None:
+            stream = LLMStream(self._completion(prompt, role, self.batch_grader_options, self.system_batch_grader, 'batch_grader'), 'batch_grader', record=False)
+            grades = parse_round_grades(stream.text(), len(items))
+            self.router.record_outcome('batch_grader', role, grades is not None)
+            if grades is not None:
+                return grades
+            role = self.router.escalate('batch_grader', role)
+            if role is not None:
+                metrics.inc('llm_escalations_total', task='batch_grader', model=role)
+        grades = []
+        for item in items:
+            text = self.grader(item.expected, item.answer).text()
+            grades.append((grade_verdict(text), text.strip()))
+        return grades
+
     def word_count(self, text: str) -> int:
         """Count the number of words in the text."""
         return Utils.count_words(text)
@@ -0,0 +1,101 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Bumped whenever lookup_key changes, so keys stored by an older version are recomputed
+KEY_VERSION = 2
+# Irregular forms (past tenses, plurals). The keys must not depend on the database, so the
+# user's irregular_verbs table is not used here. Forms that are words of their own (left, saw,
+# lay, rose, bit, felt, found, better...) are left out: a key must never join two headwords
+IRREGULAR = {
+    'was': 'be', 'were': 'be', 'been': 'be', 'is': 'be', 'are': 'be', 'am': 'be',
+    'had': 'have', 'has': 'have', 'did': 'do', 'done': 'do', 'does': 'do',
+    'went': 'go', 'gone': 'go', 'goes': 'go', 'ran': 'run', 'came': 'come', 'seen': 'see',
+    'took': 'take', 'taken': 'take', 'gave': 'give', 'got': 'get', 'gotten': 'get',
+    'made': 'make', 'said': 'say', 'knew': 'know', 'known': 'know',
+    'told': 'tell', 'kept': 'keep',
+    'brought': 'bring', 'bought': 'buy', 'caught': 'catch', 'taught': 'teach', 'sought': 'seek',
+    'began': 'begin', 'begun': 'begin', 'wrote': 'write', 'written': 'write',
+    'spoken': 'speak', 'broken': 'break', 'chose': 'choose', 'chosen': 'choose',
+    'drove': 'drive', 'driven': 'drive', 'ate': 'eat', 'eaten': 'eat', 'fallen': 'fall',
+    'flew': 'fly', 'flown': 'fly', 'forgot': 'forget', 'forgotten': 'forget', 'grew': 'grow',
+    'grown': 'grow', 'held': 'hold', 'lain': 'lie', 'led': 'lead', 'lost': 'lose',
+    'meant': 'mean', 'met': 'meet', 'paid': 'pay', 'rode': 'ride', 'ridden': 'ride',
+    'risen': 'rise', 'sold': 'sell', 'sent': 'send', 'shook': 'shake', 'shaken': 'shake',
+    'sang': 'sing', 'sung': 'sing', 'sat': 'sit', 'slept': 'sleep', 'spent': 'spend', 'stood': 'stand',
+    'stolen': 'steal', 'swam': 'swim', 'swum': 'swim', 'threw': 'throw',
+    'thrown': 'throw', 'understood': 'understand', 'woke': 'wake', 'woken': 'wake', 'wore': 'wear',
+    'worn': 'wear', 'won': 'win', 'built': 'build', 'heard': 'hear', 'drew': 'draw', 'drawn': 'draw',
+    'drank': 'drink', 'fought': 'fight', 'hid': 'hide', 'hidden': 'hide',
+    'bitten': 'bite', 'blew': 'blow', 'blown': 'blow', 'froze': 'freeze', 'frozen': 'freeze',
+    'children': 'child', 'men': 'man', 'women': 'woman', 'feet': 'foot',
+    'teeth': 'tooth', 'mice': 'mouse',
+}
+# Words the suffix rules would fold into other words
+NO_STEM = {
+    'news', 'series', 'species', 'means', 'always', 'perhaps', 'during', 'morning', 'evening',
+    'nothing', 'something', 'anything', 'everything', 'united', 'wicked', 'crooked', 'rugged',
+    'ragged', 'dogged', 'jagged', 'wretched', 'wedding', 'pudding', 'herring', 'clothing',
+}
+_VOWEL = re.compile(r'[aeiouy]')
+_APOSTROPHES = str.maketrans({'’': "'", '‘': "'", '`': "'"})
+
+@lru_cache(maxsize=4096)
+def normal_form(text: str) -> str:
+    """Case, width, accents and punctuation folded away: "  Well-Being! " -> "well being".
+    Apostrophes inside words are kept (don't, o'clock)."""
+    text = unicodedata.normalize('NFKD', text.translate(_APOSTROPHES)).casefold()
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    tokens = re.findall(r"[\w]+(?:'[\w]+)*", text)
+    return ' '.join(tokens)
+
+def _shape(stem: str) -> str:
+    """'c' and 'v' for the consonants and vowels of stem: "hop" -> "cvc". A y after a consonant is a vowel."""
+    return ''.join('v' if c in 'aeiou' or (c == 'y' and i and stem[i - 1] not in 'aeiou') else 'c' for i, c in enumerate(stem))
+
+def _restore_e(stem: str) -> str:
+    """The base form of a stem that lost -ing or -ed: the silent e the suffix replaced is put
+    back (hoping -> hope, dancing -> dance), a doubled consonant is undone (hopping -> hop)."""
+    if stem[-1] == stem[-2] and stem[-1] not in 'lsz' and not _VOWEL.match(stem[-1]):
+        return stem[:-1]
+    shape = _shape(stem)
+    # One syllable ending consonant-vowel-consonant: hop(e), car(e), rat(e). Longer stems
+    # (visit, open, offer) take no e, a bare c, v or u never ends a word, and neither does a
+    # consonant before a final l or s (troubl-e, sens-e)
+    if (shape.endswith('cvc') and stem[-1] not in 'wxy' and shape.count('vc') == 1) \
+            or stem.endswith(('c', 'v', 'u')) or re.search(r'[bcdfgkptz]l$|[lnpr]s$', stem):
+        return stem + 'e'
+    return stem
+
+def _stem(token: str) -> str:
+    """A light suffix stripper, applied the same way to stored words and to queries. A word
+    without a suffix is its own stem, so distinct headwords (car, care) keep distinct keys;
+    an unsure rule should rather leave a variant unmatched than join two words."""
+    if token in IRREGULAR:
+        return IRREGULAR[token]
+    if len(token) <= 3 or "'" in token or token in NO_STEM:
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        token = token[:-3] + 'y'
+    elif token.endswith('ied') and len(token) > 4:
+        return token[:-3] + 'y'
+    elif token.endswith('sses'):
+        token = token[:-2]
+    elif token.endswith('es') and token[:-2].endswith(('x', 'zz', 'ch', 'sh')):
+        token = token[:-2]
+    elif token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        token = token[:-1]
+    if token.endswith('eed'):
+        # agreed -> agree, but need, feed and speed are words of their own
+        return token[:-1] if 'vc' in _shape(token[:-3]) else token
+    for suffix in ('ing', 'ed'):
+        stem = token[:-len(suffix)]
+        if token.endswith(suffix) and len(stem) >= 3 and _VOWEL.search(stem):
+            return _restore_e(stem)
+    return token
+
+@lru_cache(maxsize=4096)
+def lookup_key(text: str) -> str:
+    """The key stored in words.lookup_key: the normal form with every word reduced to its stem,
+    so "Running", "running " and "ran" all give the key of "run"."""
+    return ' '.join(_stem(token) for token in normal_form(text).split())
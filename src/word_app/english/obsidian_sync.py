@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+from math import floor
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import yaml
+
+from .word_manager import WordManager, Word, STATES
+from ..config import get_obsidian_config
+from ..utils.metrics import metrics
+
+MANIFEST_NAME = ".word_app_sync.json"
+UNCATEGORIZED = "Uncategorized"
+
+@dataclass
+class SyncResult:
+    written: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+class VaultExporter:
+    """Render the words database into Obsidian notes. Only notes whose content changed are rewritten."""
+    def __init__(self, manager: Optional[WordManager] = None, sync_dir: Optional[str] = None, workers: int = 8) -> None:
+        self.manager = manager if manager else WordManager()
+        if not sync_dir:
+            config = get_obsidian_config()
+            sync_dir = config.get('sync_dir') or os.path.join(config['english_dir'], 'word_app')
+        self.sync_dir = sync_dir
+        self.workers = workers
+        self.manifest_path = os.path.join(self.sync_dir, MANIFEST_NAME)
+        self.manifest: Dict[str, Dict] = {}
+
+    def sync(self, per_word: bool = False, prune: bool = False) -> SyncResult:
+        os.makedirs(self.sync_dir, exist_ok=True)
+        self._load_manifest()
+
+        # The DB is read once on this thread; each note is rendered and written on the pool
+        categories: Dict[str, List[Word]] = {}
+        for word in self.manager.fetch_words('all'):
+            categories.setdefault(word.category or '', []).append(word)
+
+        notes: Dict[str, Callable[[], str]] = {}
+        folders = self._file_names(categories)
+        for category, words in categories.items():
+            if per_word:
+                files = self._file_names(word.word for word in words)
+                for word in words:
+                    notes[os.path.join(folders[category], f"{files[word.word]}.md")] = partial(self.render_word, word)
+            else:
+                notes[f"{folders[category]}.md"] = partial(self.render_category, category, words)
+
+        result = SyncResult()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for rel_path, entry, written in executor.map(lambda item: self._write_note(item[0], item[1]()), notes.items()):
+                self.manifest[rel_path] = entry
+                if written:
+                    result.written += 1
+                else:
+                    result.unchanged += 1
+
+        if prune:
+            for rel_path in set(self.manifest) - set(notes):
+                try:
+                    os.remove(os.path.join(self.sync_dir, rel_path))
+                except FileNotFoundError:
+                    pass
+                del self.manifest[rel_path]
+                result.removed += 1
+
+        self._save_manifest()
+        return result
+
+    def render_category(self, category: str, words: List[Word]) -> str:
+        words = sorted(words, key=lambda w: w.word.lower())
+        average = sum(w.state for w in words) / len(words) if words else 0
+        header = {
+            'tags': ['english', 'words'],
+            'cat': category,
+            'count': len(words),
+            'status': STATES[floor(average)],
+            'score': round(average, 2),
+        }
+        lines = ["| Word | State | Asks |", "| --- | --- | --- |"]
+        for w in words:
+            lines.append(f"| {self._cell(w.word)} | {STATES[w.state]} | {w.ask_counter} |")
+        return self._note(header, "\n".join(lines))
+
+    def render_word(self, word: Word) -> str:
+        header = {
+            'tags': ['english', 'word'],
+            'cat': word.category,
+            'state': STATES[word.state],
+            'asks': word.ask_counter,
+        }
+        body = f"# {word.word}\n\n{word.explanation_en or ''}\n\n---\n\n{word.explanation_ru or ''}"
+        return self._note(header, body)
+
+    def _note(self, header: Dict, body: str) -> str:
+        front_matter = yaml.dump(header, sort_keys=False, allow_unicode=True)
+        return f"---\n{front_matter}---\n{body.rstrip()}\n"
+
+    def _write_note(self, rel_path: str, content: str) -> Tuple[str, Dict, bool]:
+        """Write a note unless its current content already has the same hash.
+        Returns the manifest entry and whether the file was written."""
+        with metrics.timer('obsidian_io_ms', op='sync_note'):
+            return self._sync_note(rel_path, content)
+
+    def _sync_note(self, rel_path: str, content: str) -> Tuple[str, Dict, bool]:
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.sync_dir, rel_path)
+        known = self.manifest.get(rel_path)
+        try:
+            stat = os.stat(path)
+            if known and known['mtime'] == stat.st_mtime and known['size'] == stat.st_size:
+                current = known['hash']
+            else:
+                with open(path, 'rb') as file:
+                    current = hashlib.sha256(file.read()).hexdigest()
+            if current == digest:
+                return rel_path, {'hash': digest, 'mtime': stat.st_mtime, 'size': stat.st_size}, False
+        except FileNotFoundError:
+            pass
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        stat = os.stat(path)
+        return rel_path, {'hash': digest, 'mtime': stat.st_mtime, 'size': stat.st_size}, True
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def _save_manifest(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @classmethod
+    def _file_names(cls, names: Iterable[str]) -> Dict[str, str]:
+        """File names for names, unique even on a case-insensitive file system. When names
+        sanitize to the same file name, the first in sorted order keeps it and the others get a
+        short hash of their own name, so every note keeps its file from one sync to the next."""
+        file_names: Dict[str, str] = {}
+        taken = set()
+        for name in sorted(names):
+            file_name = cls._file_name(name)
+            if file_name.casefold() in taken:
+                file_name = f"{file_name} ~{hashlib.sha1(name.encode('utf-8')).hexdigest()[:6]}"
+            taken.add(file_name.casefold())
+            file_names[name] = file_name
+        return file_names
+
+    @staticmethod
+    def _file_name(name: str) -> str:
+        return re.sub(r'[\\/:*?"<>|#^\[\]]', '_', name).strip() or UNCATEGORIZED
+
+    @staticmethod
+    def _cell(text: str) -> str:
+        return text.replace('|', '\\|')
@@ -0,0 +1,185 @@
+import os
+import json
+import mmap
+import logging
+import zlib
+import struct
+import bisect
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+from .word_manager import Word
+from .lookup import normal_form
+from ..utils.metrics import metrics
+
+# The last byte is the format version. Version 1 sorted the index by lookup_key
+MAGIC = b'WAPACK\x00\x02'
+# magic, entry count, offset of the index, offset of the keys
+HEADER = struct.Struct('<8sIQQ')
+# key offset, key length, entry offset, entry length; one record per entry, sorted by key
+INDEX = struct.Struct('<QIQI')
+
+class _Keys:
+    """The sorted keys of a pack as a read-only sequence, so bisect can search the mapped file directly."""
+    def __init__(self, pack: 'DictionaryPack') -> None:
+        self.pack = pack
+
+    def __len__(self) -> int:
+        return self.pack.count
+
+    def __getitem__(self, i: int) -> bytes:
+        key_offset, key_length, _, _ = self.pack._record(i)
+        return self.pack._map[key_offset:key_offset + key_length]
+
+class DictionaryPack:
+    """A prebuilt, read-only dictionary: explanations and translations of common headwords,
+    looked up offline before anything is generated.
+
+    The file is memory-mapped. Entries are zlib-compressed JSON; a fixed-size index sorted
+    by normal form (see lookup.py) points at them, so a lookup is a binary search over the
+    index that touches a few pages and decompresses only the entries that match.
+
+    Only the spelling is folded: unlike WordManager.resolve_word, the pack never answers
+    with another form of the word (car is not care, running is not run), because its
+    entry would be shown and saved as the explanation of the word asked for."""
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty, not a dictionary pack")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short for a dictionary pack")
+        magic, self.count, self._index_offset, _ = HEADER.unpack_from(self._map, 0)
+        if magic == MAGIC and self._index_offset + self.count * INDEX.size > len(self._map):
+            self.close()
+            raise ValueError(f"{path} is truncated, rebuild it with eng pack build")
+        if magic != MAGIC:
+            self.close()
+            if magic[:-1] == MAGIC[:-1]:
+                raise ValueError(f"{path} is a dictionary pack of another version, rebuild it with eng pack build")
+            raise ValueError(f"{path} is not a dictionary pack")
+        self._keys = _Keys(self)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _record(self, i: int) -> Tuple[int, int, int, int]:
+        return INDEX.unpack_from(self._map, self._index_offset + i * INDEX.size)
+
+    def _entry(self, i: int) -> Word:
+        _, _, offset, length = self._record(i)
+        data = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        return Word(data['word'], data.get('category', ''), data['explanation_en'], data['explanation_ru'], 0, 0)
+
+    def lookup(self, text: str) -> Optional[Word]:
+        """The entry for a word, ignoring case, accents and punctuation ("Well Being!" finds
+        "well-being"); the exact spelling wins if the pack has several. The returned Word is
+        not in the database: its counter and state are 0."""
+        key = normal_form(text).encode()
+        start = bisect.bisect_left(self._keys, key) if key else self.count
+        end = start
+        while end < self.count and self._keys[end] == key:
+            end += 1
+        if start == end:
+            metrics.inc('dictionary_pack_lookups_total', match='miss')
+            return None
+        metrics.inc('dictionary_pack_lookups_total', match='hit')
+        return min((self._entry(i) for i in range(start, end)), key=lambda w: (w.word != text, len(w.word), w.word))
+
+def open_pack(path: Optional[str]) -> Optional[DictionaryPack]:
+    """The pack at path, None if there is no path or file, or the file cannot be used (a
+    pack of another version is logged, so the dictionary simply falls back to the LLM)."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return DictionaryPack(path)
+    except ValueError as e:
+        logging.warning(str(e))
+        return None
+
+def build_pack(entries: Iterable[Tuple[str, str, str, str]], path: str) -> int:
+    """Write (word, category, explanation_en, explanation_ru) entries to a pack file and
+    return their count. A later entry replaces an earlier one with the same word. The file
+    is written next to path and renamed over it, so readers never see a partial pack."""
+    words = {}
+    for word, category, explanation_en, explanation_ru in entries:
+        if word and explanation_en:
+            words[word] = {'word': word, 'category': category or '', 'explanation_en': explanation_en, 'explanation_ru': explanation_ru or ''}
+    items: List[Tuple[bytes, str]] = sorted((normal_form(word).encode(), word) for word in words)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(b'\x00' * HEADER.size)
+            entry_locations = []
+            for _, word in items:
+                data = zlib.compress(json.dumps(words[word], ensure_ascii=False).encode(), 9)
+                entry_locations.append((file.tell(), len(data)))
+                file.write(data)
+            keys_offset = file.tell()
+            key_locations = []
+            for key, _ in items:
+                key_locations.append((file.tell(), len(key)))
+                file.write(key)
+            index_offset = file.tell()
+            for (key_offset, key_length), (entry_offset, entry_length) in zip(key_locations, entry_locations):
+                file.write(INDEX.pack(key_offset, key_length, entry_offset, entry_length))
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, len(items), index_offset, keys_offset))
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(items)
+
+def pack_entries(word_list: Optional[str] = None, workers: int = 8) -> Iterable[Tuple[str, str, str, str]]:
+    """The entries for `eng pack build`: every word of the database, or the lines of word_list.
+    A line is either a JSON object with word, category, explanation_en and explanation_ru, or a
+    bare word, which is explained and translated by the LLM (workers at a time)."""
+    if word_list is None:
+        from .word_manager import WordManager
+        for word in WordManager().fetch_words('all'):
+            yield word.word, word.category, word.explanation_en, word.explanation_ru
+        return
+
+    to_generate = []
+    with open(word_list, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                data = json.loads(line)
+                yield data['word'], data.get('category', ''), data.get('explanation_en', ''), data.get('explanation_ru', '')
+            else:
+                to_generate.append(line)
+    if not to_generate:
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    from .llm import Teacher
+    teacher = Teacher(stream=False)
+
+    def generate(word: str) -> Optional[Tuple[str, str, str, str]]:
+        try:
+            explanation = teacher.explainer(word).text()
+            return word, '', explanation, teacher.translator(explanation).text()
+        except Exception as e:
+            logging.warning(f"Skipping '{word}': {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for entry in executor.map(generate, to_generate):
+            if entry is not None:
+                yield entry
@@ -0,0 +1,116 @@
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.metrics import metrics
+
+# Tasks that use another model than 'main' when llm.routing does not mention them
+DEFAULT_ROLES = {'translate': 'translator'}
+
+class TaskRoute:
+    """The candidate models of a task, cheapest first, and the targets the chosen one must meet."""
+    def __init__(self, models: List[str], target_ms: float = 0, max_failure_rate: float = 0.2) -> None:
+        self.models = models
+        self.target_ms = target_ms
+        self.max_failure_rate = max_failure_rate
+        self.requests = 0
+
+    @classmethod
+    def from_config(cls, entry) -> 'TaskRoute':
+        """An entry is a model role, a list of roles, or a dict with models, target_ms and max_failure_rate."""
+        if isinstance(entry, str):
+            return cls([entry])
+        if isinstance(entry, list):
+            return cls(list(entry))
+        models = entry.get('models') or ['main']
+        return cls([models] if isinstance(models, str) else list(models), entry.get('target_ms', 0), entry.get('max_failure_rate', 0.2))
+
+class ModelRouter:
+    """Picks the model for each task (llm.routing).
+
+    Models are roles of llm.models (or plain model names), listed cheapest first. With auto
+    selection the router takes the first model whose recent p95 time to first token meets the
+    task's target_ms and whose recent rate of unusable answers (a grader reply that does not
+    parse) stays under max_failure_rate; a model without enough samples yet is tried, so it
+    gets some. If none qualifies, the fastest usable one is taken. Every probe_every requests
+    the cheapest model is tried anyway, so a model skipped while the server was busy can
+    come back. Without auto the first model is always used, and escalate() is the only way
+    to a larger one."""
+    def __init__(self, config: Optional[Dict] = None) -> None:
+        config = config or {}
+        self.auto = config.get('auto', False)
+        self.window = config.get('window', 50)
+        self.min_samples = config.get('min_samples', 10)
+        self.probe_every = config.get('probe_every', 50)
+        self.routes: Dict[str, TaskRoute] = {task: TaskRoute.from_config(entry) for task, entry in (config.get('tasks') or {}).items()}
+        self._latency: Dict[Tuple[str, str], Deque[float]] = {}
+        self._outcomes: Dict[Tuple[str, str], Deque[bool]] = {}
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> TaskRoute:
+        route = self.routes.get(task)
+        if route is None:
+            route = self.routes[task] = TaskRoute([DEFAULT_ROLES.get(task, 'main')])
+        return route
+
+    def choose(self, task: str) -> str:
+        route = self.route(task)
+        with self._lock:
+            route.requests += 1
+            if not self.auto or len(route.models) == 1:
+                return route.models[0]
+            if self.probe_every and route.requests % self.probe_every == 0:
+                return route.models[0]
+            fastest, fastest_p95 = None, None
+            for model in route.models:
+                key = (task, model)
+                if self._failure_rate(key) > route.max_failure_rate:
+                    continue
+                p95 = self._p95(key)
+                if p95 is None or not route.target_ms or p95 <= route.target_ms:
+                    return model
+                if fastest_p95 is None or p95 < fastest_p95:
+                    fastest, fastest_p95 = model, p95
+            return fastest or route.models[-1]
+
+    def escalate(self, task: str, model: str) -> Optional[str]:
+        """The next larger model for the task, None if model is the largest."""
+        models = self.route(task).models
+        if model not in models:
+            return None
+        index = models.index(model) + 1
+        return models[index] if index < len(models) else None
+
+    def timed(self, task: str, model: str, chunks: Iterable) -> Iterator:
+        """Pass the chunks through, recording the time to the first one for the model."""
+        started = time.perf_counter()
+        first = True
+        for chunk in chunks:
+            if first:
+                first = False
+                self.record_latency(task, model, (time.perf_counter() - started) * 1000)
+            yield chunk
+
+    def record_latency(self, task: str, model: str, ttft_ms: float) -> None:
+        with self._lock:
+            self._latency.setdefault((task, model), deque(maxlen=self.window)).append(ttft_ms)
+
+    def record_outcome(self, task: str, model: str, usable: bool) -> None:
+        with self._lock:
+            self._outcomes.setdefault((task, model), deque(maxlen=self.window)).append(usable)
+        if not usable:
+            metrics.inc('llm_unusable_answers_total', task=task, model=model)
+
+    def _p95(self, key: Tuple[str, str]) -> Optional[float]:
+        samples = self._latency.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def _failure_rate(self, key: Tuple[str, str]) -> float:
+        outcomes = self._outcomes.get(key)
+        if not outcomes or len(outcomes) < self.min_samples:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
@@ -0,0 +1,164 @@
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.metrics import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+class TokenBucket:
+    """Allows rate requests per second on average with bursts of up to burst. A rate of 0 means no limit."""
+    def __init__(self, rate: float = 0, burst: float = 1) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+def is_overload(error: BaseException) -> bool:
+    """A 429 or 5xx from the backend, or a timeout. Both openai and ollama errors carry status_code."""
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, TimeoutError) or type(error).__name__ in ('APITimeoutError', 'ReadTimeout', 'ConnectTimeout')
+
+class BackendScheduler:
+    """Admission control in front of one LLM backend.
+
+    Requests wait in a priority queue (interactive before background, FIFO within a class)
+    until a concurrency slot and a rate token are free. The concurrency limit adapts with
+    AIMD: every request answered within the latency target adds 1/limit, so the limit grows
+    by about one per round of requests; a 429/5xx, a timeout or a time to first token above
+    the target halves it, at most once per round (requests admitted before the last
+    decrease do not decrease it again)."""
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 4,
+        min_concurrency: int = 1,
+        rate: float = 0,
+        burst: float = 1,
+        latency_target_ms: float = 0,
+        backoff: float = 0.5,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.latency_target_ms = latency_target_ms
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.in_flight = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def acquire(self, priority: int = INTERACTIVE) -> float:
+        """Block until the request may go to the backend. Returns the admission time."""
+        started = time.perf_counter()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._publish()
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self.in_flight < max(1, int(self.limit)):
+                        delay = self.bucket.delay()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self.bucket.take()
+            self.in_flight += 1
+            self._publish()
+            self._cond.notify_all()
+        admitted = time.perf_counter()
+        metrics.observe('llm_queue_wait_ms', (admitted - started) * 1000, backend=self.name, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        return admitted
+
+    def release(self, admitted: float, ttft_ms: Optional[float], overloaded: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self._decrease(admitted, 'error')
+            elif ttft_ms is not None and self.latency_target_ms and ttft_ms > self.latency_target_ms:
+                self._decrease(admitted, 'latency')
+            elif ttft_ms is not None:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._publish()
+            self._cond.notify_all()
+
+    def _decrease(self, admitted: float, reason: str) -> None:
+        if admitted < self._last_decrease:
+            return
+        self.limit = max(float(self.min_concurrency), self.limit * self.backoff)
+        self._last_decrease = time.perf_counter()
+        metrics.inc('llm_backoff_total', backend=self.name, reason=reason)
+
+    def _publish(self) -> None:
+        metrics.set('llm_queue_depth', len(self._waiting), backend=self.name)
+        metrics.set('llm_in_flight', self.in_flight, backend=self.name)
+        metrics.set('llm_concurrency_limit', self.limit, backend=self.name)
+
+    def run(self, start: Callable[[], Iterable], priority: int = INTERACTIVE) -> Iterator:
+        """Stream start() once admitted. The slot is held until the stream ends; its time to
+        first chunk and its errors drive the concurrency limit."""
+        admitted = self.acquire(priority)
+        first: Optional[float] = None
+        overloaded = False
+        try:
+            for chunk in start():
+                if first is None:
+                    first = (time.perf_counter() - admitted) * 1000
+                yield chunk
+        except Exception as e:
+            overloaded = is_overload(e)
+            raise
+        finally:
+            self.release(admitted, first, overloaded)
+
+_schedulers: Dict[str, BackendScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(name: str, config: Dict) -> BackendScheduler:
+    """The scheduler of a backend, shared by every Teacher in the process. config is the llm.scheduler section."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None:
+            scheduler = _schedulers[name] = BackendScheduler(
+                name,
+                max_concurrency=config.get('max_concurrency', 4),
+                min_concurrency=config.get('min_concurrency', 1),
+                rate=config.get('rate', 0),
+                burst=config.get('burst', 4),
+                latency_target_ms=config.get('latency_target_ms', 0),
+            )
+        return scheduler
@@ -0,0 +1,521 @@
+"""HTTP server mode (`eng serve`): the dictionary, the trainer, verb drills and grammar chat
+for many learners at once. LLM answers are streamed as Server-Sent Events.
+
+Built on asyncio and the standard library only:
+- one Teacher, and so one HTTP connection pool, is shared by all sessions; its blocking
+  streams run on a thread pool and are handed to the event loop through bounded queues
+- the SQLite connection belongs to a single DB thread and every query is run there
+- per-learner state lives in sessions keyed by an id returned from POST /sessions; progress
+  and streaks are stored per learner (the server's --profile unless the session names one)
+
+Endpoints (JSON bodies, JSON or text/event-stream responses):
+    GET    /health
+    GET    /metrics                               Prometheus text of the metrics registry
+    POST   /sessions                              {"mode": "trainer", "category": "unit1", "learner": "anna"}
+    DELETE /sessions/{id}
+    GET    /words/{word}                          a stored word, else the dictionary pack's entry ("source": "pack")
+    POST   /words/{word}/explain                  SSE; {"save": true, "category": "..."}
+    POST   /sessions/{id}/trainer/next            SSE: a riddle for the next word
+    POST   /sessions/{id}/trainer/guess           SSE; {"guess": "..."}
+    POST   /sessions/{id}/verbs/next
+    POST   /sessions/{id}/verbs/answer            {"past_simple": "...", "past_participle": "..."}
+    POST   /sessions/{id}/grammar/chat            SSE; {"theme": "...", "message": "..."}
+"""
+import re
+import json
+import time
+import secrets
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .word_manager import WordManager, Word, STATES
+from .llm import Teacher, grade_verdict
+from .stream import LLMStream
+from .training import pick_for_training
+from .pack import DictionaryPack, open_pack
+from ..config import get_pack_path
+from ..utils.metrics import metrics
+
+MODES = ('dictionary', 'trainer', 'verbs', 'grammar')
+SESSION_TTL = 3600
+MAX_BODY = 64 * 1024
+STREAM_QUEUE = 64
+STATUS_TEXT = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, "Invalid JSON body")
+        if not isinstance(data, dict):
+            raise HttpError(400, "The body must be a JSON object")
+        return data
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get('connection', '').lower() != 'close'
+
+@dataclass
+class Session:
+    id: str
+    mode: str
+    learner: str
+    manager: WordManager
+    category: Optional[str] = None
+    used: Set[str] = field(default_factory=set)
+    current: Optional[str] = None
+    messages: List[Dict] = field(default_factory=list)
+    last_seen: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class Database:
+    """Runs WordManager calls on one dedicated thread, which owns the SQLite connection."""
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self.manager: Optional[WordManager] = None
+
+    async def start(self) -> None:
+        self.manager = await self.run(WordManager)
+
+    async def run(self, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+class SseResponse:
+    """A text/event-stream response, started by its first event. The connection is closed when it ends."""
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.started = False
+
+    async def send(self, event: str, data) -> None:
+        if not self.started:
+            self.writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            self.started = True
+        self.writer.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode())
+        await self.writer.drain()
+
+    async def fail(self, message: str) -> None:
+        """End a started stream with an error event; its status line is already sent."""
+        try:
+            await self.send('error', {'error': message})
+        except ConnectionError:
+            pass
+
+class WordServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, llm_workers: int = 64, teacher: Optional[Teacher] = None, pack: Optional[DictionaryPack] = None) -> None:
+        self.host = host
+        self.port = port
+        self.db = Database()
+        self.teacher = teacher
+        self.pack = pack
+        self.llm_pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="llm")
+        self.sessions: Dict[str, Session] = {}
+        self.word_pools: Dict[Tuple[str, Optional[str]], List[Word]] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.routes: List[Tuple[str, re.Pattern, Callable[..., Awaitable]]] = [
+            ('GET', re.compile(r'/health'), self.health),
+            ('GET', re.compile(r'/metrics'), self.export_metrics),
+            ('POST', re.compile(r'/sessions'), self.create_session),
+            ('DELETE', re.compile(r'/sessions/([\w-]+)'), self.delete_session),
+            ('GET', re.compile(r'/words/([^/]+)'), self.get_word),
+            ('POST', re.compile(r'/words/([^/]+)/explain'), self.explain_word),
+            ('POST', re.compile(r'/sessions/([\w-]+)/trainer/next'), self.trainer_next),
+            ('POST', re.compile(r'/sessions/([\w-]+)/trainer/guess'), self.trainer_guess),
+            ('POST', re.compile(r'/sessions/([\w-]+)/verbs/next'), self.verbs_next),
+            ('POST', re.compile(r'/sessions/([\w-]+)/verbs/answer'), self.verbs_answer),
+            ('POST', re.compile(r'/sessions/([\w-]+)/grammar/chat'), self.grammar_chat),
+        ]
+
+    async def start(self) -> None:
+        await self.db.start()
+        if self.teacher is None:
+            self.teacher = Teacher()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_BODY)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        logging.info(f"Serving on http://{self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.llm_pool.shutdown(wait=False, cancel_futures=True)
+        self.db.close()
+
+    # HTTP plumbing
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    # Where a malformed request ends is unknown, so the connection can't be reused
+                    metrics.inc('http_requests_total', route='unknown', status=str(e.status))
+                    self._respond(writer, e.status, {'error': e.message}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                keep_alive = await self._dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        line = await self._read_line(reader)
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await self._read_line(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), urlsplit(target).path, headers, body)
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        try:
+            return await reader.readline()
+        except ValueError:
+            # StreamReader.readline reports a line longer than the stream limit this way
+            raise HttpError(400, "Request line or header too long")
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        started = time.perf_counter()
+        status = 200
+        route = 'unknown'
+        sse = SseResponse(writer)
+        try:
+            handler, args, route = self._route(request)
+            result = await handler(request, sse, *args)
+            if isinstance(result, SseResponse):
+                return False
+            status, payload = result if isinstance(result, tuple) else (200, result)
+            self._respond(writer, status, payload, request.keep_alive)
+        except HttpError as e:
+            status = e.status
+            if sse.started:
+                await sse.fail(e.message)
+                return False
+            self._respond(writer, e.status, {'error': e.message}, request.keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            logging.exception("Request failed")
+            status = 500
+            if sse.started:
+                await sse.fail(str(e))
+            else:
+                self._respond(writer, 500, {'error': str(e)}, False)
+            return False
+        finally:
+            metrics.observe('http_request_ms', (time.perf_counter() - started) * 1000, route=route)
+            metrics.inc('http_requests_total', route=route, status=str(status))
+        await writer.drain()
+        return request.keep_alive
+
+    def _route(self, request: Request):
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match:
+                if method == request.method:
+                    return handler, [unquote(group) for group in match.groups()], pattern.pattern
+                allowed = True
+        raise HttpError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+
+    def _respond(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode(), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+
+    async def _stream(self, sse: SseResponse, make_stream: Callable[[], LLMStream], event: str = 'token') -> str:
+        """Run a blocking LLM stream on the LLM pool and forward its tokens as events.
+        The queue between them is bounded, so a slow client slows the producer down instead of
+        buffering the whole answer; if the client goes away the upstream stream is closed."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE)
+        cancelled = threading.Event()
+
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce() -> None:
+            try:
+                stream = make_stream()
+                for token in stream.tokens():
+                    if cancelled.is_set():
+                        break
+                    put(('token', token))
+                put(('done', None))
+            except Exception as e:
+                put(('error', str(e)))
+
+        producer = loop.run_in_executor(self.llm_pool, produce)
+        parts = []
+        try:
+            while True:
+                kind, data = await queue.get()
+                if kind == 'done':
+                    break
+                if kind == 'error':
+                    raise HttpError(500, data)
+                parts.append(data)
+                await sse.send(event, data)
+        except BaseException:
+            cancelled.set()
+            while not queue.empty():
+                queue.get_nowait()
+            raise
+        finally:
+            if not cancelled.is_set():
+                await producer
+        return "".join(parts)
+
+    # Sessions
+
+    def _session(self, session_id: str, mode: Optional[str] = None) -> Session:
+        self._expire_sessions()
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "Unknown session")
+        if mode and session.mode != mode:
+            raise HttpError(409, f"This is a {session.mode} session")
+        session.last_seen = time.monotonic()
+        return session
+
+    def _expire_sessions(self) -> None:
+        deadline = time.monotonic() - SESSION_TTL
+        for session_id in [sid for sid, s in self.sessions.items() if s.last_seen < deadline]:
+            del self.sessions[session_id]
+
+    async def health(self, request: Request, sse: SseResponse) -> Dict:
+        return {'status': 'ok', 'sessions': len(self.sessions)}
+
+    async def export_metrics(self, request: Request, sse: SseResponse) -> str:
+        return metrics.to_prometheus()
+
+    async def create_session(self, request: Request, sse: SseResponse):
+        data = request.json()
+        mode = data.get('mode', 'dictionary')
+        if mode not in MODES:
+            raise HttpError(400, f"mode must be one of {', '.join(MODES)}")
+        learner = str(data.get('learner') or self.db.manager.learner_id)
+        manager = await self.db.run(self.db.manager.for_learner, learner)
+        session = Session(secrets.token_urlsafe(12), mode, learner, manager, data.get('category') or None)
+        self.sessions[session.id] = session
+        return 201, {'session_id': session.id, 'mode': mode, 'learner': learner}
+
+    async def delete_session(self, request: Request, sse: SseResponse, session_id: str):
+        self.sessions.pop(session_id, None)
+        return 200, {'deleted': session_id}
+
+    # Dictionary
+
+    async def get_word(self, request: Request, sse: SseResponse, name: str) -> Dict:
+        word = await self.db.run(self.db.manager.resolve_word, name)
+        if word is not None:
+            return self._word_json(word)
+        # The pack is memory-mapped and read-only, so it is read on the event loop
+        entry = self.pack.lookup(name) if self.pack is not None else None
+        if entry is None:
+            raise HttpError(404, f"'{name}' is not in the dictionary")
+        return {**self._word_json(entry), 'source': 'pack'}
+
+    async def explain_word(self, request: Request, sse: SseResponse, name: str) -> SseResponse:
+        data = request.json()
+        explanation = await self._stream(sse, lambda: self.teacher.explainer(name), 'explanation')
+        translation = await self._stream(sse, lambda: self.teacher.translator(explanation), 'translation')
+        if data.get('save'):
+            await self.db.run(self.db.manager.insert_word, name, data.get('category', ''), explanation, translation)
+        await sse.send('done', {'saved': bool(data.get('save'))})
+        return sse
+
+    # Trainer
+
+    async def _word_pool(self, session: Session) -> List[Word]:
+        """The training words of a category with a learner's states, shared by that learner's sessions."""
+        key = (session.learner, session.category)
+        if key not in self.word_pools:
+            self.word_pools[key] = await self.db.run(session.manager.fetch_words, session.category)
+        return self.word_pools[key]
+
+    async def trainer_next(self, request: Request, sse: SseResponse, session_id: str) -> SseResponse:
+        session = self._session(session_id, 'trainer')
+        async with session.lock:
+            words = await self._word_pool(session)
+            word = pick_for_training(words, session.used, lambda w: w.word)
+            if word is None:
+                session.used.clear()
+                word = pick_for_training(words, session.used, lambda w: w.word)
+            if word is None:
+                raise HttpError(404, "No words to train in this category")
+            session.current = word.word
+            riddle, count_clue, count = self.teacher.riddler(word.word)
+            await sse.send('word', {'clue': count_clue, 'words': count, 'left': len(words) - len(session.used)})
+            await self._stream(sse, lambda: riddle)
+            await sse.send('done', {})
+            return sse
+
+    async def trainer_guess(self, request: Request, sse: SseResponse, session_id: str) -> SseResponse:
+        session = self._session(session_id, 'trainer')
+        guess = str(request.json().get('guess', '')).strip()
+        async with session.lock:
+            if not session.current:
+                raise HttpError(409, "Ask for the next word first")
+            name = session.current
+            if guess.lower() == name.lower():
+                correct = True
+            else:
+                grade = await self._stream(sse, lambda: self.teacher.grader(name, guess))
+                correct = grade_verdict(grade)
+            session.current = None
+            await self._change_word_state(session, name, 1 if correct else -1, correct)
+            await sse.send('done', {'correct': correct, 'word': name})
+            return sse
+
+    async def _change_word_state(self, session: Session, name: str, offset: int, success: bool) -> None:
+        manager = session.manager
+        word = next((w for w in self.word_pools.get((session.learner, session.category), []) if w.word == name), None)
+        if word is None:
+            word = await self.db.run(manager.fetch_word, name)
+            if word is None:
+                # Deleted or merged (eng dedup) since /trainer/next; there is no progress to keep
+                logging.warning(f"'{name}' is no longer in the dictionary, its state is not changed")
+                return
+        new_state = manager.shift_state(word.state, offset)
+        await self.db.run(manager.set_word_state, name, new_state)
+        if success:
+            await self.db.run(manager.update_streak)
+        for (learner, _), pool in self.word_pools.items():
+            if learner != session.learner:
+                continue
+            for w in pool:
+                if w.word == name:
+                    w.state = new_state
+
+    # Verbs
+
+    async def verbs_next(self, request: Request, sse: SseResponse, session_id: str) -> Dict:
+        session = self._session(session_id, 'verbs')
+        async with session.lock:
+            verbs = await self.db.run(session.manager.get_all_irregular_verbs)
+            verb = pick_for_training(verbs, session.used, lambda v: v.base_form)
+            if verb is None:
+                session.used.clear()
+                verb = pick_for_training(verbs, session.used, lambda v: v.base_form)
+            if verb is None:
+                raise HttpError(404, "No verbs to train")
+            session.current = verb.base_form
+            return {'base_form': verb.base_form, 'state': STATES[verb.state]}
+
+    async def verbs_answer(self, request: Request, sse: SseResponse, session_id: str) -> Dict:
+        session = self._session(session_id, 'verbs')
+        data = request.json()
+        async with session.lock:
+            if not session.current:
+                raise HttpError(409, "Ask for the next verb first")
+            manager = session.manager
+            verb = await self.db.run(manager.get_irregular_verb, session.current)
+            session.current = None
+            if verb is None:
+                raise HttpError(404, "The verb was deleted")
+            correct = data.get('past_simple') == verb.past_simple and data.get('past_participle') == verb.past_participle
+            await self.db.run(manager.set_verb_state, verb.base_form, manager.shift_state(verb.state, 1 if correct else -1))
+            return {'correct': correct, 'past_simple': verb.past_simple, 'past_participle': verb.past_participle}
+
+    # Grammar
+
+    async def grammar_chat(self, request: Request, sse: SseResponse, session_id: str) -> SseResponse:
+        session = self._session(session_id, 'grammar')
+        data = request.json()
+        async with session.lock:
+            theme_name = data.get('theme')
+            if theme_name:
+                theme = await self.db.run(self.db.manager.get_grammar_theme, theme_name)
+                if theme is None:
+                    raise HttpError(404, f"Unknown theme '{theme_name}'")
+                system = self.teacher.system_grammar.format(topic=theme.name, description=theme.description)
+                session.messages = [{'role': 'system', 'content': system}]
+            if not session.messages:
+                raise HttpError(409, "Start the chat with a theme")
+            session.messages.append({'role': 'user', 'content': str(data.get('message') or "Hello!")})
+            messages = list(session.messages)
+            answer = await self._stream(sse, lambda: self.teacher.chat(messages, self.teacher.grammar_options, 'grammar'))
+            session.messages.append({'role': 'assistant', 'content': answer})
+            await sse.send('done', {})
+            return sse
+
+    @staticmethod
+    def _word_json(word: Word) -> Dict:
+        return {
+            'word': word.word,
+            'category': word.category,
+            'explanation_en': word.explanation_en,
+            'explanation_ru': word.explanation_ru,
+            'ask_counter': word.ask_counter,
+            'state': STATES[word.state],
+        }
+
+def run_server(host: str, port: int, llm_workers: int) -> None:
+    server = WordServer(host, port, llm_workers, pack=open_pack(get_pack_path()))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
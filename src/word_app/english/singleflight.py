@@ -0,0 +1,117 @@
+import json
+import hashlib
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from ..utils.metrics import metrics
+
+def request_key(request: Dict) -> str:
+    """A stable key for an LLM request: the same model, system prompt, prompt and options give the same key."""
+    return hashlib.sha1(json.dumps(request, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+class _Flight:
+    """One upstream stream and the chunks it has produced so far."""
+    def __init__(self, start: Callable[[], Iterable]) -> None:
+        self.start = start
+        self.upstream: Optional[Iterator] = None
+        self.chunks: List = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.pulling = False
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+class SingleFlight:
+    """Deduplicates identical in-flight streams. The first request for a key starts the
+    upstream; requests for the same key made before it ends subscribe to it and receive
+    every chunk from the beginning.
+
+    There is no producer thread: whichever subscriber is ahead pulls the next chunk from
+    upstream into the flight's log, so the backend is read only as fast as the fastest
+    consumer wants (TCP backpressure does the rest). Slower subscribers read behind from
+    the log without stalling the others. When every subscriber has gone away the upstream
+    is closed, and a finished flight is forgotten, so nothing is cached.
+
+    Metrics of the upstream belong in start(), which runs once per flight; joins are
+    counted in llm_singleflight_joins_total."""
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key: Hashable, start: Callable[[], Iterable], task: str = '') -> Iterator:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(start)
+            else:
+                metrics.inc('llm_singleflight_joins_total', task=task)
+            flight.subscribers += 1
+        return self._read(key, flight)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _read(self, key: Hashable, flight: _Flight) -> Iterator:
+        position = 0
+        try:
+            while True:
+                with flight.cond:
+                    while position >= len(flight.chunks) and not flight.done and flight.pulling:
+                        flight.cond.wait()
+                    if position < len(flight.chunks):
+                        chunk = flight.chunks[position]
+                    elif flight.done:
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    else:
+                        flight.pulling = True
+                        chunk = None
+                if chunk is None:
+                    self._pull(key, flight)
+                    continue
+                position += 1
+                yield chunk
+        finally:
+            self._leave(key, flight)
+
+    def _pull(self, key: Hashable, flight: _Flight) -> None:
+        """Read one chunk from upstream. Only the subscriber that set flight.pulling gets here."""
+        chunk, finished, error = None, False, None
+        try:
+            if flight.upstream is None:
+                flight.upstream = iter(flight.start())
+            chunk = next(flight.upstream)
+        except StopIteration:
+            finished = True
+        except Exception as e:
+            finished, error = True, e
+        finally:
+            # Also reached on KeyboardInterrupt, so another subscriber can take over
+            with flight.cond:
+                if finished:
+                    flight.done = True
+                    flight.error = error
+                elif chunk is not None:
+                    flight.chunks.append(chunk)
+                flight.pulling = False
+                flight.cond.notify_all()
+        if finished:
+            self._forget(key, flight)
+
+    def _leave(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.done
+            if abandoned and self._flights.get(key) is flight:
+                del self._flights[key]
+        if abandoned and flight.upstream is not None and hasattr(flight.upstream, 'close'):
+            flight.upstream.close()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+flights = SingleFlight()
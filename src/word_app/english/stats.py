@@ -0,0 +1,74 @@
+import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from .word_manager import WordManager, STATES
+
+class SessionStats:
+    """Training statistics held in memory for a session: the state histogram of the
+    training pool, today's count of successful words and the streak. They are loaded
+    once and updated from grading events; only the changes are written to the DB."""
+    def __init__(self, manager: WordManager, states: Iterable[int] = ()) -> None:
+        self.manager = manager
+        self.counts: List[int] = [0] * len(STATES)
+        for state in states:
+            self.add(state)
+        self._load_activity()
+
+    def _load_activity(self) -> None:
+        self.date = datetime.date.today()
+        today = self.manager.get_activity(self.date.isoformat())
+        yesterday = self.manager.get_activity((self.date - datetime.timedelta(days=1)).isoformat())
+        self.has_today = today is not None
+        self.has_yesterday = yesterday is not None
+        self.todays_words, self.streak = today if today else (0, 0)
+        self.yesterday_streak = yesterday[1] if yesterday else 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def average(self) -> float:
+        """The average state, the same value as WordManager.category_average."""
+        total = self.total
+        if not total:
+            return 0
+        return sum(state * count for state, count in enumerate(self.counts)) / total
+
+    @property
+    def today_is_active(self) -> bool:
+        return self.todays_words >= self.manager.streak_threshold
+
+    def add(self, state: Optional[int]) -> None:
+        if state is not None:
+            self.counts[state] += 1
+
+    def remove(self, state: Optional[int]) -> None:
+        if state is not None:
+            self.counts[state] -= 1
+
+    def change_state(self, old_state: int, new_state: int) -> None:
+        self.remove(old_state)
+        self.add(new_state)
+
+    def record_success(self, save: bool = True) -> Tuple[int, int]:
+        """Count a successful word for today and update the streak, like WordManager.update_streak.
+        With save False the caller writes activity itself (a quiz round saves everything at once)."""
+        if datetime.date.today() != self.date:
+            self._load_activity()
+        if self.has_today:
+            self.todays_words += 1
+            if self.todays_words >= self.manager.streak_threshold and self.streak == self.yesterday_streak:
+                self.streak += 1
+        else:
+            self.todays_words = 1
+            self.streak = self.yesterday_streak if self.has_yesterday else 1
+            self.has_today = True
+        if save:
+            self.manager.save_activity(*self.activity)
+        return self.todays_words, self.streak
+
+    @property
+    def activity(self) -> Tuple[str, int, int]:
+        """(date, successful words, streak) as stored by WordManager.save_activity."""
+        return self.date.isoformat(), self.todays_words, self.streak
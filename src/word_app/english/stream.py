@@ -0,0 +1,102 @@
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Union
+
+from ..utils.metrics import metrics
+
+@dataclass
+class StreamChunk:
+    """One piece of an LLM answer, the same for every backend. The last chunk has done set."""
+    text: str = ""
+    done: bool = False
+    finish_reason: Optional[str] = None
+
+@dataclass
+class StreamStats:
+    """Timing of one stream, in milliseconds from the request."""
+    ttft_ms: Optional[float] = None
+    total_ms: float = 0.0
+    token_count: int = 0
+    gaps_ms: List[float] = field(default_factory=list)
+    finish_reason: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generation rate after the first token."""
+        if self.token_count < 2 or self.ttft_ms is None or self.total_ms <= self.ttft_ms:
+            return 0.0
+        return (self.token_count - 1) * 1000 / (self.total_ms - self.ttft_ms)
+
+    @property
+    def max_gap_ms(self) -> float:
+        return max(self.gaps_ms, default=0.0)
+
+class LLMStream:
+    """A normalized LLM answer. Iterating yields StreamChunk objects and fills stats; when the
+    stream ends the stats are also recorded in the metrics registry, labelled by task, unless
+    record is False (a stream read from a shared upstream that records its own metrics).
+    Chunks may come in as StreamChunk or as their dict form (from a replayed trace)."""
+    def __init__(self, chunks: Iterable[Union[StreamChunk, dict]], task: str = 'text', record: bool = True) -> None:
+        self.task = task
+        self.record = record
+        self.stats = StreamStats()
+        self.started = time.perf_counter()
+        self._chunks = chunks
+        self._iterator: Optional[Iterator[StreamChunk]] = None
+
+    def __iter__(self) -> Iterator[StreamChunk]:
+        if self._iterator is None:
+            self._iterator = self._run()
+        return self._iterator
+
+    def tokens(self) -> Iterator[str]:
+        """Only the text of the chunks."""
+        for chunk in self:
+            if chunk.text:
+                yield chunk.text
+
+    def text(self) -> str:
+        return "".join(self.tokens())
+
+    def _run(self) -> Iterator[StreamChunk]:
+        stats = self.stats
+        last = None
+        outcome = 'cancelled'
+        try:
+            for chunk in self._chunks:
+                if not isinstance(chunk, StreamChunk):
+                    chunk = StreamChunk(**chunk)
+                if chunk.text:
+                    now = time.perf_counter()
+                    if last is None:
+                        stats.ttft_ms = (now - self.started) * 1000
+                    else:
+                        stats.gaps_ms.append((now - last) * 1000)
+                    last = now
+                    stats.token_count += 1
+                if chunk.done:
+                    stats.finish_reason = chunk.finish_reason or 'stop'
+                yield chunk
+            outcome = 'stop'
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            stats.total_ms = (time.perf_counter() - self.started) * 1000
+            if stats.finish_reason is None:
+                stats.finish_reason = outcome
+            self._record()
+
+    def _record(self) -> None:
+        if not metrics.enabled or not self.record:
+            return
+        stats = self.stats
+        if stats.ttft_ms is not None:
+            metrics.observe('llm_ttft_ms', stats.ttft_ms, task=self.task)
+        metrics.observe('llm_total_ms', stats.total_ms, task=self.task)
+        metrics.inc('llm_tokens_total', stats.token_count, task=self.task)
+        if stats.tokens_per_second:
+            metrics.observe('llm_tokens_per_second', stats.tokens_per_second, task=self.task)
+        if stats.gaps_ms:
+            metrics.observe('llm_max_gap_ms', stats.max_gap_ms, task=self.task)
+        metrics.inc('llm_streams_total', task=self.task, finish_reason=stats.finish_reason)
@@ -1,21 +1,25 @@
 import re
+import sys
 import random
-from pprint import pprint
-from typing import Tuple, List, Dict, Generator, Optional, TYPE_CHECKING
+import threading
+from typing import Callable, Tuple, List, Dict, Optional, Set, TYPE_CHECKING
 from rich.console import Console
 from rich.layout import Layout
 from rich.live import Live
 from math import floor
-from prompt_toolkit import prompt
-from prompt_toolkit.completion import WordCompleter
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.filters import HasCompletions
-from prompt_toolkit.styles import Style
 
 from .word_manager import WordManager, Word, IrregularVerb, GrammarTheme, STATES
 from .ui_manager import UIManager
-from .llm import Teacher
+from .llm import Teacher, RoundItem, grade_verdict
+from .backends import BackendUnavailable
+from .stream import LLMStream
+from .stats import SessionStats
 from ..utils import Voice, Obsidian
+from ..utils.voice import PRIORITY_FEEDBACK, PRIORITY_OUTPUT
+from ..utils.startup import startup
+from ..utils.warmup import Warmup
+from ..utils.metrics import metrics
+from ..config import get_warmup_enabled, get_metrics_config, get_quiz_round_size, get_pack_path
 
 if TYPE_CHECKING:
     from .training import WordsTutor
@@ -23,24 +27,114 @@ if TYPE_CHECKING:
 ROBOT_EMOJI = "\U0001F916"
 console = Console()
 
+def round_size(size: Optional[str]) -> int:
+    """The N of /round N, app.quiz_round_size when it is missing."""
+    return int(size) if size and size.isdigit() and int(size) > 0 else get_quiz_round_size()
+
+def pick_for_training(items: List, used: Set[str], key: Callable, include_mastered: bool = False):
+    """Pick a random word or verb that is not in used, favouring the ones with lower states, and add it to used."""
+    last_state = len(STATES) - 1
+    available = [
+        item for item in items
+        if item.state is not None and (include_mastered or item.state < last_state) and key(item) not in used
+    ]
+    if not available:
+        return None
+    weights = [max(1, len(STATES) - (item.state or 0)) for item in available]
+    selected = random.choices(available, weights=weights, k=1)[0]
+    used.add(key(selected))
+    return selected
+
 class BaseWordApp:
     """Base class for word application modes."""
     def __init__(self):
         self.word_manager = WordManager()
         self.ui_manager = UIManager()
-        self.teacher = Teacher()
-        self.voice = Voice()
         self.last_output = None
         self.auto_speak = True
         self.word_count = -1
+        self.warmup = Warmup()
+        self._lazy_guard = threading.Lock()
+        self._lazy_locks: Dict[str, threading.Lock] = {}
+        self._lazy_objects: Dict = {}
         self._base_command_handlers = self._get_base_command_handlers()
         self._specific_command_handlers = self._get_specific_command_handlers()
 
+    def _lazy(self, name: str, factory):
+        """Create a helper once, on first use. The warm-up thread and the main loop may ask for it at the same time;
+        every helper has its own lock, so one that is slow to build doesn't hold up the others."""
+        if name in self._lazy_objects:
+            return self._lazy_objects[name]
+        with self._lazy_guard:
+            lock = self._lazy_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._lazy_objects:
+                self._lazy_objects[name] = factory()
+            return self._lazy_objects[name]
+
+    @property
+    def teacher(self) -> Teacher:
+        """Created on first use, so modes and commands that never call the LLM don't pay for it."""
+        return self._lazy('teacher', Teacher)
+
+    @property
+    def voice(self) -> Voice:
+        return self._lazy('voice', Voice)
+
+    @property
+    def pack(self):
+        """The prebuilt dictionary pack of database.pack, None if there is none."""
+        def load():
+            from .pack import open_pack
+            return open_pack(get_pack_path())
+        return self._lazy('pack', load)
+
+    @property
+    def completer(self):
+        """The prompt completer. prompt_toolkit is only imported when a terminal prompt needs it."""
+        def create():
+            from .completion import PrefixCompleter
+            commands = list(self._base_command_handlers) + list(self._specific_command_handlers)
+            return PrefixCompleter(self.word_manager, self._get_completion_sources(), commands)
+        return self._lazy('completer', create)
+
+    def add_warmup_steps(self) -> None:
+        """Steps run in the background while the first prompt waits. Subclasses add their own."""
+        self.warmup.add("database", self.word_manager.warm_up)
+        self.warmup.add("llm", lambda: self.teacher.warm_up())
+        if self.auto_speak:
+            self.warmup.add("voice", lambda: self.voice.warm_up())
+
+    def show_warmup(self) -> None:
+        console.print(self.warmup.summary() or "Warm-up is disabled")
+
+    def show_perf(self, mode: Optional[str] = None) -> None:
+        """Show the collected latencies and counters. 'json' and 'prom' print them in an export format."""
+        if not metrics.enabled:
+            console.print("[yellow]Metrics are disabled (app.metrics.enabled)[/yellow]")
+        elif mode == "json":
+            console.print_json(metrics.to_json())
+        elif mode == "prom":
+            console.print(metrics.to_prometheus(), markup=False, highlight=False)
+        elif mode == "reset":
+            metrics.reset()
+        else:
+            self.ui_manager.show_metrics(console, metrics.snapshot())
+
     def run(self, prompt: str) -> None:
         """Main loop for the application."""
+        metrics.configure(get_metrics_config())
         self.show_help()
+        if get_warmup_enabled():
+            self.add_warmup_steps()
+            self.warmup.start()
+        startup.report()
         while True:
-            command = self.process_command(prompt)
+            try:
+                command = self.process_command(prompt)
+            except BackendUnavailable as e:
+                console.print(f"[red]{e}[/red]")
+                continue
             if command.startswith('/q'):
                 break
 
@@ -48,6 +142,13 @@ class BaseWordApp:
         """To be overridden by subclasses."""
         return {'specific': lambda x: None}
 
+    def _get_completion_sources(self) -> Dict:
+        """What the prompt completes from: 'specific' is plain input, the other keys are commands
+        whose argument is completed. Extended by subclasses."""
+        sources = {command: 'words' for command in ('/i', '/info', '/n', '/new', '/m', '/man', '/d', '/del', '/c', '/conv')}
+        sources.update({'/a': 'categories', '/all': 'categories'})
+        return sources
+
     def _get_base_command_handlers(self) -> Dict:
         return {
         "/h": lambda *x: self.show_help(),
@@ -72,6 +173,9 @@ class BaseWordApp:
         "/say": lambda text, *x: self.speak(text),
         "/v": lambda mode, *x: self.set_speak_mode(mode),
         "/voice": lambda mode, *x : self.set_speak_mode(mode),
+        "/w": lambda *x: self.show_warmup(),
+        "/warmup": lambda *x: self.show_warmup(),
+        "/perf": lambda mode, *x: self.show_perf(mode),
     }
 
     def handle_action(self, action: str, args: List = []) -> Optional[str]:
@@ -109,32 +213,60 @@ class BaseWordApp:
         
     def process_command(self, prompt:str, run_specific: bool = True) -> str:
         """Process a command and return the next command."""
-        input_title = f"[bold green]{prompt}[white] > "
         is_command = True
         while is_command:
-            command = console.input(input_title).strip()
+            status = " [dim](warming up)[/dim]" if self.warmup.running else ""
+            command = self.read_input(f"[bold green]{prompt}[white]{status} > ", complete=run_specific).strip()
             is_command, action, args = self.parse_command(command, None)
             if is_command:
                 self.handle_specific_action(action, [args])
             elif run_specific:
                 self.handle_specific_action('specific', [command])
         return command
+
+    def read_input(self, markup: str, complete: bool = True) -> str:
+        """Read a line after a rich prompt. On a terminal the input is completed as it is typed."""
+        if not complete or not sys.stdin.isatty() or not console.is_terminal:
+            return console.input(markup)
+        from prompt_toolkit import prompt
+        from prompt_toolkit.formatted_text import ANSI
+        with console.capture() as capture:
+            console.print(markup, end='')
+        return prompt(ANSI(capture.get()), completer=self.completer, complete_while_typing=True)
     
-    def speak_output(self) -> None:
+    def speak_output(self, priority: int = PRIORITY_OUTPUT) -> None:
         if self.auto_speak:
-            self.speak(self.last_output)
+            self.speak(self.last_output, priority)
 
     def process_word(self, command: str, is_update: bool=False) -> None:
         """Process a word. Or update an existing one."""
         layout: Layout = self.ui_manager.create_layout()
         self.ui_manager.update_command_panel(layout, command)
-        word = self.word_manager.fetch_word(command)
-        if word and not is_update:
+        word = None if is_update else self.word_manager.resolve_word(command)
+        if word:
+            if word.word != command:
+                console.print(f'[dim]Showing the saved "{word.word}" for "{command}". [white]/u {command}[dim] explains it as a new word.[/dim]')
             self.display_existing_word(layout, word)
             self.last_output = word.explanation_en
             self.speak_output()
         elif command.strip():
-            self.process_new_word(layout, command, is_update)
+            entry = None if is_update or self.pack is None else self.pack.lookup(command)
+            if entry:
+                self.process_pack_word(layout, command, entry)
+            else:
+                self.process_new_word(layout, command, is_update)
+
+    def process_pack_word(self, layout: Layout, command: str, entry: Word) -> None:
+        """Show a word found in the dictionary pack and offer to save it, without calling the LLM."""
+        if entry.word != command:
+            console.print(f'[dim]Showing the dictionary pack\'s "{entry.word}" for "{command}".[/dim]')
+        with Live(layout, console=console, auto_refresh=False) as live:
+            self.ui_manager.display_word(layout, entry)
+            live.refresh()
+        console.print(f'[dim]From the dictionary pack. [white]/u {command}[dim] explains it with the LLM instead.[/dim]')
+        self.last_output = entry.explanation_en
+        self.speak_output()
+        self.offer_to_save(entry.word, entry.explanation_en, entry.explanation_ru, default_category=entry.category)
 
     def process_new_word(self, layout: Layout, word: str, rewrite: bool) -> None:
         """Process a new word. Or rewrite an existing one."""
@@ -142,11 +274,15 @@ class BaseWordApp:
             explanation_text, translation_text = self.generate_explanations(word, layout, live)
         self.last_output = explanation_text
         self.speak_output()
+        self.offer_to_save(word, explanation_text, translation_text, rewrite)
+
+    def offer_to_save(self, word: str, explanation_text: str, translation_text: str, rewrite: bool = False, default_category: str = '') -> None:
+        """Ask whether to save the word, with an optional category, and save it."""
         warning = " ([red]Previous word data will be lost[white])" if rewrite else ""
         answer = self.process_command(f'Save the word?{warning} : [yellow]y [magenta]optional[white](category) or press Enter to skip', run_specific=False)
         answer = answer.lower()
         if answer.startswith("y"):
-            category = answer.replace("y", "").strip()
+            category = answer.replace("y", "").strip() or default_category
             self.word_manager.insert_word(word, category, explanation_text, translation_text)
 
     def display_existing_word(self, layout: Layout, word: Word) -> None:
@@ -155,7 +291,18 @@ class BaseWordApp:
             self.ui_manager.display_word(layout, word)
             live.update(layout)
         self.word_manager.increment_word_counter(word.word)
-        self.word_manager.process_word_state(word.word, -1)
+        self.change_word_state(word, -1)
+
+    def change_word_state(self, word: Word, offset: int) -> None:
+        """Shift a word's state in the database and in the given object."""
+        new_state = self.word_manager.shift_state(word.state, offset)
+        self.word_manager.set_word_state(word.word, new_state)
+        self.on_word_state_changed(word.word, new_state)
+        word.state = new_state
+
+    def on_word_state_changed(self, name: str, new_state: int) -> None:
+        """Called after a word's state has changed. To be overridden by subclasses."""
+        pass
 
     def show_help(self) -> None:
         """Display help information."""
@@ -176,8 +323,9 @@ class BaseWordApp:
         if not new_category.startswith("/"):
             self.word_manager.set_category(word, new_category)
         new_state = console.input('[green]State[white] (or "/" to skip) > ').strip()
-        if not new_state.startswith("/"):
-            self.word_manager.process_word_state(word, int(new_state))
+        current_word = self.word_manager.fetch_word(word)
+        if not new_state.startswith("/") and current_word:
+            self.change_word_state(current_word, int(new_state))
 
     def delete_word(self, word: str) -> None:
         """Delete a word from the database."""
@@ -196,23 +344,12 @@ class BaseWordApp:
 
     def generate_explanations(self, word: str, layout: Layout, live: Live) -> Tuple[str, str]:
         """Generate explanations and translations for a given word."""
-        explanation_text = ""
-        translation_text = ""
-        
         explanation = self.teacher.explainer(word)
-        for chunk in explanation:
-            explanation_text += chunk['response']
-            self.ui_manager.update_left_panel(layout, explanation_text)
-            live.update(layout)
-            live.refresh()
+        explanation_text = self.ui_manager.stream_left_panel(explanation.tokens(), layout, live)
 
         translation = self.teacher.translator(explanation_text)
-        for chunk in translation:
-            translation_text += chunk['response']
-            self.ui_manager.update_right_panel(layout, translation_text)
-            live.update(layout)
-            live.refresh()
-        
+        translation_text = self.ui_manager.stream_right_panel(translation.tokens(), layout, live)
+
         return explanation_text, translation_text
 
     def chat_mode(self, word: str, *arg) -> Optional[str]:
@@ -234,13 +371,9 @@ class BaseWordApp:
             answer = self.teacher.conversation(question, options=self.teacher.conversation_options)
             self.display_chat_answer(answer)
         
-    def draw_stream(self, stream: Generator, mode: str = 'chat') -> str:
+    def draw_stream(self, stream: LLMStream) -> str:
         with Live(console=console, auto_refresh=False) as live:
-            full_answer = f"{ROBOT_EMOJI} "
-            for chunk in stream:
-                token = chunk['message']['content'] if mode == 'chat' else chunk['response']
-                full_answer += token
-                self.ui_manager.update_converation_output(full_answer, live)
+            full_answer = self.ui_manager.stream_conversation_output(stream.tokens(), live, f"{ROBOT_EMOJI} ")
             self.last_output = full_answer
             self.speak_output()
             return full_answer
@@ -257,7 +390,7 @@ class BaseWordApp:
                 break
         return " ".join(lines)
 
-    def display_chat_answer(self, answer: Generator) -> None:
+    def display_chat_answer(self, answer: LLMStream) -> None:
         """Live display of the chat answer."""
         full_answer = self.draw_stream(answer)
         self.teacher.append_content(full_answer)
@@ -265,11 +398,11 @@ class BaseWordApp:
     def print_categories(self, *args) -> None:
         self.ui_manager.show_categories(console, self.word_manager)
 
-    def speak(self, text: str) -> None:
+    def speak(self, text: str, priority: int = PRIORITY_OUTPUT) -> None:
         """Speak the provided text."""
         phrase = text if text else self.last_output
         if phrase:
-            self.voice.speak(phrase)
+            self.voice.speak(phrase, priority)
 
     def set_speak_mode(self, mode: str) -> None:
         """Set the auto-speak mode."""
@@ -279,6 +412,8 @@ class BaseWordApp:
             self.auto_speak = False
         elif mode == "stop":
             self.voice.stop_speaking()
+        elif mode == "stats":
+            console.print(self.voice.metrics())
         else:
             console.print(f"[red]Unknown mode: {mode}[/red]")
 
@@ -295,6 +430,9 @@ class WordDictionary(BaseWordApp):
             "/upd": lambda word, *x: self.process_word(word, True),
         }
 
+    def _get_completion_sources(self) -> Dict:
+        return {**super()._get_completion_sources(), 'specific': 'words', '/u': 'words', '/upd': 'words'}
+
     def run(self) -> None:
         super().run("Word")
     
@@ -310,7 +448,16 @@ class WordsTutor(BaseWordApp):
         self.category = ""
         self._specific_command_handlers = self._get_specific_command_handlers()
         self.include_mastered = False
-        self.obsidian = Obsidian()
+        self.words_by_name: Dict[str, Word] = {}
+        self.stats = SessionStats(self.word_manager)
+
+    @property
+    def obsidian(self) -> Obsidian:
+        return self._lazy('obsidian', Obsidian)
+
+    def add_warmup_steps(self) -> None:
+        super().add_warmup_steps()
+        self.warmup.add("obsidian", lambda: self.obsidian)
 
     def _get_specific_command_handlers(self) -> Dict:
         return {
@@ -322,19 +469,31 @@ class WordsTutor(BaseWordApp):
             "/t": lambda *x: self.prompt_to_set_category("Category"),
             "/turn": lambda *x: self.prompt_to_set_category("Category"),
             "/mode": lambda mode, *x: self.set_training_mode(mode),
+            "/r": lambda size, *x: self.quiz_round(size),
+            "/round": lambda size, *x: self.quiz_round(size),
         }
+
+    def _get_completion_sources(self) -> Dict:
+        return {**super()._get_completion_sources(), '/l': 'words', '/lookup': 'words'}
     
     def run(self) -> None:
         super().run("Start training?")
 
     def category_autocompletion(self, guess:str) -> str:
+        from prompt_toolkit.completion import WordCompleter
         categories = self.word_manager.get_all_categories()
         completer = WordCompleter(categories, ignore_case=True)
 
     def prompt_to_set_category(self, prompt_text:str='Category', change_when_empty:bool=True) -> None:
+        from prompt_toolkit import prompt
+        from prompt_toolkit.key_binding import KeyBindings
+        from prompt_toolkit.filters import HasCompletions
+        from prompt_toolkit.styles import Style
+        from .completion import PrefixCompleter
+
         self.print_categories()
-        categories = self.word_manager.get_all_categories()
-        category_completer = WordCompleter(sorted(categories,reverse=True), ignore_case=True)
+        # Categories come from the manager's cache, so the completer is made once
+        category_completer = self._lazy('category_completer', lambda: PrefixCompleter(self.word_manager, {'specific': 'categories'}))
 
         kb = KeyBindings()
         @kb.add('c-n', filter=HasCompletions())
@@ -380,6 +539,8 @@ class WordsTutor(BaseWordApp):
         self.category = category if category else None
         self.obsidian.find_file(self.category)
         self.available_words = self.word_manager.fetch_words(self.category)
+        self.words_by_name = {w.word: w for w in self.available_words}
+        self.stats = SessionStats(self.word_manager, (w.state for w in self.available_words))
         self.current_word_number = 0
         self.unsuccessful_words_count = 0
         self.successful_words_count = 0
@@ -436,7 +597,7 @@ class WordsTutor(BaseWordApp):
             if check.strip().lower() in ["n", "no", "not ready", "not yet", "nope", "nah", "nay"]:
                 counter += 1
                 game = self.teacher.game_intro(counter)
-                self.draw_stream(game, mode='generate')
+                self.draw_stream(game)
                 check = self.process_command("Now?", run_specific=False)
             else:
                 break
@@ -448,8 +609,8 @@ class WordsTutor(BaseWordApp):
             self.teacher.append_content('Hello!', role='user')
             self.teacher.append_content(riddle, role='assistant')
             while True :
-                answer = self.teacher.conversation(command, options=self.teacher.game_qa_options)
-                self.draw_stream(answer, mode='chat')
+                answer = self.teacher.conversation(command, options=self.teacher.game_qa_options, task='game_qa')
+                self.draw_stream(answer)
                 check = self.process_command("Your guess", run_specific=False)
                 if not check.strip().startswith("?") :
                     return check
@@ -458,33 +619,15 @@ class WordsTutor(BaseWordApp):
             return question
 
     def select_word(self, words: List[Word], include_mastered: bool = False) -> Optional[Word]:
-        if not include_mastered:
-            words_pool = [w for w in words if w.state is not None and w.state < len(STATES) - 1]
-        else:
-            words_pool = [w for w in words if w.state is not None]
-        
-        available_words = [w for w in words_pool if w.word not in self.used_words]
-        
-        if not available_words:
-            return None
-
-        weights = [max(1, len(STATES) - (w.state or 0)) for w in available_words]
-        total_weight = sum(weights)
-        weights = [w/total_weight for w in weights]
-
-        selected_word = random.choices(available_words, weights=weights, k=1)[0]
-        self.used_words.add(selected_word.word)
-        return selected_word
+        return pick_for_training(words, self.used_words, lambda w: w.word, include_mastered)
 
     def word_riddle(self, word: Word) -> str:
         riddle, count_clue, count = self.teacher.riddler(word.word)
         self.word_count = count
         console.print(f"{ROBOT_EMOJI} [blue]{count_clue}")
         with Live(console=console, auto_refresh=False) as live:
-            full_riddle = f"{ROBOT_EMOJI} "
-            for chunk in riddle:
-                full_riddle += chunk['response']
-                self.ui_manager.update_converation_output(full_riddle, live)
+            tokens = riddle.tokens()
+            full_riddle = self.ui_manager.stream_conversation_output(tokens, live, f"{ROBOT_EMOJI} ")
             self.last_output = full_riddle
             self.speak_output()
             return full_riddle
@@ -494,52 +637,105 @@ class WordsTutor(BaseWordApp):
             self.successful_words_count += 1
             self.last_word_successful = True
             if self.auto_speak:
-                self.speak(f'Correct! Right answer is "{word.word}"')
+                self.speak(f'Correct! Right answer is "{word.word}"', PRIORITY_FEEDBACK)
             console.print(f'{ROBOT_EMOJI} [green]Correct!\n [white]Right answer is "{word.word}".\n')
-            self.word_manager.process_word_state(word.word, 1)
+            self.change_word_state(word, 1)
+            self.stats.record_success()
         else:
             grade = self.teacher.grader(word.word, guess)
-            full_grade = f"{ROBOT_EMOJI} "
             with Live(console=console, auto_refresh=False) as live:
-                for chunk in grade:
-                    full_grade += chunk['response']
-                    self.ui_manager.update_converation_output(full_grade, live)
+                tokens = grade.tokens()
+                full_grade = self.ui_manager.stream_conversation_output(tokens, live, f"{ROBOT_EMOJI} ")
             self.last_output = full_grade
-            self.speak_output()
+            self.speak_output(PRIORITY_FEEDBACK)
 
-            if full_grade.replace(ROBOT_EMOJI,'').strip().lower().startswith("correct"):
+            if grade_verdict(full_grade):
                 console.print("Moving to the next word.\n")
                 self.successful_words_count += 1
                 self.last_word_successful = True
-                self.word_manager.process_word_state(word.word, 1)
+                self.change_word_state(word, 1)
+                self.stats.record_success()
             else:
                 self.unsuccessful_words_count += 1
                 self.last_word_successful = False
-                self.word_manager.process_word_state(word.word, -1)
+                self.change_word_state(word, -1)
                 check = self.process_command("[white]Would you like to chat about this word? (y/n):", run_specific=False)
                 if check.lower() == "y":
                     check = self.chat_mode(word.word)
 
-        state = self.word_manager.category_average(self.category)
+        state = self.stats.average
         status = STATES[floor(state)]
         self.obsidian.update_state(score=state, status=status)
 
+    def quiz_round(self, size: Optional[str] = None, *args) -> None:
+        """Ask N riddles in a row, then grade every answer that is not an exact match in one
+        LLM request and save all state changes in one transaction."""
+        if not self.available_words:
+            self.prompt_to_set_category("Category")
+        answers: List[Tuple[Word, str]] = []
+        for _ in range(round_size(size)):
+            word = self.select_word(self.available_words, self.include_mastered)
+            if not word:
+                break
+            self.word_riddle(word)
+            guess = ""
+            while not guess:
+                guess = self.process_command("Your guess", run_specific=False).strip()
+            answers.append((word, guess))
+        if not answers:
+            console.print("No words are available for training.")
+            return
+        self.grade_answers(answers)
+
+    def grade_answers(self, answers: List[Tuple[Word, str]]) -> None:
+        """Grade the (word, guess) answers of a quiz round with one LLM request for the inexact ones."""
+        pending = [i for i, (word, guess) in enumerate(answers) if guess.lower() != word.word.lower()]
+        grades = {i: (True, f'Right answer is "{word.word}".') for i, (word, guess) in enumerate(answers) if i not in pending}
+        if pending:
+            items = [RoundItem("Guess the word or phrase from a riddle", answers[i][0].word, answers[i][1]) for i in pending]
+            with console.status(f"Grading {len(items)} answers..."):
+                grades.update(zip(pending, self.teacher.grade_round(items)))
+
+        word_states = {}
+        activity = None
+        for i, (word, guess) in enumerate(answers):
+            correct = grades[i][0]
+            new_state = self.word_manager.shift_state(word.state, 1 if correct else -1)
+            self.on_word_state_changed(word.word, new_state)
+            word.state = new_state
+            word_states[word.word] = new_state
+            if correct:
+                self.successful_words_count += 1
+                self.stats.record_success(save=False)
+                activity = self.stats.activity
+            else:
+                self.unsuccessful_words_count += 1
+        # Like record_success, today's activity is only written when a word was learned
+        self.word_manager.save_round(word_states, {}, activity)
+        self.ui_manager.show_round_results(console, [(word.word, guess, *grades[i]) for i, (word, guess) in enumerate(answers)])
+
+        state = self.stats.average
+        self.obsidian.update_state(score=state, status=STATES[floor(state)])
+
+    def on_word_state_changed(self, name: str, new_state: int) -> None:
+        """Keep the training pool and its stats in sync with state changes."""
+        word = self.words_by_name.get(name)
+        if word is not None:
+            self.stats.change_state(word.state, new_state)
+            word.state = new_state
+
     def print_training_stats(self, category: str = None) -> None:
-        self.update_and_show_streak()
-        self.ui_manager.show_words_stats(console, self.word_manager, category)
+        """Print the stats from the in-memory model. No queries are made here."""
+        self.ui_manager.show_streak(console, self.stats.streak, self.stats.today_is_active)
+        self.ui_manager.show_state_counts(console, self.stats.counts)
         self.ui_manager.show_training_stats(
             console, 
             current_number = self.current_word_number,
             total_number = len(self.available_words),
             unsuccessful_count = self.unsuccessful_words_count,
             successful_count = self.successful_words_count,
-            todays_words = self.word_manager.get_todays_words(),
+            todays_words = self.stats.todays_words,
         )
-    def update_and_show_streak(self) -> None:
-        if self.last_word_successful:
-            self.word_manager.update_streak()
-        streak, today_is_active = self.word_manager.get_streak()
-        self.ui_manager.show_streak(console, streak, today_is_active)
 
 class VerbsTutor(BaseWordApp):
     """Class for irregular verb mode of the application."""
@@ -547,6 +743,7 @@ class VerbsTutor(BaseWordApp):
         super().__init__()
         self._specific_command_handlers = self._get_specific_command_handlers()
         self.used_verbs = set()
+        self.verb_stats: Optional[SessionStats] = None
 
     def _get_specific_command_handlers(self) -> Dict:
         return {
@@ -563,7 +760,13 @@ class VerbsTutor(BaseWordApp):
             "/convverb": lambda verb, *x: self.verb_conversation(verb),
             "/g": lambda *x: self.practice_mode(),
             "/game": lambda *x: self.practice_mode(),
+            "/r": lambda size, *x: self.quiz_round(size),
+            "/round": lambda size, *x: self.quiz_round(size),
         }
+
+    def _get_completion_sources(self) -> Dict:
+        verbs = ('specific', '/dv', '/delverb', '/iv', '/infoverb', '/cv', '/convverb')
+        return {**super()._get_completion_sources(), **{command: 'verbs' for command in verbs}}
     
     def run(self) -> None:
         super().run("Verb")
@@ -573,7 +776,7 @@ class VerbsTutor(BaseWordApp):
             word = self.word_manager.get_irregular_verb(verb)
             if word:
                 console.print(word)
-                self.word_manager.process_verb_state(verb, -1)
+                self.change_verb_state(word, -1)
                 self.word_manager.increment_verb_counter(verb)
             else:
                 console.print(f"Verb '{verb}' not found.")
@@ -601,31 +804,26 @@ class VerbsTutor(BaseWordApp):
         verbs = self.word_manager.get_all_irregular_verbs()
         self.ui_manager.show_verbs_stats(console, verbs)
 
+    def change_verb_state(self, verb: IrregularVerb, offset: int) -> None:
+        """Shift a verb's state in the database, in the given object and in the practice stats."""
+        new_state = self.word_manager.shift_state(verb.state, offset)
+        self.word_manager.set_verb_state(verb.base_form, new_state)
+        if self.verb_stats:
+            self.verb_stats.change_state(verb.state, new_state)
+        verb.state = new_state
+
     def show_all_verbs(self) -> None:
         self.ui_manager.show_all_verbs(console, self.word_manager)
 
     def select_verb(self, verbs: List[IrregularVerb], include_mastered: bool = False) -> Optional[IrregularVerb]:
-        if not include_mastered:
-            verbs = [v for v in verbs if v.state is not None and v.state < len(STATES) - 1]
-        else:
-            verbs = [v for v in verbs if v.state is not None]
-
-        available_verbs = [v for v in verbs if v.base_form not in self.used_verbs]
-        
-        if not available_verbs:
-            return None
-
-        weights = [max(1, len(STATES) - (v.state or 0)) for v in available_verbs]
-        weights = [float(w)/sum(weights) for w in weights]
-        selected_verb = random.choices(available_verbs, weights=weights, k=1)[0]
-        self.used_verbs.add(selected_verb.base_form)
-        return selected_verb
+        return pick_for_training(verbs, self.used_verbs, lambda v: v.base_form, include_mastered)
 
     def practice_mode(self,include_mastered=False, *args) -> None:
         available_verbs = self.word_manager.get_all_irregular_verbs()
-        
+        self.verb_stats = SessionStats(self.word_manager, (v.state for v in available_verbs))
+
         while True:
-            self.show_verbs_stats()
+            self.ui_manager.show_state_counts(console, self.verb_stats.counts, title="Irregular Verbs Stats", total_label="Total Verbs")
             verb = self.select_verb(available_verbs, include_mastered)
             if not verb:
                 console.print("No more verbs available for training. Resetting used verbs.")
@@ -641,7 +839,7 @@ class VerbsTutor(BaseWordApp):
             
             if past_simple == verb.past_simple and past_participle == verb.past_participle:
                 console.print("[green]Correct![/green]")
-                self.word_manager.process_verb_state(verb.base_form, 1)
+                self.change_verb_state(verb, 1)
             else:
                 console.print(f"[red]Incorrect. The correct forms are:[/red]")
                 console.print(f"[green]Past Simple: [white]{verb.past_simple}")
@@ -651,6 +849,50 @@ class VerbsTutor(BaseWordApp):
                 if responce.lower() == "y":
                     self.verb_conversation(query=verb.base_form)
 
+    def quiz_round(self, size: Optional[str] = None, *args) -> None:
+        """Ask the forms of N verbs in a row. Exact answers are correct at once; the others are
+        graded together in one LLM request, so accepted variants and typos are recognized."""
+        available_verbs = self.word_manager.get_all_irregular_verbs()
+        self.verb_stats = SessionStats(self.word_manager, (v.state for v in available_verbs))
+        answers: List[Tuple[IrregularVerb, str, str]] = []
+        for _ in range(round_size(size)):
+            verb = self.select_verb(available_verbs)
+            if not verb:
+                self.used_verbs.clear()
+                verb = self.select_verb(available_verbs)
+                if not verb:
+                    break
+            console.print(f"\n[green]Base form: [white]{verb.base_form}")
+            past_simple = self.process_command("Past simple form:", run_specific=False).strip()
+            past_participle = self.process_command("Participle form:", run_specific=False).strip()
+            answers.append((verb, past_simple, past_participle))
+        if not answers:
+            console.print("No verbs available for training.")
+            return
+
+        pending = [i for i, (verb, ps, pp) in enumerate(answers) if (ps, pp) != (verb.past_simple, verb.past_participle)]
+        grades = {i: (True, "") for i in range(len(answers)) if i not in pending}
+        if pending:
+            items = [
+                RoundItem(f'Past simple and past participle of "{answers[i][0].base_form}"',
+                          f"{answers[i][0].past_simple}, {answers[i][0].past_participle}",
+                          f"{answers[i][1]}, {answers[i][2]}")
+                for i in pending
+            ]
+            with console.status(f"Grading {len(items)} answers..."):
+                grades.update(zip(pending, self.teacher.grade_round(items)))
+
+        verb_states, results = {}, []
+        for i, (verb, ps, pp) in enumerate(answers):
+            correct, explanation = grades[i]
+            new_state = self.word_manager.shift_state(verb.state, 1 if correct else -1)
+            self.verb_stats.change_state(verb.state, new_state)
+            verb.state = new_state
+            verb_states[verb.base_form] = new_state
+            results.append((f"{verb.base_form}: {verb.past_simple}, {verb.past_participle}", f"{ps}, {pp}", correct, explanation))
+        self.word_manager.save_round({}, verb_states)
+        self.ui_manager.show_round_results(console, results)
+
     def verb_conversation(self, query: str) -> None:
         if not query:
             return
@@ -673,7 +915,7 @@ class VerbsTutor(BaseWordApp):
                     break
                 else:
                     continue
-            answer = self.teacher.conversation(user_input, options=self.teacher.verbs_options)
+            answer = self.teacher.conversation(user_input, options=self.teacher.verbs_options, task='verbs')
             self.display_chat_answer(answer)
 
 class GrammarTutor(BaseWordApp):
@@ -693,6 +935,9 @@ class GrammarTutor(BaseWordApp):
             "/allthemes": lambda *x: self.show_all_themes(),
         }
 
+    def _get_completion_sources(self) -> Dict:
+        return {**super()._get_completion_sources(), 'specific': 'themes', '/dt': 'themes', '/deltheme': 'themes'}
+
     def run(self) -> None:
         super().run("Select theme")
 
@@ -743,6 +988,6 @@ class GrammarTutor(BaseWordApp):
                     continue
             elif not action:
                 continue
-            answer = self.teacher.conversation(user_input, options=self.teacher.grammar_options)
+            answer = self.teacher.conversation(user_input, options=self.teacher.grammar_options, task='grammar')
             self.display_chat_answer(answer)
 
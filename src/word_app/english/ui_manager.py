@@ -1,5 +1,6 @@
 import re
-from typing import Callable, List
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
 from rich.layout import Layout
 from rich.panel import Panel
 from rich.table import Table
@@ -10,15 +11,85 @@ from rich.console import Console, Group
 from rich.padding import Padding
 from rich import box
 from math import floor
-from itertools import chain
 from .word_manager import Word, WordManager, IrregularVerb, GrammarTheme, STATES
-from ..utils import MyPager, Utils
+from ..utils import MyPager, SqlSource
+from ..utils.metrics import metrics
 
 # Constants for appearance
 STYLE_LEFT = "rgb(200,180,120)"
 STYLE_RIGHT = "rgb(100,120,180)"
 STYLE_COMMAND = "green"
 ROBOT_EMOJI = "\U0001F916"
+STYLE_CONVERSATION = "rgb(100,180,255)"
+STREAM_FPS = 15
+
+class MarkdownStream:
+    """Markdown text that grows token by token. Blocks that are complete (followed by a blank
+    line and not inside a code fence) are parsed once and cached; only the trailing block is
+    re-parsed when the stream is rendered."""
+    def __init__(self, text: str = "", style: str = "none") -> None:
+        self.style = style
+        self.parts: List[str] = [text] if text else []
+        self.blocks: List[Markdown] = []
+        self._done = 0
+        self._tail = text
+
+    def append(self, token: str) -> None:
+        self.parts.append(token)
+        self._tail += token
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def renderable(self) -> Group:
+        self._close_blocks()
+        blocks = list(self.blocks)
+        if self._tail.strip():
+            blocks.append(Markdown(self._tail, style=self.style))
+        items = []
+        for i, block in enumerate(blocks):
+            # Rich puts a blank line in front of lists and quotes itself, but not in front of other blocks
+            if i and block.parsed and block.parsed[0].type in ("paragraph_open", "heading_open", "fence", "code_block"):
+                items.append(Text(""))
+            items.append(block)
+        return Group(*items)
+
+    def _close_blocks(self) -> None:
+        end = self._tail.rfind("\n\n")
+        if end < 0:
+            return
+        block = self._tail[:end]
+        fences = sum(1 for line in block.splitlines() if line.lstrip().startswith(("```", "~~~")))
+        if fences % 2:
+            return
+        if block.strip():
+            self.blocks.append(Markdown(block, style=self.style))
+        self._tail = self._tail[end + 2:]
+
+class StreamRenderer:
+    """Feed tokens into a MarkdownStream and repaint a Live display at most fps times per second."""
+    def __init__(self, live: Live, paint: Callable[[MarkdownStream], None], fps: int = STREAM_FPS) -> None:
+        self.live = live
+        self.paint = paint
+        self.frame_time = 1 / fps if fps > 0 else 0
+
+    def run(self, tokens: Iterable[str], text: str = "", style: str = "none") -> str:
+        stream = MarkdownStream(text, style)
+        next_frame = 0.0
+        for token in tokens:
+            stream.append(token)
+            now = time.perf_counter()
+            if now >= next_frame:
+                self._repaint(stream)
+                next_frame = now + self.frame_time
+        self._repaint(stream)
+        return stream.text
+
+    def _repaint(self, stream: MarkdownStream) -> None:
+        with metrics.timer('render_frame_ms'):
+            self.paint(stream)
+            self.live.refresh()
 
 class UIManager:
     """Class to manage the user interface."""
@@ -65,11 +136,30 @@ class UIManager:
 
     @staticmethod
     def update_converation_output(answer: str, live: Live) -> None:
-        markdown = Markdown(answer, style="rgb(100,180,255)")
+        markdown = Markdown(answer, style=STYLE_CONVERSATION)
         padded_markdown = Padding(markdown, (1,0))
         live.update(Group(padded_markdown))
         live.refresh()
 
+    @staticmethod
+    def stream_conversation_output(tokens: Iterable[str], live: Live, text: str = "") -> str:
+        """Render a streamed answer below the prompt. Returns the full text."""
+        def paint(stream: MarkdownStream) -> None:
+            live.update(Group(Padding(stream.renderable(), (1,0))))
+        return StreamRenderer(live, paint).run(tokens, text, style=STYLE_CONVERSATION)
+
+    @staticmethod
+    def stream_left_panel(tokens: Iterable[str], layout: Layout, live: Live) -> str:
+        def paint(stream: MarkdownStream) -> None:
+            UIManager._update_panel(layout=layout, panel_name="left", text=stream, box_style=box.MARKDOWN, color=STYLE_LEFT, renderable_class=MarkdownStream.renderable)
+        return StreamRenderer(live, paint).run(tokens)
+
+    @staticmethod
+    def stream_right_panel(tokens: Iterable[str], layout: Layout, live: Live) -> str:
+        def paint(stream: MarkdownStream) -> None:
+            UIManager._update_panel(layout=layout, panel_name="right", text=stream, box_style=box.MARKDOWN, color=STYLE_RIGHT, renderable_class=MarkdownStream.renderable)
+        return StreamRenderer(live, paint).run(tokens)
+
     @staticmethod
     def _update_panel(
         layout: Layout, 
@@ -96,7 +186,9 @@ class UIManager:
             ("/c, /conv {word}", "Start a chat about a word or phrase"),
             ("/b, /bye", "End the current chat session (chat mode only)"),
             ("/say {text}", "Say a text using the text-to-speech engine"),
-            ("/v, /voice {command}", "Change auto speech settings or interrupt the voice. Available commands: on/off/stop.")
+            ("/v, /voice {command}", "Change auto speech settings or interrupt the voice. Available commands: on/off/stop/stats."),
+            ("/w, /warmup", "Show the status of the background warm-up (connections, database, audio device)"),
+            ("/perf {json|prom|reset}", "Show latency and throughput metrics, or print them in an export format"),
         ]
 
         specific_commands = {
@@ -108,6 +200,7 @@ class UIManager:
                 ("/t, /turn", "Initiate a category selection procedure"),
                 ("/mode 'full|normal'", "Change words selection mode. Full means include mastered words in the treaining set" ),
                 ("/l, /lookup {word}", "Look up a specific word"),
+                ("/r, /round {N}", "Answer N riddles in a row, then get all grades at once"),
                 ("/?, /question", "Ask for more information about the current word (guess mode)"),
                 ("{category}", "Start training with words from the specified category"),
             ],
@@ -118,6 +211,7 @@ class UIManager:
                 ("/av, /allverbs", "List of all avalable irregular verbs"),
                 ("/cv, /convverb {verb}", "Start a conversation about an irregular verb"),
                 ("/g, /game", "Play a game with irregular verbs"),
+                ("/r, /round {N}", "Give the forms of N verbs in a row, then get all grades at once"),
                 ("{verb}", "Watch an irregular verbs"),
             ],
             "grammartutor": [
@@ -145,11 +239,8 @@ class UIManager:
 
     @staticmethod
     def show_categories(console: Console, manager: WordManager) -> None:
-        words = manager.fetch_words(category='all')
-        total_words = len(words)
-        category_counts = {}
-        for word in words:
-            category_counts[word.category] = category_counts.get(word.category, 0) + 1
+        summary = manager.category_summary()
+        total_words = sum(count for _, count, _ in summary)
 
         table = Table(title="[green]Select a Category.\nOr skip to train all words.")
         table.add_column("Category Name", style="cyan")
@@ -158,8 +249,8 @@ class UIManager:
 
         table.add_row("Total Words", '', str(total_words))
         table.add_row("", "", "")
-        for cat, count in category_counts.items():
-            state = STATES[floor(manager.category_average(cat))]
+        for cat, count, average in summary:
+            state = STATES[floor(average)]
             name = cat if cat else "Uncategorized"
             table.add_row(name, str(state), str(count))
 
@@ -167,21 +258,52 @@ class UIManager:
 
     @staticmethod
     def show_words_stats(console: Console, manager: WordManager, category: str = None):
-        words = manager.fetch_words(category)
-        total_words = len(words)
-        state_counts = {state: sum(1 for w in words if w.state == i) for i, state in enumerate(STATES)}
+        UIManager.show_state_counts(console, manager.state_counts(category))
 
-        table = Table(title="Training Stats")
+    @staticmethod
+    def show_state_counts(console: Console, state_counts: List[int], title: str = "Training Stats", total_label: str = "Total Words") -> None:
+        """Print a histogram of states, one count per entry of STATES."""
+        table = Table(title=title)
         table.add_column("State", style="cyan")
         table.add_column("Count", style="magenta")
 
-        table.add_row("Total Words", str(total_words))
+        table.add_row(total_label, str(sum(state_counts)))
         table.add_row("", "")
-        for state, count in state_counts.items():
+        for state, count in zip(STATES, state_counts):
             table.add_row(state, str(count))
         console.print("\n")
         console.print(table)
 
+    @staticmethod
+    def show_round_results(console: Console, results: List[Tuple[str, str, bool, str]]) -> None:
+        """Print the grades of a quiz round: (expected, answer, correct, explanation) per item."""
+        table = Table(title="Round results", box=box.SIMPLE_HEAD)
+        for column in ("", "Expected", "Your answer", "Comment"):
+            table.add_column(column)
+        for expected, answer, correct, explanation in results:
+            mark = "[green]✓[/green]" if correct else "[red]✗[/red]"
+            table.add_row(mark, expected, answer, explanation)
+        right = sum(1 for result in results if result[2])
+        table.caption = f"{right} of {len(results)} correct"
+        console.print(table)
+
+    @staticmethod
+    def show_metrics(console: Console, snapshot: Dict) -> None:
+        """Print the histograms and counters of a metrics snapshot."""
+        table = Table(title="Performance", box=box.SIMPLE_HEAD)
+        for column in ("Metric", "Labels", "Count", "p50", "p95", "Max", "Total"):
+            table.add_column(column, style="cyan" if column == "Metric" else None, justify="left" if column in ("Metric", "Labels") else "right")
+        for h in snapshot['histograms']:
+            labels = ", ".join(f"{k}={v}" for k, v in h['labels'].items())
+            table.add_row(h['name'], labels, str(h['count']), f"{h['p50']:.1f}", f"{h['p95']:.1f}", f"{h['max']:.1f}", f"{h['sum']:.1f}")
+        for c in snapshot['counters'] + snapshot['gauges']:
+            labels = ", ".join(f"{k}={v}" for k, v in c['labels'].items())
+            table.add_row(c['name'], labels, "", "", "", "", f"{c['value']:g}")
+        if not table.row_count:
+            console.print("[dim]No measurements yet[/dim]")
+            return
+        console.print(table)
+
     @staticmethod
     def show_training_stats(console: Console, current_number: int, total_number: int, unsuccessful_count: int, successful_count: int, todays_words: int) -> None:
         msg = f"{current_number}/{total_number} "
@@ -204,23 +326,28 @@ class UIManager:
     @staticmethod
     def show_all_words(console: Console, manager: WordManager, category:str = None, word_count:int = -1) -> None:
         header = f"{'Word':<80} {'Category':<20} {'State'}"
-        words = manager.fetch_words(category=category)
-        words.sort(key=lambda w: f"{w.state}{w.word}")
-        lines = []
-        for w in words:
-            word =w.word
-            if word_count > 0:
-                count = Utils.count_words(word)
-                if count != word_count:
-                    continue
-            category = w.category if w.category else "Uncategorized"
-            state = STATES[w.state]
-            lines.append(f"  {word:<80} {category:<20} {state}")
-        rows = ['-' * console.width for w in words]
-        lines = [*chain(*zip(lines, rows))]
-        pager = MyPager(header, lines)
+        pager = MyPager(header, source=UIManager.words_source(manager, category, word_count), separator=True)
         pager.run()
 
+    @staticmethod
+    def words_source(manager: WordManager, category:str = None, word_count:int = -1) -> SqlSource:
+        """The rows of the words pager, read lazily from the database."""
+        query, params = manager.words_listing_query(category, word_count)
+
+        def format_row(row) -> str:
+            word, category, state = row
+            category = category if category else "Uncategorized"
+            return f"  {word:<80} {category:<20} {STATES[state]}"
+
+        return SqlSource(
+            manager.conn, query, params,
+            order_by="state, word",
+            key_column="word",
+            search_columns=("word", "category"),
+            format_row=format_row,
+            fts_table=manager.search_table,
+        )
+
     @staticmethod
     def show_all_verbs(console: Console, manager: WordManager) -> None:
         header = f"{'Base Form':<20} {'Past Simple':<20} {'Past Participle':<55} {'State'}"
@@ -233,9 +360,7 @@ class UIManager:
             past_participle = v.past_participle
             state = STATES[v.state]
             lines.append(f"  {base_form:<20} {past_simple:<20} {past_participle:<55} {state}")
-        rows = ['-' * console.width for v in verbs]
-        lines = [*chain(*zip(lines, rows))]
-        pager = MyPager(header, lines)
+        pager = MyPager(header, lines, separator=True)
         pager.run()
 
     @staticmethod
@@ -247,26 +372,13 @@ class UIManager:
             name = theme.name
             description = theme.description
             lines.append(f"  {name:<40} {description}")
-        rows = ['-' * console.width for theme in themes]
-        lines = [*chain(*zip(lines, rows))]
-        pager = MyPager(header, lines)
+        pager = MyPager(header, lines, separator=True)
         pager.run()
 
     @staticmethod
     def show_verbs_stats(console: Console, verbs: List[IrregularVerb]) -> None:
-        total_verbs = len(verbs)
-        state_counts = {state: sum(1 for v in verbs if v.state == i) for i, state in enumerate(STATES)}
-
-        table = Table(title="Irregular Verbs Stats")
-        table.add_column("State", style="cyan")
-        table.add_column("Count", style="magenta")
-
-        table.add_row("Total Verbs", str(total_verbs))
-        table.add_row("", "")
-        for state, count in state_counts.items():
-            table.add_row(state, str(count))
-        console.print("\n")
-        console.print(table)
+        state_counts = [sum(1 for v in verbs if v.state == i) for i in range(len(STATES))]
+        UIManager.show_state_counts(console, state_counts, title="Irregular Verbs Stats", total_label="Total Verbs")
 
     @staticmethod
     def show_grammar_themes(console: Console, themes: List[GrammarTheme]) -> None:
@@ -1,8 +1,12 @@
 import os
+import re
 import sqlite3
 from dataclasses import dataclass
-from typing import Optional, List
-from ..config import get_database_path, get_streak_threshold
+from typing import Dict, Optional, List, Tuple
+from ..config import get_database_path, get_streak_threshold, get_profile
+from ..utils import Utils
+from ..utils.metrics import metrics
+from .lookup import KEY_VERSION, lookup_key, normal_form
 import datetime
 
 STATES = (
@@ -45,8 +49,35 @@ class GrammarTheme:
     name: str
     description: str
 
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE)
+
+def _statement_labels(sql: str) -> dict:
+    table = _TABLE.search(sql)
+    return {'op': sql.split(None, 1)[0].upper() if sql.strip() else '', 'table': table.group(1) if table else ''}
+
+class TimedCursor(sqlite3.Cursor):
+    """Records the execution time of every statement in the metrics registry."""
+    def execute(self, sql, parameters=()):
+        if not metrics.enabled:
+            return super().execute(sql, parameters)
+        with metrics.timer('db_statement_ms', **_statement_labels(sql)):
+            return super().execute(sql, parameters)
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+DEFAULT_LEARNER = 'default'
+
 class WordManager:
-    """A class to manage the database of words."""
+    """A class to manage the database of words.
+
+    Vocabulary (words, verbs, themes) is shared by every learner and stored once. What a
+    learner knows lives in the progress tables, keyed by (learner_id, word): a word without
+    a progress row is new to that learner. The learner is the --profile of the session."""
     _instance = None
 
     def __new__(cls):
@@ -57,12 +88,18 @@ class WordManager:
     
     def _initialize(self) -> None:
         db_path = get_database_path()
+        self.db_path = db_path
         self.streak_threshold = get_streak_threshold()
+        self.learner_id = get_profile()
+        self._cache: dict = {}
         self._ensure_db_directory_exists(db_path)
-        self.conn: sqlite3.Connection = sqlite3.connect(db_path)
+        self.conn: sqlite3.Connection = sqlite3.connect(db_path, factory=TimedConnection)
         self.cursor: sqlite3.Cursor = self.conn.cursor()
+        self.conn.create_function('word_count', 1, Utils.count_words, deterministic=True)
+        self.conn.create_function('regexp', 2, Utils.regexp, deterministic=True)
+        self.conn.create_function('lookup_key', 1, lookup_key, deterministic=True)
         self._create_table()
-        # self._migrate_database()
+        self._migrate_database()
 
     def _ensure_db_directory_exists(self, db_path: str) -> None:
         db_dir = os.path.dirname(db_path)
@@ -70,90 +107,190 @@ class WordManager:
             os.makedirs(db_dir)
             print(f"Created directory for database: {db_dir}")
 
+    def for_learner(self, learner_id: str) -> 'WordManager':
+        """A manager for another learner on the same connection and caches.
+        Used by the server, where one process serves many learners."""
+        view = object.__new__(WordManager)
+        view.__dict__.update(self.__dict__)
+        view.learner_id = learner_id
+        view.cursor = self.conn.cursor()
+        return view
+
+    COMPLETION_COLUMNS = {'words': ('words', 'word'), 'verbs': ('irregular_verbs', 'base_form'), 'themes': ('grammar_themes', 'name')}
+
     def _create_table(self) -> None:
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS words
-            (word TEXT PRIMARY KEY, category TEXT, explanation_en TEXT, 
-             explanation_ru TEXT, ask_counter INTEGER, state INTEGER)
+            (word TEXT PRIMARY KEY, category TEXT, explanation_en TEXT, explanation_ru TEXT, lookup_key TEXT)
         ''')
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS irregular_verbs
-            (base_form TEXT PRIMARY KEY, past_simple TEXT, past_participle TEXT,
-             ask_counter INTEGER, state INTEGER)
+            (base_form TEXT PRIMARY KEY, past_simple TEXT, past_participle TEXT)
         ''')
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS grammar_themes
             (name TEXT PRIMARY KEY, description TEXT)
         ''')
+        # Per-learner progress. The primary keys make point lookups and joins covering,
+        # the state indexes serve the histograms without touching the vocabulary
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS word_progress
+            (learner_id TEXT NOT NULL, word TEXT NOT NULL, ask_counter INTEGER NOT NULL DEFAULT 0,
+             state INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (learner_id, word)) WITHOUT ROWID
+        ''')
         self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_activity
-            (date TEXT PRIMARY KEY, successful_words INTEGER, streak INTEGER)
+            CREATE TABLE IF NOT EXISTS verb_progress
+            (learner_id TEXT NOT NULL, base_form TEXT NOT NULL, ask_counter INTEGER NOT NULL DEFAULT 0,
+             state INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (learner_id, base_form)) WITHOUT ROWID
         ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS learner_activity
+            (learner_id TEXT NOT NULL, date TEXT NOT NULL, successful_words INTEGER, streak INTEGER,
+             PRIMARY KEY (learner_id, date)) WITHOUT ROWID
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS words_category ON words (category, word)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS word_progress_state ON word_progress (learner_id, state, word)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS verb_progress_state ON verb_progress (learner_id, state, base_form)")
+        # Case-insensitive range scans for prompt completion
+        for table, column in self.COMPLETION_COLUMNS.values():
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column}_nocase ON {table} ({column} COLLATE NOCASE)")
+        self.search_table = self._create_search_index()
+
+    def _create_search_index(self) -> Optional[str]:
+        """Create a trigram FTS5 index over words for substring search in listings.
+        Returns None if the SQLite build has no FTS5 or no trigram tokenizer."""
+        exists = self.conn.execute("SELECT name FROM sqlite_master WHERE name = 'words_fts'").fetchone() is not None
+        try:
+            self.conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS words_fts
+                USING fts5(word, category, content='words', content_rowid='rowid', tokenize='trigram')
+            ''')
+        except sqlite3.OperationalError:
+            return None
+        self.conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words BEGIN
+                INSERT INTO words_fts(rowid, word, category) VALUES (new.rowid, new.word, new.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words BEGIN
+                INSERT INTO words_fts(words_fts, rowid, word, category) VALUES ('delete', old.rowid, old.word, old.category);
+            END;
+            CREATE TRIGGER IF NOT EXISTS words_fts_update AFTER UPDATE OF word, category ON words BEGIN
+                INSERT INTO words_fts(words_fts, rowid, word, category) VALUES ('delete', old.rowid, old.word, old.category);
+                INSERT INTO words_fts(rowid, word, category) VALUES (new.rowid, new.word, new.category);
+            END;
+        ''')
+        if not exists:
+            self.conn.execute("INSERT INTO words_fts(words_fts) VALUES ('rebuild')")
+            self.conn.commit()
+        return 'words_fts'
+
+    def _columns(self, table: str) -> List[str]:
+        return [column[1] for column in self.conn.execute(f"PRAGMA table_info({table})").fetchall()]
 
     def _migrate_database(self) -> None:
-        self.cursor.execute("PRAGMA table_info(words)")
-        columns = [column[1] for column in self.cursor.fetchall()]
-        
-        if "state" not in columns:
-            self.cursor.execute("ALTER TABLE words ADD COLUMN state INTEGER DEFAULT 0")
-        
-        self.conn.commit()
+        """Move the progress of a single-learner database to the default learner, and fill the
+        lookup keys of words saved before they existed or by an older lookup_key
+        (PRAGMA user_version holds the KEY_VERSION of the stored keys)."""
+        with self.conn:
+            if 'lookup_key' not in self._columns('words'):
+                self.conn.execute("ALTER TABLE words ADD COLUMN lookup_key TEXT")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+                self.conn.execute("UPDATE words SET lookup_key = lookup_key(word)")
+                self.conn.execute(f"PRAGMA user_version = {KEY_VERSION}")
+            else:
+                self.conn.execute("UPDATE words SET lookup_key = lookup_key(word) WHERE lookup_key IS NULL")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS words_lookup_key ON words (lookup_key)")
+            for table, key, progress in (('words', 'word', 'word_progress'), ('irregular_verbs', 'base_form', 'verb_progress')):
+                if 'state' not in self._columns(table):
+                    continue
+                self.conn.execute(f'''
+                    INSERT OR IGNORE INTO {progress} (learner_id, {key}, ask_counter, state)
+                    SELECT ?, {key}, COALESCE(ask_counter, 0), COALESCE(state, 0) FROM {table}
+                ''', (DEFAULT_LEARNER,))
+                for column in ('ask_counter', 'state'):
+                    try:
+                        self.conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+                    except sqlite3.OperationalError:
+                        pass  # SQLite before 3.35; the column stays, unused
+            if self.conn.execute("SELECT name FROM sqlite_master WHERE name = 'user_activity'").fetchone():
+                self.conn.execute('''
+                    INSERT OR IGNORE INTO learner_activity (learner_id, date, successful_words, streak)
+                    SELECT ?, date, successful_words, streak FROM user_activity
+                ''', (DEFAULT_LEARNER,))
+                self.conn.execute("DROP TABLE user_activity")
 
     def is_category_available(self, category: str) -> bool:
-        return len(self.fetch_words(category)) > 0
+        self.cursor.execute("SELECT 1 FROM words WHERE category = ? LIMIT 1", (category,))
+        return self.cursor.fetchone() is not None
 
     def insert_word(self, word: str, category: str, explanation_en: str, explanation_ru: str) -> None:
-        """Insert a new word into the database. If the word already exists, update it."""
-        self.cursor.execute("SELECT * FROM words WHERE word = ?", (word,))
+        """Insert a new word into the database. If the word already exists, update it.
+        The learner's progress on an existing word is kept."""
+        self.cursor.execute("SELECT category FROM words WHERE word = ?", (word,))
         existing = self.cursor.fetchone()
         if existing:
-            new_category = existing[1] if not category else category
-            ask_counter = existing[4]
-            state = existing[5]
+            new_category = existing[0] if not category else category
             query = '''
                 UPDATE words 
-                SET category = ?, explanation_en = ?, explanation_ru = ?, ask_counter = ?, state = ?
+                SET category = ?, explanation_en = ?, explanation_ru = ?
                 WHERE word = ?
             '''
-            params = (new_category, explanation_en, explanation_ru, ask_counter, state, word)
+            params = (new_category, explanation_en, explanation_ru, word)
         else:
             query = '''
                 INSERT INTO words 
-                (word, category, explanation_en, explanation_ru, ask_counter, state) 
-                VALUES (?, ?, ?, ?, ?, ?)
+                (word, category, explanation_en, explanation_ru, lookup_key) 
+                VALUES (?, ?, ?, ?, ?)
             '''
-            params = (word, category, explanation_en, explanation_ru, 1, 0)
+            params = (word, category, explanation_en, explanation_ru, lookup_key(word))
         
         self.cursor.execute(query, params)
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO word_progress (learner_id, word, ask_counter, state) VALUES (?, ?, 1, 0)",
+            (self.learner_id, word),
+        )
         self.conn.commit()
+        self._cache.pop('categories', None)
 
     def increment_word_counter(self, word: str) -> None:
         """Increment the ask counter of a word."""
-        current_word = self.fetch_word(word)
-        if current_word:
-            new_counter = current_word.ask_counter + 1
-            self.cursor.execute("UPDATE words SET ask_counter = ? WHERE word = ?", (new_counter, word))
-            self.conn.commit()
+        self.cursor.execute('''
+            INSERT INTO word_progress (learner_id, word, ask_counter, state) VALUES (?, ?, 1, 0)
+            ON CONFLICT(learner_id, word) DO UPDATE SET ask_counter = ask_counter + 1
+        ''', (self.learner_id, word))
+        self.conn.commit()
 
     def set_word_state(self, word: str, state: int) -> None:
-        self.cursor.execute("UPDATE words SET state = ? WHERE word = ?", (state, word))
+        self.cursor.execute('''
+            INSERT INTO word_progress (learner_id, word, ask_counter, state) VALUES (?, ?, 0, ?)
+            ON CONFLICT(learner_id, word) DO UPDATE SET state = excluded.state
+        ''', (self.learner_id, word, state))
         self.conn.commit()
 
     def set_category(self, word: str, category: str) -> None:
         self.cursor.execute("UPDATE words SET category = ? WHERE word = ?", (category, word))
         self.conn.commit()
+        self._cache.pop('categories', None)
+
+    def shift_state(self, state: int, offset: int) -> int:
+        """Move a state by offset, clamped to the valid range."""
+        return max(0, min(len(STATES)-1, state + offset))
 
     def process_word_state(self, word: str, offset: int) -> None:
         """Process the state of a word by incrementing or decrementing it."""
         current_word = self.fetch_word(word)
         if current_word:
-            new_state = max(0, min(len(STATES)-1, current_word.state + offset))
-            self.cursor.execute("UPDATE words SET state = ? WHERE word = ?", (new_state, word))
-            self.conn.commit()
+            self.set_word_state(word, self.shift_state(current_word.state, offset))
+
+    # The vocabulary with this learner's progress; words the learner has not met yet are new
+    WORDS_SELECT = '''
+        SELECT w.word, w.category, w.explanation_en, w.explanation_ru, COALESCE(p.ask_counter, 0), COALESCE(p.state, 0)
+        FROM words w LEFT JOIN word_progress p ON p.learner_id = ? AND p.word = w.word
+    '''
 
     def fetch_word(self, word: str) -> Optional[Word]:
         """Fetch a word from the database by its name."""
-        self.cursor.execute("SELECT word, category, explanation_en, explanation_ru, ask_counter, state FROM words WHERE word = ?", (word,))
+        self.cursor.execute(f"{self.WORDS_SELECT} WHERE w.word = ?", (self.learner_id, word))
         result: Optional[tuple] = self.cursor.fetchone()
         if result:
             return Word(
@@ -165,44 +302,159 @@ class WordManager:
                 state=result[5]
             )
         return None
+
+    def resolve_word(self, text: str) -> Optional[Word]:
+        """Find the saved entry for what the user typed: the exact word, else a variant of it
+        ("Running", "running " or "ran" for "run") through the lookup_key index. Among several
+        variants the one with the same spelling up to case and punctuation wins, then the shortest."""
+        word = self.fetch_word(text)
+        if word is not None:
+            metrics.inc('dictionary_lookups_total', match='exact')
+            return word
+        key = lookup_key(text)
+        if not key:
+            metrics.inc('dictionary_lookups_total', match='miss')
+            return None
+        self.cursor.execute(f"{self.WORDS_SELECT} WHERE w.lookup_key = ?", (self.learner_id, key))
+        candidates = [Word(*row) for row in self.cursor.fetchall()]
+        if not candidates:
+            metrics.inc('dictionary_lookups_total', match='miss')
+            return None
+        normal = normal_form(text)
+        metrics.inc('dictionary_lookups_total', match='variant')
+        return min(candidates, key=lambda w: (normal_form(w.word) != normal, len(w.word), w.word))
+
+    def find_duplicates(self) -> List[List[str]]:
+        """Groups of saved words that share a lookup key, each group sorted so that the entry
+        merge_words should keep comes first."""
+        self.cursor.execute('''
+            SELECT lookup_key, word FROM words
+            WHERE lookup_key IN (SELECT lookup_key FROM words WHERE lookup_key != '' GROUP BY lookup_key HAVING COUNT(*) > 1)
+            ORDER BY lookup_key
+        ''')
+        groups: Dict[str, List[str]] = {}
+        for key, word in self.cursor.fetchall():
+            groups.setdefault(key, []).append(word)
+        return [sorted(words, key=lambda w: (normal_form(w) != w, len(w), w)) for words in groups.values()]
+
+    def merge_words(self, keep: str, duplicates: List[str]) -> None:
+        """Fold duplicates into keep: every learner keeps the higher state and the sum of the asks,
+        an empty category is taken from a duplicate, and the duplicates are deleted."""
+        with self.conn:
+            for duplicate in duplicates:
+                if duplicate == keep:
+                    continue
+                self.conn.execute('''
+                    INSERT INTO word_progress (learner_id, word, ask_counter, state)
+                    SELECT learner_id, ?, ask_counter, state FROM word_progress WHERE word = ?
+                    ON CONFLICT(learner_id, word) DO UPDATE SET
+                        ask_counter = ask_counter + excluded.ask_counter,
+                        state = MAX(state, excluded.state)
+                ''', (keep, duplicate))
+                self.conn.execute('''
+                    UPDATE words SET category = (SELECT category FROM words WHERE word = ?)
+                    WHERE word = ? AND COALESCE(category, '') = ''
+                ''', (duplicate, keep))
+                self.conn.execute("DELETE FROM word_progress WHERE word = ?", (duplicate,))
+                self.conn.execute("DELETE FROM words WHERE word = ?", (duplicate,))
+        self._cache.pop('categories', None)
     
     def fetch_words(self, category: Optional[str] = None) -> List[Word]:
         """Fetch all words by category from the database."""
         if category == 'all' or category is None:
-            self.cursor.execute("SELECT * FROM words")
+            self.cursor.execute(self.WORDS_SELECT, (self.learner_id,))
         elif category:
-            self.cursor.execute("SELECT * FROM words WHERE category = ?", (category,))
+            self.cursor.execute(f"{self.WORDS_SELECT} WHERE w.category = ?", (self.learner_id, category))
         else:
-            self.cursor.execute("SELECT * FROM words WHERE category = ''")
+            self.cursor.execute(f"{self.WORDS_SELECT} WHERE w.category = ''", (self.learner_id,))
         
         results = self.cursor.fetchall()
         return [Word(*result) for result in results]
+
+    def state_counts(self, category: Optional[str] = None) -> List[int]:
+        """The learner's histogram of states, one count per entry of STATES, computed in SQL."""
+        query = '''
+            SELECT COALESCE(p.state, 0) AS state, COUNT(*)
+            FROM words w LEFT JOIN word_progress p ON p.learner_id = ? AND p.word = w.word
+        '''
+        params: tuple = (self.learner_id,)
+        if category and category != 'all':
+            query += " WHERE w.category = ?"
+            params += (category,)
+        elif category == '':
+            query += " WHERE w.category = ''"
+        counts = [0] * len(STATES)
+        for state, count in self.conn.execute(query + " GROUP BY 1", params):
+            counts[state] = count
+        return counts
+
+    def category_summary(self) -> List[Tuple[str, int, float]]:
+        """(category, word count, average state) of every category for this learner, in one query."""
+        return self.conn.execute('''
+            SELECT w.category, COUNT(*), AVG(COALESCE(p.state, 0))
+            FROM words w LEFT JOIN word_progress p ON p.learner_id = ? AND p.word = w.word
+            GROUP BY w.category ORDER BY w.category
+        ''', (self.learner_id,)).fetchall()
     
+    def words_listing_query(self, category: Optional[str] = None, word_count: int = -1) -> Tuple[str, tuple]:
+        """Build a SELECT of (word, category, state) with the same category rules as fetch_words.
+        Explanations are left out so listings stay light."""
+        query = '''
+            SELECT w.word AS word, w.category AS category, COALESCE(p.state, 0) AS state
+            FROM words w LEFT JOIN word_progress p ON p.learner_id = ? AND p.word = w.word
+        '''
+        conditions, params = [], [self.learner_id]
+        if category == 'all' or category is None:
+            pass
+        elif category:
+            conditions.append("w.category = ?")
+            params.append(category)
+        else:
+            conditions.append("w.category = ''")
+        if word_count > 0:
+            conditions.append("word_count(w.word) = ?")
+            params.append(word_count)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, tuple(params)
+
     def delete_word(self, word: str) -> bool:
         """Delete a word from the database."""
         is_exist = self.fetch_word(word)
         if not is_exist:
             return False
         self.cursor.execute("DELETE FROM words WHERE word = ?", (word,))
+        self.cursor.execute("DELETE FROM word_progress WHERE word = ?", (word,))
         self.conn.commit()
+        self._cache.pop('categories', None)
         return True
     
     def category_average(self, category: str) -> float:
         """Calculate the average state of words in a category."""
-        words = self.fetch_words(category)
-        if not words:
+        counts = self.state_counts(category)
+        total = sum(counts)
+        if not total:
             return 0
-        return sum(word.state for word in words) / len(words)
+        return sum(state * count for state, count in enumerate(counts)) / total
+
+    VERBS_SELECT = '''
+        SELECT v.base_form, v.past_simple, v.past_participle, COALESCE(p.ask_counter, 0), COALESCE(p.state, 0)
+        FROM irregular_verbs v LEFT JOIN verb_progress p ON p.learner_id = ? AND p.base_form = v.base_form
+    '''
 
     def add_irregular_verb(self, verb: IrregularVerb) -> None:
         self.cursor.execute('''
-            INSERT OR REPLACE INTO irregular_verbs (base_form, past_simple, past_participle, ask_counter, state)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (verb.base_form, verb.past_simple, verb.past_participle, verb.ask_counter, verb.state))
+            INSERT OR REPLACE INTO irregular_verbs (base_form, past_simple, past_participle)
+            VALUES (?, ?, ?)
+        ''', (verb.base_form, verb.past_simple, verb.past_participle))
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO verb_progress (learner_id, base_form, ask_counter, state)
+            VALUES (?, ?, ?, ?)
+        ''', (self.learner_id, verb.base_form, verb.ask_counter, verb.state))
         self.conn.commit()
 
     def get_all_irregular_verbs(self) -> List[IrregularVerb]:
-        self.cursor.execute('SELECT * FROM irregular_verbs')
+        self.cursor.execute(self.VERBS_SELECT, (self.learner_id,))
         return [IrregularVerb(*row) for row in self.cursor.fetchall()]
 
     def delete_irregular_verb(self, base_form: str) -> bool:
@@ -211,29 +463,35 @@ class WordManager:
         if not is_exist:
             return False
         self.cursor.execute("DELETE FROM irregular_verbs WHERE base_form = ?", (base_form,))
+        self.cursor.execute("DELETE FROM verb_progress WHERE base_form = ?", (base_form,))
         self.conn.commit()
         return True
     
     def get_irregular_verb(self, base_form: str) -> Optional[IrregularVerb]:
-        self.cursor.execute('SELECT * FROM irregular_verbs WHERE base_form = ?', (base_form,))
+        self.cursor.execute(f"{self.VERBS_SELECT} WHERE v.base_form = ?", (self.learner_id, base_form))
         result = self.cursor.fetchone()
         return IrregularVerb(*result) if result else None
     
     def increment_verb_counter(self, base_form: str) -> None:
         """Increment the ask counter of an irregular verb."""
-        current_verb = self.get_irregular_verb(base_form)
-        if current_verb:
-            new_counter = current_verb.ask_counter + 1
-            self.cursor.execute("UPDATE irregular_verbs SET ask_counter = ? WHERE base_form = ?", (new_counter, base_form))
-            self.conn.commit()
+        self.cursor.execute('''
+            INSERT INTO verb_progress (learner_id, base_form, ask_counter, state) VALUES (?, ?, 1, 0)
+            ON CONFLICT(learner_id, base_form) DO UPDATE SET ask_counter = ask_counter + 1
+        ''', (self.learner_id, base_form))
+        self.conn.commit()
+
+    def set_verb_state(self, base_form: str, state: int) -> None:
+        self.cursor.execute('''
+            INSERT INTO verb_progress (learner_id, base_form, ask_counter, state) VALUES (?, ?, 0, ?)
+            ON CONFLICT(learner_id, base_form) DO UPDATE SET state = excluded.state
+        ''', (self.learner_id, base_form, state))
+        self.conn.commit()
 
     def process_verb_state(self, base_form: str, offset: int) -> None:
         """Process the state of an irregular verb by incrementing or decrementing it."""
         current_verb = self.get_irregular_verb(base_form)
         if current_verb:
-            new_state = max(0, min(len(STATES)-1, current_verb.state + offset))
-            self.cursor.execute("UPDATE irregular_verbs SET state = ? WHERE base_form = ?", (new_state, base_form))
-            self.conn.commit()
+            self.set_verb_state(base_form, self.shift_state(current_verb.state, offset))
     
     def add_grammar_theme(self, theme: GrammarTheme) -> None:
         self.cursor.execute('''
@@ -261,56 +519,115 @@ class WordManager:
         return GrammarTheme(*result) if result else None
 
     def get_all_categories(self) -> List[str]:
-        """Fetch all unique categories from the database."""
-        self.cursor.execute("SELECT DISTINCT category FROM words ORDER BY category")
-        return [row[0] for row in self.cursor.fetchall() if row[0]]  # Exclude empty categories
+        """Fetch all unique categories from the database. The list is cached until a word is added or recategorized."""
+        categories = self._cache.get('categories')
+        if categories is None:
+            self.cursor.execute("SELECT DISTINCT category FROM words ORDER BY category")
+            categories = [row[0] for row in self.cursor.fetchall() if row[0]]  # Exclude empty categories
+            self._cache['categories'] = categories
+        return list(categories)
+
+    def complete(self, source: str, prefix: str, limit: int = 20) -> List[str]:
+        """Up to limit entries of a source ('words', 'verbs', 'themes' or 'categories') starting with
+        prefix, ignoring ASCII case. Entries are read with a range scan on a NOCASE index, so the
+        cost does not grow with the table."""
+        if source == 'categories':
+            folded = prefix.lower()
+            return [c for c in self.get_all_categories() if c.lower().startswith(folded)][:limit]
+        if not prefix:
+            return []
+        table, column = self.COMPLETION_COLUMNS[source]
+        # NOCASE folds only ASCII letters to lower case, so the bounds are folded the same way
+        low = ''.join(c.lower() if 'A' <= c <= 'Z' else c for c in prefix)
+        high = low[:-1] + chr(ord(low[-1]) + 1)
+        self.cursor.execute(f'''
+            SELECT {column} FROM {table}
+            WHERE {column} >= ? COLLATE NOCASE AND {column} < ? COLLATE NOCASE
+            ORDER BY {column} COLLATE NOCASE LIMIT ?
+        ''', (low, high, limit))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def warm_up(self) -> None:
+        """Read the words table once so its pages are in the OS cache, and cache the category list.
+        Runs on the warm-up thread, so it uses its own connection."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("SELECT COUNT(*), SUM(LENGTH(explanation_en)), SUM(LENGTH(explanation_ru)) FROM words").fetchone()
+            conn.execute("SELECT COUNT(*), SUM(state) FROM word_progress WHERE learner_id = ?", (self.learner_id,)).fetchone()
+            rows = conn.execute("SELECT DISTINCT category FROM words ORDER BY category").fetchall()
+            self._cache.setdefault('categories', [row[0] for row in rows if row[0]])
+        finally:
+            conn.close()
+
+    def save_round(self, word_states: Dict[str, int], verb_states: Dict[str, int], activity: Optional[Tuple[str, int, int]] = None) -> None:
+        """Write the outcome of a quiz round in one transaction: the new states of its words
+        and verbs and the (date, successful_words, streak) activity of the day."""
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO word_progress (learner_id, word, ask_counter, state) VALUES (?, ?, 0, ?)
+                ON CONFLICT(learner_id, word) DO UPDATE SET state = excluded.state
+            ''', [(self.learner_id, word, state) for word, state in word_states.items()])
+            self.conn.executemany('''
+                INSERT INTO verb_progress (learner_id, base_form, ask_counter, state) VALUES (?, ?, 0, ?)
+                ON CONFLICT(learner_id, base_form) DO UPDATE SET state = excluded.state
+            ''', [(self.learner_id, verb, state) for verb, state in verb_states.items()])
+            if activity:
+                self.conn.execute('''
+                    INSERT INTO learner_activity (learner_id, date, successful_words, streak) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(learner_id, date) DO UPDATE SET successful_words = excluded.successful_words, streak = excluded.streak
+                ''', (self.learner_id, *activity))
 
     def update_streak(self) -> None:
         today = datetime.date.today().isoformat()
         yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
 
-        self.cursor.execute("SELECT * FROM user_activity WHERE date = ?", (today,))
-        today_activity = self.cursor.fetchone()
-
-        self.cursor.execute("SELECT * FROM user_activity WHERE date = ?", (yesterday,))
-        yesterday_activity = self.cursor.fetchone()
+        today_activity = self.get_activity(today)
+        yesterday_activity = self.get_activity(yesterday)
 
-        yesterday_streak = 0 if not yesterday_activity else yesterday_activity[2]
+        yesterday_streak = 0 if not yesterday_activity else yesterday_activity[1]
 
         if today_activity:
-            new_successful_words = today_activity[1] + 1
-            current_streak = today_activity[2]
+            new_successful_words = today_activity[0] + 1
+            current_streak = today_activity[1]
             if new_successful_words >= self.streak_threshold:
                 if current_streak == yesterday_streak:
                     current_streak += 1
             self.cursor.execute('''
-                UPDATE user_activity 
+                UPDATE learner_activity 
                 SET successful_words = ?, streak = ?
-                WHERE date = ?
-            ''', (new_successful_words, current_streak, today))
+                WHERE learner_id = ? AND date = ?
+            ''', (new_successful_words, current_streak, self.learner_id, today))
         else:
             if yesterday_activity:
                 current_streak = yesterday_streak 
             else:
                 current_streak = 1
             self.cursor.execute('''
-                INSERT INTO user_activity (date, successful_words, streak)
-                VALUES (?, ?, ?)
-            ''', (today, 1, current_streak))
+                INSERT INTO learner_activity (learner_id, date, successful_words, streak)
+                VALUES (?, ?, ?, ?)
+            ''', (self.learner_id, today, 1, current_streak))
+
+        self.conn.commit()
+
+    def get_activity(self, date: str) -> Optional[Tuple[int, int]]:
+        """Return (successful_words, streak) for a date."""
+        self.cursor.execute("SELECT successful_words, streak FROM learner_activity WHERE learner_id = ? AND date = ?", (self.learner_id, date))
+        return self.cursor.fetchone()
 
+    def save_activity(self, date: str, successful_words: int, streak: int) -> None:
+        self.cursor.execute('''
+            INSERT INTO learner_activity (learner_id, date, successful_words, streak) VALUES (?, ?, ?, ?)
+            ON CONFLICT(learner_id, date) DO UPDATE SET successful_words = excluded.successful_words, streak = excluded.streak
+        ''', (self.learner_id, date, successful_words, streak))
         self.conn.commit()
 
     def get_streak(self) -> int:
-        today = datetime.date.today().isoformat()
-        self.cursor.execute("SELECT successful_words, streak FROM user_activity WHERE date = ?", (today,))
-        result = self.cursor.fetchone()
+        result = self.get_activity(datetime.date.today().isoformat())
         streak = result[1] if result else 0
         today_is_active = False if not result else result[0] >= self.streak_threshold
         return streak, today_is_active
     
     def get_todays_words(self) -> int:
-        today = datetime.date.today().isoformat()
-        self.cursor.execute("SELECT successful_words FROM user_activity WHERE date = ?", (today,))
-        result = self.cursor.fetchone()
+        result = self.get_activity(datetime.date.today().isoformat())
         return result[0] if result else 0
 
@@ -1,5 +1,11 @@
+import sys
+
+if "--profile-startup" in sys.argv:
+    # Start before anything else is imported so the whole import tree is measured
+    from .utils.startup import startup
+    startup.start()
+
 import typer
-from .english import WordDictionary, WordsTutor, VerbsTutor, GrammarTutor
 
 app = typer.Typer(
     name="eng",
@@ -7,35 +13,125 @@ app = typer.Typer(
     help="A command-line English language learning tool."
 )
 
+# The modes are imported inside the commands so that `eng --help` does not load them
+
 @app.command()
 def dictionary():
     """Run the dictionary application. (Default mode)"""
+    from .english.training import WordDictionary
     app = WordDictionary()
     app.run()
 
 @app.command()
 def trainer():
     """Start the training session."""
+    from .english.training import WordsTutor
     app = WordsTutor()
     app.run()
 
 @app.command()
 def verbs():
     """Run the irregular verb mode."""
+    from .english.training import VerbsTutor
     app = VerbsTutor()
     app.run()
 
 @app.command()
 def grammar():
     """Run the grammar rules mode."""
+    from .english.training import GrammarTutor
     app = GrammarTutor()
     app.run()
 
+@app.command("obsidian-sync")
+def obsidian_sync(
+    per_word: bool = typer.Option(False, "--per-word", help="Write one note per word instead of one per category."),
+    prune: bool = typer.Option(False, "--prune", help="Delete previously exported notes that are no longer in the database."),
+    workers: int = typer.Option(8, "--workers", help="Number of categories processed in parallel."),
+):
+    """Export the words database into Obsidian notes. Only changed notes are rewritten."""
+    from .english.obsidian_sync import VaultExporter
+    exporter = VaultExporter(workers=workers)
+    result = exporter.sync(per_word=per_word, prune=prune)
+    typer.echo(f"{result.written} written, {result.unchanged} unchanged, {result.removed} removed -> {exporter.sync_dir}")
+
+@app.command()
+def dedup(
+    merge: bool = typer.Option(False, "--merge", help="Merge groups into their first word, asking for each group. The other words are deleted."),
+    yes: bool = typer.Option(False, "--yes", "-y", help="With --merge, merge every group without asking."),
+):
+    """List saved words that are variants of each other ("Run", "running", "ran") and optionally merge them."""
+    from .english.word_manager import WordManager
+    manager = WordManager()
+    groups = manager.find_duplicates()
+    merged = 0
+    for keep, *duplicates in groups:
+        typer.echo(f"{keep} <- {', '.join(duplicates)}")
+        if not merge:
+            continue
+        deleted = ', '.join(f"'{word}'" for word in duplicates)
+        if yes:
+            typer.echo(f"  keeping '{keep}', deleting {deleted}")
+        elif not typer.confirm(f"  Keep '{keep}' and delete {deleted}?", default=False):
+            continue
+        manager.merge_words(keep, duplicates)
+        merged += 1
+    summary = f"{len(groups)} groups of near-duplicates found"
+    typer.echo(f"{summary}, {merged} merged" if merge else summary)
+
+pack_app = typer.Typer(help="Prebuilt read-only dictionary packs, looked up before the LLM.")
+app.add_typer(pack_app, name="pack")
+
+@pack_app.command("build")
+def pack_build(
+    output: str = typer.Option(None, "--output", "-o", help="Pack file to write. Defaults to database.pack of the config."),
+    words: str = typer.Option(None, "--words", help="Build from this word list instead of the database: JSON lines with explanations, or one word per line to explain with the LLM."),
+    workers: int = typer.Option(8, "--workers", help="Words explained in parallel for a plain word list."),
+):
+    """Build a dictionary pack from the words database or from a word list."""
+    from .english.pack import build_pack, pack_entries
+    from .config import get_pack_path
+    output = output or get_pack_path()
+    if not output:
+        raise typer.BadParameter("set database.pack in the config or give --output")
+    count = build_pack(pack_entries(words, workers), output)
+    typer.echo(f"{count} entries -> {output}")
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Address to listen on."),
+    port: int = typer.Option(8080, "--port", help="Port to listen on."),
+    llm_workers: int = typer.Option(64, "--llm-workers", help="Number of LLM streams served at the same time."),
+):
+    """Serve the dictionary and the trainers over HTTP, streaming answers as Server-Sent Events."""
+    from .english.server import run_server
+    from .utils.metrics import metrics
+    from .config import get_metrics_config
+    metrics.configure(get_metrics_config())
+    typer.echo(f"Serving on http://{host}:{port}")
+    run_server(host, port, llm_workers)
+
 @app.callback(invoke_without_command=True)
-def main(ctx: typer.Context):
+def main(
+    ctx: typer.Context,
+    profile_startup: bool = typer.Option(False, "--profile-startup", help="Print an import-time breakdown at the first prompt."),
+    record: str = typer.Option(None, "--record", help="Record every LLM and TTS stream to this trace file."),
+    replay: str = typer.Option(None, "--replay", help="Serve LLM and TTS streams from this trace file instead of the servers."),
+    replay_speed: float = typer.Option(1.0, "--replay-speed", help="Replay speed: 1 keeps the recorded timing, 0 removes all delays."),
+    profile: str = typer.Option(None, "--profile", help="Learner profile: progress and streaks are kept per profile, vocabulary is shared."),
+):
     """
     Default behavior is to run the dictionary mode.
     """
+    if profile:
+        from .config import set_profile
+        set_profile(profile)
+    if record or replay:
+        from .utils.traces import traces
+        if replay:
+            traces.start_replay(replay, replay_speed)
+        else:
+            traces.start_recording(record)
     if ctx.invoked_subcommand is None:
         dictionary()
 
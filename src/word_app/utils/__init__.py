@@ -1,5 +1,19 @@
-from .pager import MyPager
-from .voice import Voice
-from .common import Utils
-from .obsidian import Obsidian
-__all__ = ['MyPager', 'Voice', 'Utils', 'Obsidian']
\ No newline at end of file
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .pager import MyPager, ListSource, SqlSource
+    from .voice import Voice
+    from .common import Utils
+    from .obsidian import Obsidian
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MyPager': '.pager',
+    'ListSource': '.pager',
+    'SqlSource': '.pager',
+    'Voice': '.voice',
+    'Utils': '.common',
+    'Obsidian': '.obsidian',
+})
+
+__all__ = ['MyPager', 'ListSource', 'SqlSource', 'Voice', 'Utils', 'Obsidian']
@@ -1,6 +1,16 @@
 import re
+from functools import lru_cache
 
 class Utils:
     @staticmethod    
     def count_words(text):
-        return len( re.findall( r"[0-9a-zA-Z']+", text ) )
\ No newline at end of file
+        return len( re.findall( r"[0-9a-zA-Z']+", text ) )
+
+    @staticmethod
+    def regexp(pattern, value):
+        """Case-insensitive search, registered as the REGEXP function of SQLite connections."""
+        return value is not None and _compile_regexp(pattern).search(value) is not None
+
+@lru_cache(maxsize=64)
+def _compile_regexp(pattern):
+    return re.compile(pattern, re.IGNORECASE)
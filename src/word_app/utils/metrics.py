@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bounds of the latency buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Count, sum, min, max and a fixed set of cumulative-friendly buckets."""
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i-1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return max(self.min, min(self.max, value))
+            seen += count
+        return self.max
+
+class Metrics:
+    """A process-wide registry of counters, gauges and latency histograms. Every record call returns
+    immediately when the registry is disabled, so the instrumentation can stay in hot paths."""
+    def __init__(self) -> None:
+        self.enabled = True
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.export_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def configure(self, config: Dict) -> None:
+        """Apply the app.metrics config section: enabled (default true) and export (a .json or .prom file written at exit)."""
+        self.enabled = config.get('enabled', True)
+        self.export_path = config.get('export')
+        if self.enabled and self.export_path:
+            atexit.register(self.export, self.export_path)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge, a value that goes up and down such as a queue depth."""
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self.gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a latency in milliseconds."""
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000, **labels)
+
+    def stream(self, tokens: Iterable, prefix: str, unit: str = 'tokens', **labels: str) -> Iterator:
+        """Pass a token stream through, recording time to first item, total time and items per second."""
+        if not self.enabled:
+            yield from tokens
+            return
+        started = time.perf_counter()
+        first = None
+        count = 0
+        try:
+            for token in tokens:
+                if first is None:
+                    first = time.perf_counter()
+                    self.observe(f"{prefix}_ttft_ms", (first - started) * 1000, **labels)
+                count += 1
+                yield token
+        finally:
+            finished = time.perf_counter()
+            self.observe(f"{prefix}_total_ms", (finished - started) * 1000, **labels)
+            self.inc(f"{prefix}_{unit}_total", count, **labels)
+            if first is not None and count > 1 and finished > first:
+                self.observe(f"{prefix}_{unit}_per_second", (count - 1) / (finished - first), **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(key), 'value': value}
+                    for name, series in sorted(self.counters.items()) for key, value in series.items()
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(key), 'value': value}
+                    for name, series in sorted(self.gauges.items()) for key, value in series.items()
+                ],
+                'histograms': [
+                    {
+                        'name': name, 'labels': dict(key), 'count': h.count, 'sum': h.sum,
+                        'min': h.min if h.count else 0.0, 'max': h.max,
+                        'p50': h.quantile(0.5), 'p95': h.quantile(0.95), 'p99': h.quantile(0.99),
+                        'buckets': dict(zip([str(b) for b in h.buckets] + ['+Inf'], h.counts)),
+                    }
+                    for name, series in sorted(self.histograms.items()) for key, h in series.items()
+                ],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=1)
+
+    def to_prometheus(self, namespace: str = "word_app") -> str:
+        """Render the registry in the Prometheus text exposition format (for the node_exporter textfile collector)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f"{namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{self._labels(key)} {value}")
+            for name, series in sorted(self.gauges.items()):
+                metric = f"{namespace}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for key, value in series.items():
+                    lines.append(f"{metric}{self._labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip(list(h.buckets) + ['+Inf'], h.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{self._labels(key + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{metric}_sum{self._labels(key)} {h.sum}")
+                    lines.append(f"{metric}_count{self._labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the registry to path, as Prometheus text if it ends with .prom and as JSON otherwise."""
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not export metrics to {path}: {e}")
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted(labels.items())) if labels else ()
+
+    @staticmethod
+    def _labels(key: LabelKey) -> str:
+        if not key:
+            return ""
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+metrics = Metrics()
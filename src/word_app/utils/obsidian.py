@@ -1,8 +1,15 @@
 import os
+import json
 import yaml
-from typing import Dict, Optional
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
 
 from ..config import get_obsidian_config
+from .metrics import metrics
 
 header_example = """---
 tags:
@@ -22,40 +29,167 @@ url: https://quizlet.com/kz/556943745/outcomes-int_unit-2-feelings-flash-cards/?
 date: 2024-08-30
 ---"""
 
+class NoteIndex:
+    """A persisted index of the notes' front matter, keyed by file name and by category.
+    Entries are invalidated by mtime and size, so only changed notes are re-read."""
+    VERSION = 1
+
+    def __init__(self, directory: str, index_path: str, parse_header: Callable[[str], Dict]) -> None:
+        self.directory = directory
+        self.index_path = index_path
+        self.parse_header = parse_header
+        self.files: Dict[str, Dict] = {}
+        self.categories: Dict[str, str] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION and data.get('directory') == self.directory:
+            self.files = data.get('files', {})
+            self._rebuild_categories()
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        data = {'version': self.VERSION, 'directory': self.directory, 'files': self.files}
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, default=str)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+        except OSError as e:
+            logging.warning(f"Could not save the Obsidian index: {e}")
+
+    def refresh(self) -> None:
+        """Re-read the headers of new and modified notes and forget the deleted ones."""
+        with metrics.timer('obsidian_io_ms', op='refresh'):
+            self._refresh()
+
+    def _refresh(self) -> None:
+        seen = set()
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name.startswith('.'):
+                        continue
+                    seen.add(entry.name)
+                    self._update_entry(entry.name, entry.stat())
+        except OSError as e:
+            logging.warning(f"Could not scan the Obsidian folder: {e}")
+            return
+        for name in set(self.files) - seen:
+            del self.files[name]
+            self.dirty = True
+        self._rebuild_categories()
+        self.save()
+
+    def find(self, category: str) -> Optional[str]:
+        """Return the path of the note for a category, revalidating only that note."""
+        name = self.categories.get(category)
+        if name is not None:
+            path = os.path.join(self.directory, name)
+            try:
+                changed = self._update_entry(name, os.stat(path))
+            except OSError:
+                changed = True
+            if not changed:
+                return path
+        self.refresh()
+        name = self.categories.get(category)
+        return os.path.join(self.directory, name) if name is not None else None
+
+    def header(self, file_path: str) -> Dict:
+        return self.files.get(os.path.basename(file_path), {}).get('header', {})
+
+    def _update_entry(self, name: str, stat: os.stat_result) -> bool:
+        entry = self.files.get(name)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return False
+        header = self.parse_header(os.path.join(self.directory, name))
+        self.files[name] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'header': header}
+        self.dirty = True
+        return True
+
+    def _rebuild_categories(self) -> None:
+        self.categories = {}
+        for name, entry in self.files.items():
+            category = entry['header'].get('cat')
+            if category is not None:
+                self.categories.setdefault(str(category), name)
+
+class HeaderWriter:
+    """Coalesces front matter updates per note and writes them after a quiet period."""
+    def __init__(self, write: Callable[[str, Dict], bool], delay: float) -> None:
+        self.write = write
+        self.delay = delay
+        self.pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def schedule(self, file_path: str, values: Dict) -> None:
+        with self._lock:
+            self.pending.setdefault(file_path, {}).update(values)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        with self._write_lock:
+            for file_path, values in pending.items():
+                try:
+                    self.write(file_path, values)
+                except OSError as e:
+                    logging.error(f"Could not update {file_path}: {e}")
+
 class Obsidian:
     def __init__(self):
         self.config = get_obsidian_config()
         self.english_dir = self.config['english_dir']
+        self.index_path = self.config.get('index_path') or os.path.join(self.english_dir, '.word_app_index.json')
         self.file_path = ""
         self.yaml_data = {}
-
+        self.index = NoteIndex(self.english_dir, self.index_path, self.parse_yaml_header)
+        self.index.refresh()
+        self.writer = HeaderWriter(self._rewrite_header, self.config.get('flush_delay', 2.0))
+        atexit.register(self.flush)
 
     def find_file(self, category:str) -> None:
-        for file in os.listdir(self.english_dir):
-            file_path = os.path.join(self.english_dir, file)
-            data = self.parse_yaml_header(file_path)
-            if data.get('cat','') == category:
-                self.set_file_path(file_path)
-                break
+        self.flush()
+        file_path = self.index.find(category) if category is not None else None
+        if file_path:
+            self.file_path = file_path
+            self.yaml_data = dict(self.index.header(file_path))
+        else:
+            self.file_path = ""
+            self.yaml_data = {}
 
     def set_file_path(self, file_path: str) -> None:
         self.file_path = file_path
         self.yaml_data = self.parse_yaml_header(self.file_path)
 
     def _extract_yaml_content(self,filepath:str) -> Optional[str]:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
+        """Read the front matter only. The rest of the note is never loaded."""
         yaml_content = []
-        in_yaml_block = False
-        for line in lines:
-            if line.strip() == "---":
-                if not in_yaml_block:
-                    in_yaml_block = True
-                    continue
-                else:
+        with open(filepath, 'r', encoding='utf-8') as file:
+            if file.readline().strip() != "---":
+                return None
+            for line in file:
+                if line.strip() == "---":
                     break
-            if in_yaml_block:
                 yaml_content.append(line)
 
         return ''.join(yaml_content) if yaml_content else None
@@ -68,40 +202,77 @@ class Obsidian:
             return 
 
     def parse_yaml_header(self,filepath:str) -> Dict:
-        yaml_content = self._extract_yaml_content(filepath)
-        return self._parse_yaml(yaml_content) if yaml_content else {}
+        try:
+            yaml_content = self._extract_yaml_content(filepath)
+        except (OSError, UnicodeDecodeError):
+            return {}
+        data = self._parse_yaml(yaml_content) if yaml_content else {}
+        return data if isinstance(data, dict) else {}
 
     def update_state(self, score:int, status:str) -> None:
-        self.yaml_data['status'] = status
-        self.yaml_data['score'] = score
-        self.update_yaml_header(self.yaml_data)
+        """Queue a status/score update. Nothing is written if the values are unchanged."""
+        if not self.file_path:
+            return
+        values = {'status': status, 'score': score}
+        if all(self.yaml_data.get(key) == value for key, value in values.items()):
+            return
+        self.yaml_data.update(values)
+        self.writer.schedule(self.file_path, values)
+
+    def flush(self) -> None:
+        """Write all queued header updates now."""
+        self.writer.flush()
 
     def update_yaml_header(self, new_header: Dict) -> None:
-        if not os.path.exists(self.file_path):
-            print(f"Error: File does not exist: {self.file_path}")
-            return None
+        self._rewrite_header(self.file_path, new_header)
 
-        with open(self.file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+    def _rewrite_header(self, file_path: str, new_header: Dict) -> bool:
+        """Merge new values into a note's front matter and atomically replace the note.
+        The body is copied byte for byte. Returns False if nothing had to be written."""
+        with metrics.timer('obsidian_io_ms', op='write_header'):
+            return self._write_header(file_path, new_header)
 
-        # Split the content into YAML header and the rest
-        parts = content.split('---', 2)
-        if len(parts) < 3:
-            print("Error: File does not have a valid YAML header")
-            return
+    def _write_header(self, file_path: str, new_header: Dict) -> bool:
+        if not os.path.exists(file_path):
+            print(f"Error: File does not exist: {file_path}")
+            return False
 
-        # Parse the existing YAML header
-        yaml_data = self._parse_yaml(parts[1])
-        
-        # Update the YAML data with new_header
-        yaml_data.update(new_header)
-        
-        # Convert the updated YAML data back to a string
-        updated_yaml = yaml.dump(yaml_data, sort_keys=False)
-
-        # Reconstruct the file content
-        updated_content = f"---\n{updated_yaml}---\n{parts[2]}"
-
-        # Write the updated content back to the file
-        with open(self.file_path, 'w', encoding='utf-8') as file:
-            file.write(updated_content)
\ No newline at end of file
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            opening = file.readline()
+            header_lines = []
+            closing = None
+            if opening.strip() == "---":
+                for line in file:
+                    if line.strip() == "---":
+                        closing = line
+                        break
+                    header_lines.append(line)
+            if closing is None:
+                print("Error: File does not have a valid YAML header")
+                return False
+            body = file.read()
+
+        header = ''.join(header_lines)
+        yaml_data = self._parse_yaml(header) if header.strip() else {}
+        if not isinstance(yaml_data, dict):
+            # Rewriting would replace hand-edited front matter that doesn't parse
+            logging.warning(f"Not updating {file_path}: its YAML header can't be parsed")
+            return False
+        updated_data = {**yaml_data, **new_header}
+        if updated_data == yaml_data:
+            return False
+
+        updated_yaml = yaml.dump(updated_data, sort_keys=False, allow_unicode=True)
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                file.write(f"{opening}{updated_yaml}{closing}{body}")
+                file.flush()
+                os.fsync(file.fileno())
+            shutil.copymode(file_path, tmp_path)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        return True
@@ -1,39 +1,234 @@
+import io
+import re
 import curses
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
 from rich.console import Console
 from rich.panel import Panel
-from typing import List
+from typing import Callable, List, Optional, Sequence, Tuple
+
+KEYS_HINT = "q quit | f filter | j/k scroll | PgUp/PgDn page | g<letter> jump"
+FILTER_MODES = ('text', 'fuzzy', 'regex')
+
+@lru_cache(maxsize=64)
+def _compile(text: str, mode: str) -> re.Pattern:
+    if mode == 'regex':
+        return re.compile(text, re.IGNORECASE)
+    if mode == 'fuzzy':
+        return re.compile('.*?'.join(re.escape(char) for char in text.lower()))
+    return re.compile(re.escape(text.lower()))
+
+class PagerSource(ABC):
+    """Rows shown by MyPager. Implementations only materialize the rows that are on screen."""
+    # Whether filtering a filtered source by a longer text gives the same result as filtering the base
+    narrowable = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def rows(self, start: int, count: int) -> List[str]:
+        ...
+
+    @abstractmethod
+    def find(self, prefix: str, start: int = 0) -> Optional[int]:
+        """Index of the first row at or after start whose key starts with prefix."""
+
+    @abstractmethod
+    def filter(self, text: str, mode: str = 'text') -> 'PagerSource':
+        ...
+
+class ListSource(PagerSource):
+    """An in-memory list of already formatted lines. Filtered views share the lines
+    and their lowercased copies and only hold the indexes of the matching lines."""
+    narrowable = True
+
+    def __init__(self, lines: List[str], lowered: Optional[List[str]] = None, indexes: Optional[List[int]] = None) -> None:
+        self.lines = lines
+        self.lowered = lowered if lowered is not None else [line.lower() for line in lines]
+        self.indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self.lines) if self.indexes is None else len(self.indexes)
+
+    def rows(self, start: int, count: int) -> List[str]:
+        if self.indexes is None:
+            return self.lines[start:start + count]
+        return [self.lines[i] for i in self.indexes[start:start + count]]
+
+    def find(self, prefix: str, start: int = 0) -> Optional[int]:
+        prefix = prefix.lower()
+        for position in range(start, len(self)):
+            i = position if self.indexes is None else self.indexes[position]
+            if self.lowered[i].lstrip().startswith(prefix):
+                return position
+        return None
+
+    def filter(self, text: str, mode: str = 'text') -> 'ListSource':
+        search = _compile(text, mode).search
+        candidates = range(len(self.lines)) if self.indexes is None else self.indexes
+        return ListSource(self.lines, self.lowered, [i for i in candidates if search(self.lowered[i])])
+
+class SqlSource(PagerSource):
+    """Rows of a SELECT, fetched lazily in blocks of block_size. At most cache_blocks blocks are kept.
+    The keys of all rows are read once, in order_by order, so a block is a lookup of its keys
+    and the query is never sorted again; key_column must be unique."""
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        query: str,
+        params: Sequence = (),
+        order_by: str = "rowid",
+        key_column: str = "rowid",
+        search_columns: Sequence[str] = (),
+        format_row: Callable[[Tuple], str] = lambda row: "  ".join(str(value) for value in row),
+        block_size: int = 256,
+        cache_blocks: int = 4,
+        fts_table: Optional[str] = None,
+    ) -> None:
+        self.conn = conn
+        self.query = query
+        self.params = tuple(params)
+        self.order_by = order_by
+        self.key_column = key_column
+        self.search_columns = search_columns
+        self.format_row = format_row
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.fts_table = fts_table
+        self._keys: Optional[List] = None
+        self._blocks: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ordered_keys())
+
+    def _ordered_keys(self) -> List:
+        if self._keys is None:
+            cursor = self.conn.execute(f"SELECT {self.key_column} FROM ({self.query}) ORDER BY {self.order_by}", self.params)
+            self._keys = [row[0] for row in cursor]
+        return self._keys
+
+    def rows(self, start: int, count: int) -> List[str]:
+        result = []
+        end = min(start + count, len(self))
+        position = start
+        while position < end:
+            block_number, offset = divmod(position, self.block_size)
+            block = self._block(block_number)
+            taken = block[offset:offset + end - position]
+            if not taken:
+                break
+            result.extend(taken)
+            position += len(taken)
+        return result
+
+    def _block(self, number: int) -> List[str]:
+        if number in self._blocks:
+            self._blocks.move_to_end(number)
+            return self._blocks[number]
+        keys = self._ordered_keys()[number * self.block_size:(number + 1) * self.block_size]
+        rows = {}
+        if keys:
+            cursor = self.conn.execute(
+                f"SELECT {self.key_column}, * FROM ({self.query}) WHERE {self.key_column} IN ({', '.join('?' * len(keys))})",
+                (*self.params, *keys),
+            )
+            rows = {row[0]: row[1:] for row in cursor}
+        block = [self.format_row(rows[key]) for key in keys if key in rows]
+        self._blocks[number] = block
+        if len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def find(self, prefix: str, start: int = 0) -> Optional[int]:
+        prefix = prefix.lower()
+        keys = self._ordered_keys()
+        for position in range(start, len(keys)):
+            if str(keys[position]).lower().startswith(prefix):
+                return position
+        return None
+
+    def filter(self, text: str, mode: str = 'text') -> 'SqlSource':
+        """Push the filter down to SQL: FTS trigram match or LIKE for text, a LIKE chain for fuzzy and REGEXP for regex.
+        The regex mode needs Utils.regexp registered as the connection's REGEXP function."""
+        if not self.search_columns:
+            return self
+        if mode == 'text' and self.fts_table and len(text) >= 3:
+            condition = f"{self.key_column} IN (SELECT {self.key_column} FROM {self.fts_table} WHERE {self.fts_table} MATCH ?)"
+            params = ['"' + text.replace('"', '""') + '"']
+        else:
+            if mode == 'regex':
+                operator, pattern = "REGEXP ?", text
+            elif mode == 'fuzzy':
+                operator, pattern = "LIKE ? ESCAPE '\\'", '%' + '%'.join(_escape_like(char) for char in text) + '%'
+            else:
+                operator, pattern = "LIKE ? ESCAPE '\\'", f"%{_escape_like(text)}%"
+            condition = " OR ".join(f"{column} {operator}" for column in self.search_columns)
+            params = [pattern] * len(self.search_columns)
+        return SqlSource(
+            self.conn,
+            f"SELECT * FROM ({self.query}) WHERE {condition}",
+            (*self.params, *params),
+            order_by=self.order_by,
+            key_column=self.key_column,
+            search_columns=self.search_columns,
+            format_row=self.format_row,
+            block_size=self.block_size,
+            cache_blocks=self.cache_blocks,
+            fts_table=self.fts_table,
+        )
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
 class MyPager:
-    def __init__(self, header: str, lines: List[str]):
+    def __init__(self, header: str, lines: Optional[List[str]] = None, source: Optional[PagerSource] = None, separator: bool = False):
         self.header = header
-        self.lines = lines
-        self.filtered_lines = lines.copy()
+        self.source = source if source is not None else ListSource(lines or [])
+        self.filtered = self.source
+        self.separator = separator
         self.filter_mode = False
         self.filter_text = ""
+        self.match_mode = FILTER_MODES[0]
+        self.filter_error = False
+        self._filter_cache: List[Tuple[str, PagerSource]] = []
+        self._screen: List[str] = []
+        console = Console(file=io.StringIO(), record=True, width=120)
+        console.print(Panel(f"{self.header}\n\n[dim]{KEYS_HINT}[/dim]", width=console.width-1))
+        self._rendered_panel = console.export_text().strip().split('\n')
         self._update_header()
 
     def _update_header(self):
-        console = Console(record=True, width=120)
-        header_content = self.header  # Add empty line after title
+        self.rendered_header = list(self._rendered_panel)
         if self.filter_mode:
-            header_content += f"\n\nFilter: {self.filter_text}"
-        header_panel = Panel(header_content, width=console.width-1)
-        console.print(header_panel)
-        self.rendered_header = console.export_text().strip().split('\n')
+            status = "invalid pattern" if self.filter_error else f"{len(self.filtered)} rows"
+            self.rendered_header.append(f" Filter ({self.match_mode}, Tab to switch): {self.filter_text}   [{status}]")
+
+    def _rows_per_screen(self, height: int) -> int:
+        avail_height = height - len(self.rendered_header)
+        return max(1, avail_height // 2 if self.separator else avail_height)
 
     def draw_screen(self, stdscr, start_line: int) -> None:
-        stdscr.clear()
+        """Draw the header and the visible rows. Only the lines that changed since the last call are redrawn."""
         height, width = stdscr.getmaxyx()
+        lines = list(self.rendered_header)
+        for row in self.filtered.rows(start_line, self._rows_per_screen(height)):
+            lines.append(row)
+            if self.separator:
+                lines.append('-' * width)
+        lines = [line[:width-1] for line in lines[:height]]
+        lines += [''] * (height - len(lines))
 
-        for i, line in enumerate(self.rendered_header):
-            stdscr.addstr(i, 0, line[:width])
-
-        header_height = len(self.rendered_header)
-        avail_height = height - header_height
-
-        for idx, line in enumerate(self.filtered_lines[start_line:start_line+avail_height]):
-            stdscr.addstr(len(self.rendered_header) + idx, 0, line[:width-1])
-
+        for y, line in enumerate(lines):
+            if y < len(self._screen) and self._screen[y] == line:
+                continue
+            stdscr.move(y, 0)
+            stdscr.clrtoeol()
+            stdscr.addstr(y, 0, line)
+        self._screen = lines
         stdscr.refresh()
 
     def main(self, stdscr) -> None:
@@ -41,14 +236,27 @@ class MyPager:
         start_line = 0
 
         while True:
+            height, _ = stdscr.getmaxyx()
+            page = self._rows_per_screen(height)
+            last_line = max(0, len(self.filtered) - page)
+            start_line = max(0, min(start_line, last_line))
             self.draw_screen(stdscr, start_line)
             key = stdscr.getch()
 
-            if self.filter_mode:
+            if key == curses.KEY_RESIZE:
+                self._screen = []
+                stdscr.erase()
+            elif self.filter_mode:
                 if key == 27:  # ESC key
                     self.filter_mode = False
                     self.filter_text = ""
-                    self.filtered_lines = self.lines.copy()
+                    self._apply_filter()
+                    self._update_header()
+                    start_line = 0
+                elif key == 9:  # Tab
+                    self.match_mode = FILTER_MODES[(FILTER_MODES.index(self.match_mode) + 1) % len(FILTER_MODES)]
+                    self._filter_cache.clear()
+                    self._apply_filter()
                     self._update_header()
                     start_line = 0
                 elif key == curses.KEY_BACKSPACE or key == 127:
@@ -68,30 +276,55 @@ class MyPager:
                     self.filter_mode = True
                     self._update_header()
                     start_line = 0
-                elif ( key == curses.KEY_UP or key == ord('k') ) and start_line > 0:
+                elif key == curses.KEY_UP or key == ord('k'):
                     start_line -= 1
-                elif ( key == curses.KEY_DOWN or key == ord('j') ) and start_line < len(self.filtered_lines) - len(self.rendered_header) - 1:
+                elif key == curses.KEY_DOWN or key == ord('j'):
                     start_line += 1
+                elif key == curses.KEY_PPAGE or key == ord('b'):
+                    start_line -= page
+                elif key == curses.KEY_NPAGE or key == ord(' '):
+                    start_line += page
+                elif key == curses.KEY_HOME:
+                    start_line = 0
+                elif key == curses.KEY_END or key == ord('G'):
+                    start_line = last_line
+                elif key == ord('g'):
+                    letter = stdscr.getch()
+                    if 32 < letter <= 126:
+                        start_line = self._jump(chr(letter), start_line)
+
+    def _jump(self, letter: str, start_line: int) -> int:
+        """Find the next row starting with the letter, wrapping around to the top."""
+        found = self.filtered.find(letter, start_line + 1)
+        if found is None:
+            found = self.filtered.find(letter, 0)
+        return start_line if found is None else found
 
     def run(self) -> None:
         curses.wrapper(self.main)
 
     def _apply_filter(self) -> None:
+        """Filter incrementally. Results are cached per filter text, so typing narrows the
+        previous result and backspace reuses an earlier one."""
+        self.filter_error = False
+        cache = self._filter_cache
+        while cache and not self.filter_text.startswith(cache[-1][0]):
+            cache.pop()
         if not self.filter_text:
-            self.filtered_lines = self.lines.copy()
-        else:
-            filtered = []
-            i = 0
-            while i < len(self.lines):
-                line = self.lines[i]
-                if self.filter_text.lower() in line.lower():
-                    filtered.append(line)
-                    # Add separator if next line is a separator
-                    if i + 1 < len(self.lines) and self.lines[i + 1].strip().startswith('---'):
-                        filtered.append(self.lines[i + 1])
-                        i += 1  # Skip the separator in next iteration
-                i += 1
-            self.filtered_lines = filtered
+            self.filtered = self.source
+            return
+        if cache and cache[-1][0] == self.filter_text:
+            self.filtered = cache[-1][1]
+            return
+        if self.match_mode == 'regex':
+            try:
+                _compile(self.filter_text, 'regex')
+            except re.error:
+                self.filter_error = True
+                return
+        base = cache[-1][1] if cache and self.match_mode != 'regex' and self.source.narrowable else self.source
+        self.filtered = base.filter(self.filter_text, self.match_mode)
+        cache.append((self.filter_text, self.filtered))
 
 def format_with_dashes(word: str, length: int) -> str:
     return f"{word:<{length}}".replace(" ", "-")
@@ -0,0 +1,69 @@
+import sys
+import time
+import atexit
+import builtins
+from importlib.util import resolve_name
+from typing import Dict, List, Tuple
+
+class StartupProfiler:
+    """Times first-time imports by wrapping builtins.__import__. Used by --profile-startup."""
+    def __init__(self) -> None:
+        self.enabled = False
+        self.reported = False
+        self.started = 0.0
+        self.records: List[Tuple[str, float, float]] = []  # (module, cumulative, self) in seconds
+        self._stack: List[List] = []
+        self._original_import = builtins.__import__
+
+    def start(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.perf_counter()
+        builtins.__import__ = self._import
+        atexit.register(self.report)
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        try:
+            module_name = resolve_name('.' * level + name, (globals or {}).get('__package__')) if level else name
+        except (ImportError, ValueError):
+            module_name = name
+        if module_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        frame = [module_name, time.perf_counter(), 0.0]  # name, start, time spent in nested imports
+        self._stack.append(frame)
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._stack.pop()
+            cumulative = time.perf_counter() - frame[1]
+            self.records.append((module_name, cumulative, cumulative - frame[2]))
+            if self._stack:
+                self._stack[-1][2] += cumulative
+
+    def report(self, limit: int = 25) -> None:
+        """Print the slowest imports once, at the first prompt or at exit."""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        elapsed = time.perf_counter() - self.started
+        builtins.__import__ = self._original_import
+
+        packages: Dict[str, float] = {}
+        for name, _, own in self.records:
+            top = name.split('.')[0]
+            packages[top] = packages.get(top, 0.0) + own
+        total = sum(packages.values())
+
+        out = sys.stderr
+        print(f"\nStartup profile: ready after {elapsed * 1000:.1f} ms, {total * 1000:.1f} ms in imports", file=out)
+        print(f"{'cumulative':>11} {'self':>8}  module", file=out)
+        for name, cumulative, own in sorted(self.records, key=lambda r: r[1], reverse=True)[:limit]:
+            print(f"{cumulative * 1000:>9.1f}ms {own * 1000:>6.1f}ms  {name}", file=out)
+        print(f"\n{'self':>11}  package", file=out)
+        for name, own in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:10]:
+            print(f"{own * 1000:>9.1f}ms  {name}", file=out)
+        print(file=out)
+
+startup = StartupProfiler()
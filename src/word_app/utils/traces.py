@@ -0,0 +1,118 @@
+import json
+import time
+import dataclasses
+import base64
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+
+class TraceStore:
+    """Records LLM and TTS streams to a JSONL trace file, or serves them back from one.
+
+    Each line holds one stream: its kind ('llm' or 'tts'), the request, and the chunks with the
+    delay before each of them, the first delay being the time to first chunk. On replay a stream
+    is matched by its request; if that request was never recorded, the next unused stream of the
+    same kind is served, so a session can be replayed even when the prompts differ slightly.
+    speed scales the recorded delays: 1 plays them as recorded, 2 twice as fast, 0 without any delay."""
+    def __init__(self) -> None:
+        self.mode = OFF
+        self.path: Optional[str] = None
+        self.speed = 1.0
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Deque[Dict]] = {}
+        self._by_kind: Dict[str, Deque[Dict]] = {}
+
+    def start_recording(self, path: str) -> None:
+        self.mode, self.path = RECORD, path
+        open(path, 'a', encoding='utf-8').close()
+
+    def start_replay(self, path: str, speed: float = 1.0) -> None:
+        self.mode, self.path, self.speed = REPLAY, path, speed
+        self._by_key.clear()
+        self._by_kind.clear()
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    self._add(json.loads(line))
+
+    def stream(self, kind: str, request: Dict, start: Callable[[], Iterable]) -> Iterator:
+        """The chunks of a stream. start() opens the real stream; it is not called on replay."""
+        if self.mode == REPLAY:
+            return self._replay(kind, request)
+        if self.mode == RECORD:
+            return self._record(kind, request, start())
+        return iter(start())
+
+    def _record(self, kind: str, request: Dict, chunks: Iterable) -> Iterator:
+        entry = {'kind': kind, 'key': self._key(kind, request), 'request': request, 'chunks': []}
+        last = time.perf_counter()
+        try:
+            for chunk in chunks:
+                now = time.perf_counter()
+                entry['chunks'].append([round(now - last, 6), self._encode(chunk)])
+                last = now
+                yield chunk
+        finally:
+            self._write(entry)
+
+    def _replay(self, kind: str, request: Dict) -> Iterator:
+        entry = self._take(kind, self._key(kind, request))
+        if entry is None:
+            raise LookupError(f"No recorded {kind} stream left in {self.path}")
+        for delay, data in entry['chunks']:
+            if self.speed > 0 and delay > 0:
+                time.sleep(delay / self.speed)
+            yield self._decode(data)
+
+    def _add(self, entry: Dict) -> None:
+        entry['used'] = False
+        self._by_key.setdefault(entry['key'], deque()).append(entry)
+        self._by_kind.setdefault(entry['kind'], deque()).append(entry)
+
+    def _take(self, kind: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            for queue in (self._by_key.get(key), self._by_kind.get(kind)):
+                while queue:
+                    entry = queue.popleft()
+                    if not entry['used']:
+                        entry['used'] = True
+                        return entry
+        return None
+
+    def _write(self, entry: Dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(line + "\n")
+            except OSError as e:
+                logging.warning(f"Could not write the trace: {e}")
+
+    @staticmethod
+    def _key(kind: str, request: Dict) -> str:
+        data = json.dumps([kind, request], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _encode(chunk):
+        if isinstance(chunk, (bytes, bytearray)):
+            return {'b64': base64.b64encode(chunk).decode('ascii')}
+        if dataclasses.is_dataclass(chunk):
+            return dataclasses.asdict(chunk)
+        if hasattr(chunk, 'model_dump'):
+            return chunk.model_dump()
+        return chunk
+
+    @staticmethod
+    def _decode(data):
+        if isinstance(data, dict) and set(data) == {'b64'}:
+            return base64.b64decode(data['b64'])
+        return data
+
+traces = TraceStore()
@@ -1,16 +1,84 @@
 import re
-import openai
 import io
 import logging
-import pygame
 import threading
 import random
+import time
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from ..config import get_voice_config
+from .metrics import metrics
+from .traces import traces
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+# Lower values are played first
+PRIORITY_FEEDBACK = 0
+PRIORITY_OUTPUT = 1
+
+@dataclass(order=True)
+class Utterance:
+    priority: int
+    seq: int
+    text: str = field(compare=False)
+    created: float = field(compare=False, default_factory=time.perf_counter)
+    cancelled: threading.Event = field(compare=False, default_factory=threading.Event)
+
+class RingBuffer:
+    """A fixed-size byte ring buffer between the TTS reader and the audio callback."""
+    def __init__(self, capacity: int) -> None:
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: bytes, should_stop: Callable[[], bool] = lambda: False) -> None:
+        """Append data, blocking while the buffer is full until the reader catches up."""
+        view = memoryview(data)
+        while view:
+            with self._cond:
+                while self._size == self._capacity and not self.closed:
+                    if should_stop():
+                        return
+                    self._cond.wait(0.05)
+                if self.closed:
+                    return
+                end = (self._start + self._size) % self._capacity
+                count = min(len(view), self._capacity - self._size, self._capacity - end)
+                self._buffer[end:end + count] = view[:count]
+                self._size += count
+                view = view[count:]
+
+    def read(self, size: int, align: int = 1) -> bytes:
+        """Take up to size bytes without blocking. The result length is a multiple of align."""
+        with self._cond:
+            count = min(size, self._size)
+            count -= count % align
+            first = min(count, self._capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + first])
+            data += bytes(self._buffer[:count - first])
+            self._start = (self._start + count) % self._capacity
+            self._size -= count
+            self._cond.notify_all()
+            return data
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
 
 class Voice:
     BASE_URL = "http://localhost:8000/v1"
     API_KEY = "sk-111111111"
     CHUNK_SIZE = 8192
+    POLL_INTERVAL = 0.01
 
     def __init__(self):
         config = self._get_config()
@@ -21,14 +89,40 @@ class Voice:
         self.voice = ''
         self.model = config['model']
         self.sample_rate = config['audio']['sample_rate']
+        # The raw pcm format of OpenAI-compatible TTS is 24 kHz 16-bit mono, whatever pygame runs at
+        self.pcm_sample_rate = config['audio'].get('pcm_sample_rate', 24000)
         self.buffer_size = config['audio']['buffer_size']
         self.chunk_size = config['audio']['stream_chunk_size']
-        self.stop_playback = False
+        self.audio_format = config['audio'].get('format', 'pcm')
+        self.jitter_buffer_ms = config['audio'].get('jitter_buffer_ms', 200)
+        self.ring_buffer_ms = config['audio'].get('ring_buffer_ms', 2000)
+        self.queue_size = config['audio'].get('queue_size', 8)
+        import openai
         self.client = openai.OpenAI(
             api_key=api_key,
             base_url=base_url
         )
 
+        self._queue: List[Utterance] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._current: Optional[Utterance] = None
+        self._worker: Optional[threading.Thread] = None
+        self._ring: Optional[RingBuffer] = None
+        self._output = None
+        self._mixer_ready = False
+        self._playback_started = 0.0
+        self._device_lock = threading.Lock()  # the warm-up thread and the worker may open the device concurrently
+        self.stats = {
+            'started': 0,
+            'played': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'queue_wait_ms': 0.0,
+            'first_audio_ms': 0.0,
+            'last_first_audio_ms': 0.0,
+        }
+
     def _get_config(self):
         return get_voice_config()
 
@@ -40,13 +134,94 @@ class Voice:
         elif not self.voice:
             self.voice = self.voice_mode
 
-    def play_audio(self, audio_data: bytes) -> None:
-        pygame.mixer.init(frequency=self.sample_rate, buffer=self.buffer_size)
+    def warm_up(self) -> None:
+        """Open the audio device and a keep-alive connection to the TTS server before the first phrase."""
+        if self.audio_format == 'pcm':
+            self._ensure_output()
+        else:
+            self._ensure_mixer()
+        try:
+            self.client.models.list()
+        except Exception as e:
+            # Some TTS servers have no /models endpoint; the connection is pooled anyway
+            logging.debug(f"TTS server warm-up: {e}")
+
+    def _ensure_output(self) -> None:
+        """Open the output device once. It stays open for the lifetime of the worker."""
+        with self._device_lock:
+            if self._output is None:
+                self._open_output()
+
+    def _open_output(self) -> None:
+        import sounddevice as sd
+
+        def callback(outdata, frames, time_info, status) -> None:
+            ring = self._ring
+            data = ring.read(len(outdata), align=SAMPLE_WIDTH) if ring else b''
+            outdata[:len(data)] = data
+            outdata[len(data):] = b'\x00' * (len(outdata) - len(data))
+
+        self._output = sd.RawOutputStream(
+            samplerate=self.pcm_sample_rate,
+            blocksize=self.buffer_size,
+            channels=1,
+            dtype='int16',
+            callback=callback,
+        )
+        self._output.start()
+
+    def play_stream(self, audio_stream: Iterable[bytes], utterance: Utterance) -> None:
+        """Play raw 16-bit mono PCM chunks as they arrive from the TTS server."""
+        self._ensure_output()
+        ring = RingBuffer(self._ms_to_bytes(self.ring_buffer_ms))
+        jitter_bytes = self._ms_to_bytes(self.jitter_buffer_ms)
+        cancelled = utterance.cancelled
+        try:
+            for chunk in audio_stream:
+                if cancelled.is_set():
+                    return
+                ring.write(chunk, cancelled.is_set)
+                if self._ring is None and len(ring) >= jitter_bytes:
+                    self._start_playback(ring, utterance)
+            ring.close()
+            if self._ring is None and len(ring):
+                self._start_playback(ring, utterance)
+            while len(ring) and not cancelled.wait(self.POLL_INTERVAL):
+                pass
+        finally:
+            ring.close()
+            if self._ring is ring:
+                metrics.observe('tts_playback_ms', (time.perf_counter() - self._playback_started) * 1000, format=self.audio_format)
+            self._ring = None
+
+    def _start_playback(self, ring: RingBuffer, utterance: Utterance) -> None:
+        self._ring = ring
+        self._playback_started = time.perf_counter()
+        first_audio_ms = (self._playback_started - utterance.created) * 1000
+        metrics.observe('tts_first_audio_ms', first_audio_ms, format=self.audio_format)
+        self.stats['last_first_audio_ms'] = first_audio_ms
+        self.stats['first_audio_ms'] += first_audio_ms
+        logging.debug(f"Started audio playback after {first_audio_ms:.0f} ms")
+
+    def _ms_to_bytes(self, ms: int) -> int:
+        return int(self.pcm_sample_rate * ms / 1000) * SAMPLE_WIDTH
+
+    def _ensure_mixer(self) -> None:
+        with self._device_lock:
+            if not self._mixer_ready:
+                import pygame
+                pygame.mixer.init(frequency=self.sample_rate, buffer=self.buffer_size)
+                self._mixer_ready = True
+
+    def play_audio(self, audio_data: bytes, utterance: Utterance) -> None:
+        import pygame
+        self._ensure_mixer()
         sound = pygame.mixer.Sound(io.BytesIO(audio_data))
-        channel = sound.play()
-        while channel.get_busy() and not self.stop_playback:
-            pygame.time.wait(1000)
-        channel.stop()
+        with metrics.timer('tts_playback_ms', format=self.audio_format):
+            channel = sound.play()
+            while channel.get_busy() and not utterance.cancelled.wait(self.POLL_INTERVAL):
+                pass
+            channel.stop()
 
     def cleanup_text(self, text):
         # Заменяем переносы строк на пробелы, добавляя точку, если перед переносом не было точки
@@ -63,34 +238,102 @@ class Voice:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
     
-    def speak(self, text:str) -> None:
-        self.stop_playback = False
+    def speak(self, text:str, priority: int = PRIORITY_OUTPUT) -> None:
+        """Queue a phrase. A newer phrase of the same priority supersedes the queued and playing ones."""
         phrase = self.cleanup_text(text)
-        voice = threading.Thread(target=self._speak,args=(phrase,))
-        voice.start()
+        if not phrase:
+            return
+        utterance = Utterance(priority, next(self._seq), phrase)
+        with self._cond:
+            self._ensure_worker()
+            superseded = [u for u in self._queue if u.priority == priority]
+            if superseded:
+                self._queue = [u for u in self._queue if u.priority != priority]
+                heapq.heapify(self._queue)
+                self.stats['coalesced'] += len(superseded)
+                metrics.inc('tts_coalesced_total', len(superseded))
+            if self._current and self._current.priority == priority:
+                self._current.cancelled.set()
+                self.stats['coalesced'] += 1
+                metrics.inc('tts_coalesced_total')
+            heapq.heappush(self._queue, utterance)
+            if len(self._queue) > self.queue_size:
+                self._queue.remove(max(self._queue))
+                heapq.heapify(self._queue)
+                self.stats['dropped'] += 1
+                metrics.inc('tts_dropped_total')
+            self._cond.notify()
     
     def stop_speaking(self):
-        self.stop_playback = True
+        with self._cond:
+            self._queue.clear()
+            if self._current:
+                self._current.cancelled.set()
 
-    def _speak(self, text:str) -> None:
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def metrics(self) -> Dict:
+        started = max(1, self.stats['started'])
+        played = max(1, self.stats['played'])
+        return {
+            'queue_depth': self.queue_depth(),
+            'played': self.stats['played'],
+            'dropped': self.stats['dropped'],
+            'coalesced': self.stats['coalesced'],
+            'avg_queue_wait_ms': self.stats['queue_wait_ms'] / started,
+            'avg_first_audio_ms': self.stats['first_audio_ms'] / played,
+            'last_first_audio_ms': self.stats['last_first_audio_ms'],
+        }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="voice-worker", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        """The audio worker. Plays queued utterances one at a time, highest priority first."""
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                utterance = heapq.heappop(self._queue)
+                self._current = utterance
+            self.stats['started'] += 1
+            self.stats['queue_wait_ms'] += (time.perf_counter() - utterance.created) * 1000
+            self._speak(utterance)
+            with self._cond:
+                self._current = None
+
+    def _speak(self, utterance: Utterance) -> None:
         try:
-            logging.debug("Sending text to TTS server")
             self.pick_voice()
-            with self.client.audio.speech.with_streaming_response.create(
-                model=self.model,
-                voice=self.voice,
-                input=text
-            ) as response:
-                logging.debug("Received response from TTS server")
-                audio_stream = response.iter_bytes(chunk_size=self.chunk_size)
-                
+            request = {'model': self.model, 'voice': self.voice, 'input': utterance.text, 'format': self.audio_format}
+            chunks = traces.stream('tts', request, lambda: self._synthesize(utterance.text))
+            audio_stream = metrics.stream(chunks, 'tts', unit='chunks', format=self.audio_format)
+
+            if self.audio_format == 'pcm':
+                self.play_stream(audio_stream, utterance)
+            else:
+                # Compressed formats have to be decoded as a whole by pygame
                 audio_data = b''.join(audio_stream)
-                
                 logging.debug(f"Audio data size: {len(audio_data)} bytes")
-                
-                if not self.stop_playback:
-                    self.play_audio(audio_data)
-                
-                logging.debug("Finished playing audio")
+                if not utterance.cancelled.is_set():
+                    self.play_audio(audio_data, utterance)
+
+            self.stats['played'] += 1
+            logging.debug("Finished playing audio")
         except Exception as e:
             logging.error(f"Error occurred while processing text: {str(e)}")
+
+    def _synthesize(self, text: str) -> Iterator[bytes]:
+        """Stream the audio of a phrase from the TTS server."""
+        logging.debug("Sending text to TTS server")
+        with self.client.audio.speech.with_streaming_response.create(
+            model=self.model,
+            voice=self.voice,
+            input=text,
+            response_format=self.audio_format
+        ) as response:
+            logging.debug("Received response from TTS server")
+            yield from response.iter_bytes(chunk_size=self.chunk_size)
@@ -0,0 +1,64 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+class Warmup:
+    """Runs slow initialization steps on background threads while the first prompt waits for input.
+    Each step has its own thread, so a slow server doesn't hold up the others. A failed step is only reported; the code that needs it will retry on first use."""
+    def __init__(self) -> None:
+        self.steps: List[Tuple[str, Callable[[], None]]] = []
+        self.status: Dict[str, Dict] = {}
+        self._threads: List[threading.Thread] = []
+
+    def add(self, name: str, step: Callable[[], None]) -> None:
+        self.steps.append((name, step))
+        self.status[name] = {'state': PENDING, 'ms': 0.0, 'error': ''}
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        for name, step in self.steps:
+            thread = threading.Thread(target=self._run, args=(name, step), name=f"warmup-{name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self, name: str, step: Callable[[], None]) -> None:
+        entry = self.status[name]
+        entry['state'] = RUNNING
+        started = time.perf_counter()
+        try:
+            step()
+            entry['state'] = DONE
+        except Exception as e:
+            entry['state'] = FAILED
+            entry['error'] = str(e)
+            logging.debug(f"Warm-up step '{name}' failed: {e}")
+        entry['ms'] = (time.perf_counter() - started) * 1000
+
+    @property
+    def running(self) -> bool:
+        if not self._threads:
+            return False
+        return any(entry['state'] in (PENDING, RUNNING) for entry in self.status.values())
+
+    def join(self, timeout: float = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def summary(self) -> str:
+        """One line per step, e.g. 'llm: done in 412 ms'."""
+        lines = []
+        for name, entry in self.status.items():
+            line = f"{name}: {entry['state']}"
+            if entry['state'] in (DONE, FAILED):
+                line += f" in {entry['ms']:.0f} ms"
+            if entry['error']:
+                line += f" ({entry['error']})"
+            lines.append(line)
+        return "\n".join(lines)
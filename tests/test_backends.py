@@ -0,0 +1,76 @@
+import time
+import threading
+import pytest
+from word_app.english.backends import BackendPool, BackendUnavailable
+from word_app.english.stream import StreamChunk
+from test_stream import make_backend
+
+def answer(text, delay=0.0, error=None):
+    def call(backend):
+        time.sleep(delay)
+        if error:
+            raise error
+        for word in text.split():
+            yield StreamChunk(word)
+    return call
+
+def test_a_stalled_primary_is_hedged_and_loses():
+    primary, secondary = make_backend(True, name='local'), make_backend(True, name='cloud')
+    pool = BackendPool([primary, secondary], hedging={'after_ms': 50})
+    calls = {'local': answer("slow answer", delay=1.0), 'cloud': answer("fast answer")}
+
+    started = time.monotonic()
+    chunks = list(pool.stream('grader', lambda backend: calls[backend.name](backend)))
+    assert [chunk.text for chunk in chunks] == ["fast", "answer"]
+    assert time.monotonic() - started < 0.5
+    assert primary.health.strikes == 1
+    assert secondary.health.ttft['grader'].count == 1
+
+def test_a_failing_backend_is_replaced_and_demoted():
+    primary, secondary = make_backend(True, name='local'), make_backend(True, name='cloud')
+    pool = BackendPool([primary, secondary], hedging={'enabled': False})
+    primary.health.max_strikes = 1
+    calls = {'local': answer("", error=ConnectionError("refused")), 'cloud': answer("from cloud")}
+
+    chunks = list(pool.stream('explain', lambda backend: calls[backend.name](backend)))
+    assert [chunk.text for chunk in chunks] == ["from", "cloud"]
+    assert primary.health.demoted
+    assert pool.primary is secondary
+
+def test_first_token_timeout_bounds_a_stalled_backend():
+    pool = BackendPool([make_backend(False)], timeouts={'default': 100})
+    started = time.monotonic()
+    with pytest.raises(BackendUnavailable):
+        list(pool.stream('explain', answer("late", delay=1.0)))
+    assert time.monotonic() - started < 0.5
+
+def test_first_token_timeout_starts_when_the_request_is_dispatched():
+    backend = make_backend(False)
+    backend.scheduler.max_concurrency = 1
+    backend.scheduler.limit = 1.0
+    admitted = backend.scheduler.acquire()
+    threading.Timer(0.3, backend.scheduler.release, args=(admitted, 1.0)).start()
+    pool = BackendPool([backend], timeouts={'default': 200})
+    assert [chunk.text for chunk in pool.stream('explain', answer("queued answer"))] == ["queued", "answer"]
+
+def test_a_hedge_still_queued_is_not_sent_after_losing():
+    primary, secondary = make_backend(True, name='local'), make_backend(True, name='cloud')
+    secondary.scheduler.max_concurrency = 1
+    secondary.scheduler.limit = 1.0
+    admitted = secondary.scheduler.acquire()
+    sent = []
+    def call(backend):
+        sent.append(backend.name)
+        return answer("slow answer", delay=0.2)(backend) if backend.name == 'local' else answer("hedge")(backend)
+    pool = BackendPool([primary, secondary], hedging={'after_ms': 50})
+
+    assert [chunk.text for chunk in pool.stream('grader', call)] == ["slow", "answer"]
+    secondary.scheduler.release(admitted, 1.0)
+    time.sleep(0.1)
+    assert sent == ['local']
+
+def test_single_backend_without_timeout_streams_directly():
+    pool = BackendPool([make_backend(False)], timeouts={'default': 0})
+    assert pool.stream('explain', answer("direct")).__qualname__ == 'BackendScheduler.run'
+    pool.timeouts = {'default': 100}
+    assert pool.stream('explain', answer("raced")).__qualname__ == 'BackendPool._race'
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import pytest
+import word_app
+import word_app.english
+import word_app.utils
+
+@pytest.mark.parametrize("package", [word_app, word_app.english, word_app.utils])
+def test_exports_are_listed_and_resolve(package):
+    assert set(package.__all__) <= set(dir(package))
+    for name in package.__all__:
+        assert getattr(package, name).__name__ == name
+    with pytest.raises(AttributeError, match="no attribute 'missing'"):
+        package.missing
+
+def test_submodules_are_imported_on_first_access():
+    code = (
+        "import sys, word_app.english as english\n"
+        "assert 'word_app.english.llm' not in sys.modules\n"
+        "assert 'Teacher' in dir(english)\n"
+        "english.Teacher\n"
+        "assert 'word_app.english.llm' in sys.modules\n"
+    )
+    src = os.path.dirname(os.path.dirname(word_app.__file__))
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, 'PYTHONPATH': src})
@@ -0,0 +1,43 @@
+from word_app.utils.metrics import Metrics, Histogram
+
+def test_histogram_quantiles_stay_within_observed_range():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert 25 <= histogram.quantile(0.5) <= 100
+    assert histogram.quantile(0.99) <= 100
+    assert histogram.quantile(0.0) >= 1
+
+def test_stream_records_ttft_total_and_token_count():
+    registry = Metrics()
+    tokens = list(registry.stream(iter(["a", "b", "c"]), 'llm', task='explain'))
+    assert tokens == ["a", "b", "c"]
+    snapshot = registry.snapshot()
+    names = {h['name'] for h in snapshot['histograms']}
+    assert {'llm_ttft_ms', 'llm_total_ms', 'llm_tokens_per_second'} <= names
+    assert snapshot['counters'] == [{'name': 'llm_tokens_total', 'labels': {'task': 'explain'}, 'value': 3}]
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    registry.enabled = False
+    with registry.timer('db_statement_ms', op='SELECT'):
+        pass
+    registry.inc('tts_dropped_total')
+    assert list(registry.stream(iter([1, 2]), 'llm')) == [1, 2]
+    registry.set('llm_queue_depth', 3)
+    assert registry.snapshot() == {'counters': [], 'gauges': [], 'histograms': []}
+
+def test_prometheus_export_has_cumulative_buckets(tmp_path):
+    registry = Metrics()
+    registry.observe('db_statement_ms', 3, op='SELECT', table='words')
+    registry.observe('db_statement_ms', 30, op='SELECT', table='words')
+    text = registry.to_prometheus()
+    assert '# TYPE word_app_db_statement_ms histogram' in text
+    assert 'word_app_db_statement_ms_bucket{op="SELECT",table="words",le="5"} 1' in text
+    assert 'word_app_db_statement_ms_bucket{op="SELECT",table="words",le="+Inf"} 2' in text
+    assert 'word_app_db_statement_ms_count{op="SELECT",table="words"} 2' in text
+
+    path = tmp_path / "metrics.prom"
+    registry.export(str(path))
+    assert path.read_text() == text
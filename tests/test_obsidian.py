@@ -0,0 +1,81 @@
+import os
+import pytest
+from unittest.mock import patch
+from word_app.utils.obsidian import Obsidian
+
+NOTE = """---
+tags:
+  - english
+cat: {cat}
+status: new
+score: 0
+---
+| word | translation |
+"""
+
+def write_note(path, cat):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(NOTE.format(cat=cat))
+
+@pytest.fixture
+def vault(tmp_path):
+    write_note(tmp_path / "unit1.md", "intu1")
+    write_note(tmp_path / "unit2.md", "intu2")
+    return tmp_path
+
+def make_obsidian(vault):
+    with patch('word_app.utils.obsidian.get_obsidian_config', return_value={'english_dir': str(vault)}):
+        return Obsidian()
+
+def test_find_file_uses_index(vault):
+    obsidian = make_obsidian(vault)
+    with patch.object(obsidian.index, 'parse_header', side_effect=AssertionError("unexpected read")):
+        obsidian.find_file("intu2")
+    assert obsidian.file_path == os.path.join(str(vault), "unit2.md")
+    assert obsidian.yaml_data['status'] == "new"
+
+def test_index_is_persisted_and_reused(vault):
+    make_obsidian(vault)
+    assert (vault / ".word_app_index.json").exists()
+    obsidian = make_obsidian(vault)
+    assert obsidian.index.dirty is False
+    assert obsidian.index.categories == {"intu1": "unit1.md", "intu2": "unit2.md"}
+
+def test_index_picks_up_changed_and_new_notes(vault):
+    obsidian = make_obsidian(vault)
+    write_note(vault / "unit1.md", "intu1-renamed")
+    write_note(vault / "unit3.md", "intu3")
+    obsidian.find_file("intu3")
+    assert obsidian.file_path.endswith("unit3.md")
+    obsidian.find_file("intu1")
+    assert obsidian.file_path == ""
+    assert "intu1-renamed" in obsidian.index.categories
+
+def test_update_state_is_coalesced_until_flush(vault):
+    obsidian = make_obsidian(vault)
+    obsidian.find_file("intu1")
+    obsidian.update_state(score=2.5, status="learning")
+    obsidian.update_state(score=3.5, status="familiar")
+    assert "status: new" in (vault / "unit1.md").read_text(encoding='utf-8')
+    with patch.object(obsidian, '_rewrite_header', wraps=obsidian._rewrite_header) as rewrite:
+        obsidian.writer.write = rewrite
+        obsidian.flush()
+    rewrite.assert_called_once()
+    content = (vault / "unit1.md").read_text(encoding='utf-8')
+    assert "status: familiar" in content
+    assert "score: 3.5" in content
+    assert content.endswith("---\n| word | translation |\n")
+
+def test_unchanged_state_is_not_written(vault):
+    obsidian = make_obsidian(vault)
+    obsidian.find_file("intu1")
+    obsidian.update_state(score=0, status="new")
+    assert obsidian.writer.pending == {}
+    assert obsidian._rewrite_header(obsidian.file_path, {'status': 'new'}) is False
+
+def test_unparsable_header_is_left_alone(vault):
+    obsidian = make_obsidian(vault)
+    broken = "---\ntags: [english\ncat: intu1\n---\n| word | translation |\n"
+    (vault / "unit1.md").write_text(broken, encoding='utf-8')
+    assert obsidian._rewrite_header(str(vault / "unit1.md"), {'status': 'learning'}) is False
+    assert (vault / "unit1.md").read_text(encoding='utf-8') == broken
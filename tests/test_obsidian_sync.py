@@ -0,0 +1,48 @@
+import os
+from unittest.mock import MagicMock
+from word_app.english.word_manager import Word
+from word_app.english.obsidian_sync import VaultExporter
+
+def make_exporter(tmp_path, words):
+    manager = MagicMock()
+    manager.fetch_words.return_value = words
+    return VaultExporter(manager=manager, sync_dir=str(tmp_path), workers=2)
+
+WORDS = [
+    Word("cat", "animals", "A small pet", "Кошка", 1, 2),
+    Word("dog", "animals", "A loyal pet", "Собака", 3, 4),
+    Word("run", "", "To move fast", "Бежать", 1, 0),
+]
+
+def test_sync_writes_one_note_per_category(tmp_path):
+    result = make_exporter(tmp_path, WORDS).sync()
+    assert result.written == 2
+    note = (tmp_path / "animals.md").read_text(encoding='utf-8')
+    assert "cat: animals" in note
+    assert "status: familiar" in note
+    assert "| dog | understood | 3 |" in note
+    assert (tmp_path / "Uncategorized.md").exists()
+
+def test_sync_rewrites_only_changed_notes(tmp_path):
+    make_exporter(tmp_path, WORDS).sync()
+    mtime = os.stat(tmp_path / "Uncategorized.md").st_mtime_ns
+    changed = [Word("cat", "animals", "A small pet", "Кошка", 2, 3), *WORDS[1:]]
+    result = make_exporter(tmp_path, changed).sync()
+    assert (result.written, result.unchanged) == (1, 1)
+    assert os.stat(tmp_path / "Uncategorized.md").st_mtime_ns == mtime
+
+def test_sync_per_word_and_prune(tmp_path):
+    make_exporter(tmp_path, WORDS).sync(per_word=True)
+    assert (tmp_path / "animals" / "cat.md").exists()
+    result = make_exporter(tmp_path, WORDS[:1]).sync(per_word=True, prune=True)
+    assert result.removed == 2
+    assert not (tmp_path / "animals" / "dog.md").exists()
+
+def test_names_that_share_a_file_name_get_their_own_notes(tmp_path):
+    words = [Word("a/b", "x", "", "", 0, 0), Word("a:b", "x", "", "", 0, 0), Word("Run", "", "", "", 0, 0),
+             Word("walk", "Uncategorized", "", "", 0, 0)]
+    exporter = make_exporter(tmp_path, words)
+    assert exporter.sync(per_word=True).written == 4
+    assert len(list((tmp_path / "x").glob("*.md"))) == 2
+    assert exporter.sync().written == 3
+    assert len(list(tmp_path.glob("Uncategorized*.md"))) == 2
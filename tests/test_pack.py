@@ -0,0 +1,81 @@
+import json
+import pytest
+from word_app.english.pack import DictionaryPack, build_pack, open_pack, pack_entries
+
+ENTRIES = [
+    ("run", "verbs", "to move fast on foot", "бежать"),
+    ("well-being", "", "the state of being healthy and happy", "благополучие"),
+    ("apple", "food", "a round fruit", "яблоко"),
+    ("Run", "", "a period of running", "пробежка"),
+]
+
+@pytest.fixture
+def pack(tmp_path):
+    path = str(tmp_path / "base.pack")
+    assert build_pack(ENTRIES, path) == 4
+    pack = DictionaryPack(path)
+    yield pack
+    pack.close()
+
+def test_exact_lookup(pack):
+    word = pack.lookup("apple")
+    assert (word.word, word.category, word.explanation_ru, word.state) == ("apple", "food", "яблоко", 0)
+
+def test_spelling_variant_lookup(pack):
+    assert pack.lookup("run").word == "run"
+    assert pack.lookup("Run").word == "Run"
+    assert pack.lookup("RUN").word == "Run"
+    assert pack.lookup("  Well Being! ").word == "well-being"
+
+def test_other_forms_are_not_answered(tmp_path):
+    path = str(tmp_path / "base.pack")
+    build_pack([("care", "", "to feel concern", "заботиться"), ("run", "", "to move fast", "бежать")], path)
+    pack = DictionaryPack(path)
+    assert pack.lookup("car") is None
+    assert pack.lookup("running") is None
+    assert pack.lookup("ran") is None
+    pack.close()
+
+def test_miss(pack):
+    assert pack.lookup("banana") is None
+    assert pack.lookup("!!") is None
+
+def test_empty_pack(tmp_path):
+    path = str(tmp_path / "empty.pack")
+    assert build_pack([], path) == 0
+    pack = DictionaryPack(path)
+    assert len(pack) == 0
+    assert pack.lookup("apple") is None
+    pack.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_bytes(b"not a pack, just some text of a similar length to a header")
+    with pytest.raises(ValueError):
+        DictionaryPack(str(path))
+
+def test_truncated_packs_are_skipped(tmp_path):
+    path = tmp_path / "base.pack"
+    build_pack(ENTRIES, str(path))
+    data = path.read_bytes()
+    for size in (10, len(data) - 5):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            DictionaryPack(str(path))
+        assert open_pack(str(path)) is None
+
+def test_packs_of_another_version_are_skipped(tmp_path):
+    path = tmp_path / "old.pack"
+    build_pack(ENTRIES, str(path))
+    data = bytearray(path.read_bytes())
+    data[7] = 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="another version"):
+        DictionaryPack(str(path))
+    assert open_pack(str(path)) is None
+    assert open_pack(str(tmp_path / "missing.pack")) is None
+
+def test_entries_from_json_lines(tmp_path):
+    path = tmp_path / "words.jsonl"
+    path.write_text("# base dictionary\n\n" + json.dumps({"word": "apple", "explanation_en": "a round fruit", "explanation_ru": "яблоко"}) + "\n", encoding="utf-8")
+    assert list(pack_entries(str(path))) == [("apple", "", "a round fruit", "яблоко")]
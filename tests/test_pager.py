@@ -0,0 +1,113 @@
+import sqlite3
+import pytest
+from unittest.mock import MagicMock
+from word_app.utils import Utils
+from word_app.utils.pager import MyPager, PagerSource, ListSource, SqlSource
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.create_function('regexp', 2, Utils.regexp, deterministic=True)
+    conn.execute("CREATE TABLE words (word TEXT PRIMARY KEY, category TEXT, state INTEGER)")
+    conn.executemany(
+        "INSERT INTO words VALUES (?, ?, ?)",
+        [(f"{letter}word{i:04d}", "cat" if i % 2 else "", i % 3) for letter in "abc" for i in range(1000)],
+    )
+    return conn
+
+def make_source(conn, **kwargs):
+    return SqlSource(
+        conn, "SELECT word, category, state FROM words",
+        order_by="word", key_column="word", search_columns=("word", "category"),
+        format_row=lambda row: row[0], **kwargs,
+    )
+
+def test_sql_source_reads_window_lazily(conn):
+    source = make_source(conn, block_size=100, cache_blocks=2)
+    assert len(source) == 3000
+    assert source.rows(1998, 4) == ["bword0998", "bword0999", "cword0000", "cword0001"]
+    assert source.rows(0, 1) == ["aword0000"]
+    assert len(source._blocks) == 2
+
+def test_sql_source_find_and_filter(conn):
+    source = make_source(conn)
+    assert source.find("b") == 1000
+    assert source.find("b", 1500) == 1500
+    assert source.find("z") is None
+    filtered = source.filter("word000")
+    assert len(filtered) == 30
+    assert filtered.rows(0, 2) == ["aword0000", "aword0001"]
+
+def test_sql_source_sorts_the_query_once(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    source = SqlSource(
+        conn, "SELECT word, category, state FROM words",
+        order_by="state, word", key_column="word", format_row=lambda row: row[0], block_size=100,
+    )
+    assert source.rows(0, 2) == ["aword0000", "aword0003"]
+    assert source.rows(2950, 2) == ["cword0851", "cword0854"]
+    assert source.find("c", 10) == 668
+    assert len(source) == 3000
+    assert sum("ORDER BY" in statement for statement in statements) == 1
+
+def test_sql_source_filter_escapes_wildcards(conn):
+    assert len(make_source(conn).filter("%")) == 0
+
+def test_list_source():
+    source = ListSource(["  apple", "  banana", "  cherry"])
+    assert source.find("b") == 1
+    assert source.filter("AN").rows(0, 10) == ["  banana"]
+
+def test_draw_screen_redraws_only_changed_lines():
+    screen = MagicMock()
+    screen.getmaxyx.return_value = (20, 80)
+    pager = MyPager("Header", [f"  line {i}" for i in range(50)])
+    pager.draw_screen(screen, 0)
+    first = screen.addstr.call_count
+    screen.reset_mock()
+    screen.getmaxyx.return_value = (20, 80)
+    pager.draw_screen(screen, 1)
+    assert 0 < screen.addstr.call_count < first
+
+def test_sql_source_fuzzy_and_regex(conn):
+    source = make_source(conn)
+    assert make_source(conn).filter("aw9", mode='fuzzy').rows(0, 1) == ["aword0009"]
+    assert len(source.filter(r"^c.*99$", mode='regex')) == 10
+
+def test_sql_source_fts_filter(conn):
+    conn.execute("CREATE VIRTUAL TABLE words_fts USING fts5(word, category, content='words', tokenize='trigram')")
+    conn.execute("INSERT INTO words_fts(words_fts) VALUES ('rebuild')")
+    source = make_source(conn, fts_table='words_fts')
+    assert len(source.filter("rd099")) == 30
+    assert len(source.filter("rd")) == 3000
+
+def test_pager_filter_narrows_and_reuses_results():
+    pager = MyPager("Header", ["  apple", "  apricot", "  banana"])
+    pager.filter_mode = True
+    for text in ("a", "ap", "apr"):
+        pager.filter_text = text
+        pager._apply_filter()
+    assert pager.filtered.rows(0, 10) == ["  apricot"]
+    narrowed = pager.filtered
+    pager.filter_text = "ap"
+    pager._apply_filter()
+    assert len(pager.filtered) == 2
+    assert [text for text, _ in pager._filter_cache] == ["a", "ap"]
+    pager.filter_text = "apr"
+    pager._apply_filter()
+    assert pager.filtered is not narrowed
+
+def test_pager_rejects_invalid_regex():
+    pager = MyPager("Header", ["  apple"])
+    pager.match_mode = 'regex'
+    pager.filter_text = "("
+    pager._apply_filter()
+    assert pager.filter_error
+
+def test_incomplete_source_fails_when_constructed():
+    class RowsOnly(PagerSource):
+        def rows(self, start, count):
+            return []
+    with pytest.raises(TypeError):
+        RowsOnly()
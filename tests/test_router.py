@@ -0,0 +1,47 @@
+from word_app.english.llm import grade_format
+from word_app.english.router import ModelRouter
+
+def make_router(**task):
+    return ModelRouter({'auto': True, 'min_samples': 3, 'probe_every': 0, 'tasks': {'grader': {'models': ['small', 'main'], **task}}})
+
+def test_defaults_keep_the_configured_roles():
+    router = ModelRouter()
+    assert router.choose('explain') == 'main'
+    assert router.choose('translate') == 'translator'
+    assert router.escalate('explain', 'main') is None
+
+def test_cheapest_model_within_the_latency_target_is_chosen():
+    router = make_router(target_ms=100)
+    assert router.choose('grader') == 'small'
+    for _ in range(3):
+        router.record_latency('grader', 'small', 300)
+    assert router.choose('grader') == 'main'
+    for _ in range(3):
+        router.record_latency('grader', 'main', 500)
+    # Neither meets the target: the faster one
+    assert router.choose('grader') == 'small'
+
+def test_models_with_too_many_unusable_answers_are_skipped():
+    router = make_router(max_failure_rate=0.5)
+    for usable in (False, False, True):
+        router.record_outcome('grader', 'small', usable)
+    assert router.choose('grader') == 'main'
+    assert router.escalate('grader', 'small') == 'main'
+
+def test_probe_retries_the_cheapest_model():
+    router = ModelRouter({'auto': True, 'min_samples': 1, 'probe_every': 3, 'tasks': {'grader': {'models': ['small', 'main'], 'target_ms': 100}}})
+    router.record_latency('grader', 'small', 300)
+    assert [router.choose('grader') for _ in range(3)] == ['main', 'main', 'small']
+
+def test_grade_format():
+    assert grade_format("  Correct! Nice.") is True
+    assert grade_format("Wro") is None
+    assert grade_format("The answer is") is False
+
+def test_grade_format_skips_markdown_and_quotes():
+    assert grade_format("**Correct!** Well done.") is True
+    assert grade_format('"Wrong!" The word is "run".') is True
+    assert grade_format("### Incorrect") is True
+    assert grade_format("**") is None
+    assert grade_format("**Cor") is None
+    assert grade_format("> Maybe") is False
@@ -0,0 +1,56 @@
+import time
+import threading
+import pytest
+from word_app.english.scheduler import BackendScheduler, TokenBucket, INTERACTIVE, BACKGROUND
+
+class RateLimited(Exception):
+    status_code = 429
+
+def rate_limited():
+    raise RateLimited()
+    yield
+
+def test_interactive_requests_are_admitted_before_background_ones():
+    scheduler = BackendScheduler('test', max_concurrency=1)
+    admitted = scheduler.acquire()
+    order = []
+
+    def request(name, priority):
+        scheduler.release(scheduler.acquire(priority), 1.0)
+        order.append(name)
+
+    threads = [threading.Thread(target=request, args=("pregen", BACKGROUND))]
+    threads[0].start()
+    while scheduler.queue_depth < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=request, args=("chat", INTERACTIVE)))
+    threads[1].start()
+    while scheduler.queue_depth < 2:
+        time.sleep(0.001)
+    scheduler.release(admitted, 1.0)
+    for thread in threads:
+        thread.join()
+    assert order == ["chat", "pregen"]
+
+def test_aimd_halves_on_overload_once_per_round_and_grows_back():
+    scheduler = BackendScheduler('test', max_concurrency=8, latency_target_ms=100)
+    first, second = scheduler.acquire(), scheduler.acquire()
+    with pytest.raises(RateLimited):
+        for _ in scheduler.run(rate_limited):
+            pass
+    assert scheduler.limit == 4
+    # Admitted before the decrease: its slow answer is part of the same round
+    scheduler.release(first, 500.0)
+    assert scheduler.limit == 4
+    scheduler.release(scheduler.acquire(), 500.0)
+    assert scheduler.limit == 2
+    scheduler.release(second, 10.0)
+    assert scheduler.limit == 2.5
+    assert scheduler.in_flight == 0
+
+def test_token_bucket_spaces_requests_after_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    for _ in range(2):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert 0.05 < bucket.delay() <= 0.1
@@ -0,0 +1,159 @@
+import json
+import asyncio
+from unittest.mock import MagicMock
+from word_app.english.server import WordServer
+from word_app.english.stream import LLMStream, StreamChunk
+from word_app.english.word_manager import Word
+
+def make_stream(text: str) -> LLMStream:
+    return LLMStream([StreamChunk(token) for token in text.split(" ")] + [StreamChunk(done=True)])
+
+def make_server() -> WordServer:
+    teacher = MagicMock()
+    teacher.riddler.side_effect = lambda word: (make_stream("It bends but never breaks"), "Is only one word.", 1)
+    teacher.grader.side_effect = lambda word, guess: make_stream("Correct! Well done")
+    manager = MagicMock()
+    manager.fetch_words.return_value = [Word("resilient", "unit1", "able to recover", "стойкий", 1, 2)]
+    manager.shift_state.side_effect = lambda state, offset: state + offset
+    manager.learner_id = 'default'
+    manager.for_learner.return_value = manager
+    server = WordServer("127.0.0.1", 0, llm_workers=4, teacher=teacher)
+    server.db.manager = manager
+    server.db.start = lambda: asyncio.sleep(0)
+    return server
+
+async def request(port: int, method: str, path: str, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), data.decode()
+
+def events(data: str):
+    result = []
+    for block in data.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        result.append((lines['event'], json.loads(lines['data'])))
+    return result
+
+def test_trainer_round_streams_riddle_and_grade():
+    async def scenario():
+        server = make_server()
+        await server.start()
+        try:
+            status, data = await request(server.port, "POST", "/sessions", {'mode': 'trainer', 'category': 'unit1'})
+            assert status == 201
+            session = json.loads(data)['session_id']
+
+            status, data = await request(server.port, "POST", f"/sessions/{session}/trainer/next")
+            riddle = events(data)
+            assert status == 200
+            assert riddle[0] == ('word', {'clue': "Is only one word.", 'words': 1, 'left': 0})
+            assert [data for kind, data in riddle if kind == 'token'] == ["It", "bends", "but", "never", "breaks"]
+
+            status, data = await request(server.port, "POST", f"/sessions/{session}/trainer/guess", {'guess': "tough"})
+            assert events(data)[-1] == ('done', {'correct': True, 'word': 'resilient'})
+            server.db.manager.set_word_state.assert_called_once_with("resilient", 3)
+            server.db.manager.update_streak.assert_called_once()
+            assert server.word_pools[('default', 'unit1')][0].state == 3
+        finally:
+            await server.close()
+    asyncio.run(scenario())
+
+def test_guess_for_a_word_deleted_meanwhile():
+    async def scenario():
+        server = make_server()
+        server.teacher.grader.side_effect = lambda word, guess: make_stream("**Correct!** Well done")
+        server.db.manager.fetch_word.return_value = None
+        await server.start()
+        try:
+            status, data = await request(server.port, "POST", "/sessions", {'mode': 'trainer', 'category': 'unit1'})
+            session = json.loads(data)['session_id']
+            await request(server.port, "POST", f"/sessions/{session}/trainer/next")
+            server.word_pools.clear()
+
+            status, data = await request(server.port, "POST", f"/sessions/{session}/trainer/guess", {'guess': "tough"})
+            assert status == 200
+            assert events(data)[-1] == ('done', {'correct': True, 'word': 'resilient'})
+            server.db.manager.set_word_state.assert_not_called()
+        finally:
+            await server.close()
+    asyncio.run(scenario())
+
+def test_errors_are_json():
+    async def scenario():
+        server = make_server()
+        await server.start()
+        try:
+            assert (await request(server.port, "POST", "/sessions/missing/trainer/next"))[0] == 404
+            assert (await request(server.port, "GET", "/sessions"))[0] == 405
+            status, data = await request(server.port, "POST", "/sessions", {'mode': 'chess'})
+            assert status == 400 and 'mode' in json.loads(data)['error']
+        finally:
+            await server.close()
+    asyncio.run(scenario())
+
+def test_word_falls_back_to_pack(tmp_path):
+    from word_app.english.pack import DictionaryPack, build_pack
+    build_pack([("apple", "food", "a round fruit", "яблоко")], str(tmp_path / "base.pack"))
+    async def scenario():
+        server = make_server()
+        server.db.manager.resolve_word.return_value = None
+        server.pack = DictionaryPack(str(tmp_path / "base.pack"))
+        await server.start()
+        try:
+            status, data = await request(server.port, "GET", "/words/APPLE")
+            assert status == 200
+            assert json.loads(data)['word'] == "apple" and json.loads(data)['source'] == "pack"
+            assert (await request(server.port, "GET", "/words/apples"))[0] == 404
+        finally:
+            await server.close()
+            server.pack.close()
+    asyncio.run(scenario())
+
+def test_upstream_failure_mid_stream_ends_the_stream():
+    def failing():
+        yield StreamChunk("It")
+        raise RuntimeError("upstream went away")
+    async def scenario():
+        server = make_server()
+        server.teacher.riddler.side_effect = lambda word: (LLMStream(failing()), "Is only one word.", 1)
+        await server.start()
+        try:
+            status, data = await request(server.port, "POST", "/sessions", {'mode': 'trainer', 'category': 'unit1'})
+            session = json.loads(data)['session_id']
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(f"POST /sessions/{session}/trainer/next HTTP/1.1\r\nContent-Length: 0\r\n\r\n".encode())
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            assert response.count(b"HTTP/1.1") == 1
+            head, _, data = response.partition(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 200")
+            assert [kind for kind, _ in events(data.decode())] == ['word', 'token', 'error']
+            assert events(data.decode())[-1][1] == {'error': "upstream went away"}
+        finally:
+            await server.close()
+    asyncio.run(scenario())
+
+def test_malformed_requests_get_400(monkeypatch):
+    monkeypatch.setattr("word_app.english.server.MAX_BODY", 1024)
+    async def send(port: int, raw: bytes):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return int(response.split()[1])
+    async def scenario():
+        server = make_server()
+        await server.start()
+        try:
+            assert await send(server.port, b"POST /sessions HTTP/1.1\r\nContent-Length: ten\r\n\r\n") == 400
+            assert await send(server.port, b"POST /sessions HTTP/1.1\r\nContent-Length: -1\r\n\r\n") == 400
+            assert await send(server.port, b"GET /health HTTP/1.1\r\nX-Padding: " + b"a" * 2000 + b"\r\n\r\n") == 400
+            assert await send(server.port, b"GARBAGE\r\n\r\n") == 400
+            assert (await request(server.port, "GET", "/health"))[0] == 200
+        finally:
+            await server.close()
+    asyncio.run(scenario())
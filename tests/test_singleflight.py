@@ -0,0 +1,89 @@
+import time
+import threading
+import pytest
+from word_app.english.singleflight import SingleFlight
+
+def slow_upstream(calls, tokens, delay=0.01):
+    def start():
+        calls.append(1)
+        for token in tokens:
+            time.sleep(delay)
+            yield token
+    return start
+
+def test_concurrent_subscribers_share_one_upstream():
+    flights = SingleFlight()
+    calls, results = [], {}
+    start = slow_upstream(calls, ["a", "b", "c", "d"])
+    streams = [flights.stream("key", start) for _ in range(3)]
+
+    def consume(i, stream):
+        results[i] = []
+        for chunk in stream:
+            results[i].append(chunk)
+            if i == 2:
+                time.sleep(0.03)  # a slow consumer reads behind the others
+
+    threads = [threading.Thread(target=consume, args=(i, s)) for i, s in enumerate(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert all(result == ["a", "b", "c", "d"] for result in results.values())
+    assert flights.in_flight == 0
+
+    assert list(flights.stream("key", start)) == ["a", "b", "c", "d"]
+    assert calls == [1, 1]
+
+def test_upstream_is_closed_when_every_subscriber_leaves():
+    flights = SingleFlight()
+    closed = []
+
+    def start():
+        try:
+            yield from range(100)
+        finally:
+            closed.append(True)
+
+    first, second = flights.stream("key", start), flights.stream("key", start)
+    assert next(first) == 0
+    first.close()
+    assert next(second) == 0 and next(second) == 1
+    assert not closed
+    second.close()
+    assert closed == [True]
+    assert flights.in_flight == 0
+
+def test_errors_reach_every_subscriber():
+    flights = SingleFlight()
+
+    def start():
+        yield "a"
+        raise ConnectionError("backend went away")
+
+    first, second = flights.stream("key", start), flights.stream("key", start)
+    assert next(first) == "a"
+    with pytest.raises(ConnectionError):
+        next(first)
+    assert next(second) == "a"
+    with pytest.raises(ConnectionError):
+        next(second)
+
+def test_upstream_metrics_are_recorded_once_per_flight():
+    from word_app.english.stream import LLMStream, StreamChunk
+    from word_app.utils.metrics import metrics
+    metrics.reset()
+    flights = SingleFlight()
+    start = lambda: LLMStream([StreamChunk("a"), StreamChunk("b"), StreamChunk(done=True)], 'explain')
+    first = flights.stream("key", start, 'explain')
+    assert next(first).text == "a"
+    second = flights.stream("key", start, 'explain')
+    for stream in (first, second):
+        LLMStream(stream, 'explain', record=False).text()
+
+    counters = {(c['name'], frozenset(c['labels'].items())): c['value'] for c in metrics.snapshot()['counters']}
+    assert counters[('llm_tokens_total', frozenset({('task', 'explain')}))] == 2
+    assert counters[('llm_streams_total', frozenset({('task', 'explain'), ('finish_reason', 'stop')}))] == 1
+    assert counters[('llm_singleflight_joins_total', frozenset({('task', 'explain')}))] == 1
+    metrics.reset()
@@ -0,0 +1,55 @@
+import datetime
+from unittest.mock import MagicMock
+from word_app.english.stats import SessionStats
+
+TODAY = datetime.date.today().isoformat()
+YESTERDAY = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+
+def make_manager(activity, threshold=3):
+    manager = MagicMock()
+    manager.streak_threshold = threshold
+    manager.get_activity.side_effect = lambda date: activity.get(date)
+    return manager
+
+def test_histogram_and_average():
+    stats = SessionStats(make_manager({}), [0, 1, 1, 4])
+    assert stats.total == 4
+    assert stats.average == 1.5
+    stats.change_state(1, 2)
+    assert stats.counts[:3] == [1, 1, 1]
+    assert stats.average == 1.75
+
+def test_first_success_of_the_day_continues_streak():
+    manager = make_manager({YESTERDAY: (5, 4)})
+    stats = SessionStats(manager)
+    assert (stats.todays_words, stats.streak) == (0, 0)
+    assert stats.record_success() == (1, 4)
+    manager.save_activity.assert_called_once_with(TODAY, 1, 4)
+
+def test_streak_grows_once_threshold_is_reached():
+    manager = make_manager({TODAY: (1, 4), YESTERDAY: (5, 4)})
+    stats = SessionStats(manager)
+    assert stats.record_success() == (2, 4)
+    assert stats.record_success() == (3, 5)
+    assert stats.today_is_active
+    assert stats.record_success() == (4, 5)
+    assert manager.get_activity.call_count == 2
+
+def test_first_ever_success_starts_streak():
+    stats = SessionStats(make_manager({}))
+    assert stats.record_success() == (1, 1)
+
+def test_round_without_success_writes_no_activity():
+    from word_app.english.training import WordsTutor
+    from word_app.english.word_manager import Word
+    manager = make_manager({YESTERDAY: (5, 4)})
+    manager.shift_state.side_effect = lambda state, offset: max(0, state + offset)
+    teacher = MagicMock()
+    teacher.grade_round.return_value = [(False, "No."), (False, "No.")]
+    tutor = object.__new__(WordsTutor)
+    tutor.__dict__.update(word_manager=manager, ui_manager=MagicMock(), stats=SessionStats(manager, [1, 1]),
+                          words_by_name={}, successful_words_count=0, unsuccessful_words_count=0,
+                          _lazy_objects={'teacher': teacher, 'obsidian': MagicMock()}, _lazy_lock=MagicMock())
+    tutor.grade_answers([(Word("run", "", "", "", 0, 1), "walk"), (Word("fly", "", "", "", 0, 1), "swim")])
+    manager.save_round.assert_called_once_with({"run": 0, "fly": 0}, {}, None)
+    manager.save_activity.assert_not_called()
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from word_app.english.llm import Teacher, RoundItem, parse_round_grades
+from word_app.english.stream import LLMStream, StreamChunk
+from word_app.english.scheduler import BackendScheduler
+from word_app.english.backends import Backend, BackendHealth, BackendPool
+from word_app.english.router import ModelRouter
+
+def make_backend(use_openai: bool, stream: bool = True, name: str = 'test') -> Backend:
+    backend = Backend.__new__(Backend)
+    backend.name = name
+    backend.use_openai = use_openai
+    backend.stream = stream
+    backend.models = {'main': 'main', 'translator': 'main', 'small': 'small'}
+    backend.client = MagicMock()
+    backend.scheduler = BackendScheduler(name)
+    backend.health = BackendHealth()
+    return backend
+
+def make_teacher(use_openai: bool, stream: bool = True, routing=None) -> Teacher:
+    teacher = Teacher.__new__(Teacher)
+    teacher.stream = stream
+    teacher.single_flight = True
+    teacher.background_tasks = set()
+    teacher.backends = BackendPool([make_backend(use_openai, stream)])
+    teacher.router = ModelRouter(routing)
+    teacher.chat_history = []
+    return teacher
+
+def openai_chunk(content, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+def test_openai_and_ollama_streams_are_normalized():
+    openai = make_teacher(True)
+    openai.backends.primary.client.chat.completions.create.return_value = iter([openai_chunk("Hel"), openai_chunk("lo"), openai_chunk(None, "stop")])
+    ollama = make_teacher(False)
+    ollama.backends.primary.client.generate.return_value = iter([
+        {'response': 'Hel', 'done': False},
+        {'response': 'lo', 'done': False},
+        {'response': '', 'done': True, 'done_reason': 'length'},
+    ])
+    ollama.backends.primary.client.chat.return_value = iter([{'message': {'content': 'Hi'}, 'done': True, 'done_reason': 'stop'}])
+
+    assert openai.text_gen("prompt").text() == "Hello"
+    stream = ollama.text_gen("prompt", task='explain')
+    chunks = list(stream)
+    assert chunks[-1] == StreamChunk("", True, 'length')
+    assert "".join(chunk.text for chunk in chunks) == "Hello"
+    assert stream.stats.token_count == 2
+    assert stream.stats.finish_reason == 'length'
+    assert ollama.conversation("hi").text() == "Hi"
+
+def test_non_streaming_ollama_answer_is_one_chunk():
+    teacher = make_teacher(False, stream=False)
+    teacher.backends.primary.client.generate.return_value = {'response': 'Whole answer', 'done': True, 'done_reason': 'stop'}
+    assert list(teacher.text_gen("prompt")) == [StreamChunk("Whole answer", True, 'stop')]
+
+def test_stats_record_timing_and_cancellation():
+    stream = LLMStream(iter([StreamChunk("a"), {'text': 'b'}, StreamChunk("c")]))
+    tokens = stream.tokens()
+    assert next(tokens) == "a"
+    assert next(tokens) == "b"
+    tokens.close()
+    stream._iterator.close()
+    assert stream.stats.token_count == 2
+    assert stream.stats.ttft_ms is not None
+    assert len(stream.stats.gaps_ms) == 1
+    assert stream.stats.finish_reason == 'cancelled'
+
+def test_unparsable_grade_is_retried_on_a_larger_model():
+    teacher = make_teacher(False, routing={'tasks': {'grader': ['small', 'main']}})
+    teacher.system_grader = 'Grade "{WORD}" ({mode}).'
+    teacher.grader_options = {}
+    answers = {
+        'small': [{'response': 'The answer', 'done': False}, {'response': ' is right', 'done': True}],
+        'main': [{'response': 'Correct!', 'done': False}, {'response': ' Well done.', 'done': True}],
+    }
+    teacher.backends.primary.client.generate.side_effect = lambda model, **kwargs: iter(answers[model])
+
+    assert teacher.grader("cat", "kat").text() == "Correct! Well done."
+    assert [call.kwargs['model'] for call in teacher.backends.primary.client.generate.call_args_list] == ['small', 'main']
+    assert teacher.router._outcomes[('grader', 'small')][-1] is False
+    assert teacher.router._outcomes[('grader', 'main')][-1] is True
+
+def test_quiz_round_is_graded_in_one_request():
+    teacher = make_teacher(False)
+    teacher.system_batch_grader = 'Grade the round.'
+    teacher.batch_grader_options = {}
+    reply = '```json\n[{"n": 1, "correct": true, "explanation": "Typo only."}, {"n": 2, "correct": false, "explanation": "It is gone."}]\n```'
+    teacher.backends.primary.client.generate.return_value = iter([{'response': reply, 'done': True}])
+
+    grades = teacher.grade_round([RoundItem("Guess", "resilient", "resilent"), RoundItem("Forms of go", "went, gone", "went, went")])
+
+    assert grades == [(True, "Typo only."), (False, "It is gone.")]
+    assert teacher.backends.primary.client.generate.call_count == 1
+
+def test_round_grades_must_cover_every_item():
+    assert parse_round_grades('[{"n": 1, "correct": true}]', 2) is None
+    assert parse_round_grades('Sure! Both are right.', 2) is None
+    assert parse_round_grades('[{"n": 2, "correct": false}, {"n": 1, "correct": true}]', 2) == [(True, ''), (False, '')]
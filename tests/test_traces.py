@@ -0,0 +1,39 @@
+import time
+import pytest
+from word_app.utils.traces import TraceStore
+
+def test_recorded_streams_replay_by_request(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    recorder = TraceStore()
+    recorder.start_recording(path)
+    first = {'model': 'm', 'prompt': 'explain "apple"'}
+    second = {'model': 'm', 'prompt': 'explain "pear"'}
+    assert list(recorder.stream('llm', first, lambda: iter([{'response': 'An '}, {'response': 'apple'}]))) == [{'response': 'An '}, {'response': 'apple'}]
+    assert list(recorder.stream('llm', second, lambda: iter([{'response': 'A pear'}]))) == [{'response': 'A pear'}]
+    assert list(recorder.stream('tts', {'input': 'apple'}, lambda: iter([b'\x00\x01', b'\x02']))) == [b'\x00\x01', b'\x02']
+
+    player = TraceStore()
+    player.start_replay(path, speed=0)
+    never = lambda: pytest.fail("the real backend must not be called on replay")
+    assert list(player.stream('llm', second, never)) == [{'response': 'A pear'}]
+    assert list(player.stream('tts', {'input': 'apple'}, never)) == [b'\x00\x01', b'\x02']
+    # An unknown request gets the next unused stream of the same kind
+    assert list(player.stream('llm', {'prompt': 'other'}, never)) == [{'response': 'An '}, {'response': 'apple'}]
+    with pytest.raises(LookupError):
+        list(player.stream('llm', first, never))
+
+def test_replay_scales_recorded_delays(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    recorder = TraceStore()
+    recorder.start_recording(path)
+
+    def slow():
+        time.sleep(0.1)
+        yield {'response': 'x'}
+
+    list(recorder.stream('llm', {}, slow))
+    player = TraceStore()
+    player.start_replay(path, speed=4)
+    started = time.perf_counter()
+    list(player.stream('llm', {}, lambda: None))
+    assert 0.02 <= time.perf_counter() - started < 0.1
@@ -0,0 +1,31 @@
+import threading
+from unittest.mock import MagicMock, patch
+from word_app.english.training import BaseWordApp
+
+def make_app() -> BaseWordApp:
+    with patch('word_app.english.training.WordManager'), patch('word_app.english.training.UIManager'):
+        return BaseWordApp()
+
+def test_slow_teacher_does_not_block_the_completer():
+    app = make_app()
+    building = threading.Event()
+    release = threading.Event()
+    def slow_teacher():
+        building.set()
+        release.wait(5)
+        return MagicMock()
+    with patch('word_app.english.training.Teacher', side_effect=slow_teacher):
+        warmup = threading.Thread(target=lambda: app.teacher)
+        warmup.start()
+        try:
+            assert building.wait(5)
+            completer = []
+            reader = threading.Thread(target=lambda: completer.append(app.completer))
+            reader.start()
+            reader.join(2)
+            assert completer, "the completer waited for the teacher"
+        finally:
+            release.set()
+            warmup.join()
+    assert app.teacher is app.teacher
+    assert app.completer is completer[0]
@@ -0,0 +1,32 @@
+from unittest.mock import MagicMock
+from rich.console import Console
+from rich.markdown import Markdown
+from word_app.english.ui_manager import MarkdownStream, StreamRenderer
+
+TEXT = "Intro **bold** text.\n\n- one\n- two\n\n```\ncode\n\nmore\n```\n\n# Title\n\nThe end."
+
+def render(renderable):
+    console = Console(width=40, color_system=None)
+    return [''.join(segment.text for segment in line).rstrip() for line in console.render_lines(renderable, pad=False)]
+
+def test_markdown_stream_matches_full_render():
+    stream = MarkdownStream()
+    for char in TEXT:
+        stream.append(char)
+        stream.renderable()
+    assert stream.text == TEXT
+    assert len(stream.blocks) == 4
+    assert render(stream.renderable()) == render(Markdown(TEXT))
+
+def test_markdown_stream_keeps_code_fence_open():
+    stream = MarkdownStream("```\nline\n\n")
+    stream.renderable()
+    assert stream.blocks == []
+
+def test_stream_renderer_caps_frames():
+    live = MagicMock()
+    paint = MagicMock()
+    text = StreamRenderer(live, paint, fps=1).run(["a"] * 100, text="> ")
+    assert text == "> " + "a" * 100
+    assert paint.call_count == 2
+    assert live.refresh.call_count == 2
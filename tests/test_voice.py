@@ -0,0 +1,82 @@
+import threading
+from unittest.mock import patch
+from word_app.utils.voice import RingBuffer, Voice, PRIORITY_FEEDBACK
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(8)
+    ring.write(b'abcdef')
+    assert ring.read(4) == b'abcd'
+    ring.write(b'ghijkl')
+    assert len(ring) == 8
+    assert ring.read(8) == b'efghijkl'
+    assert len(ring) == 0
+
+def test_ring_buffer_read_is_aligned():
+    ring = RingBuffer(16)
+    ring.write(b'\x01\x02\x03')
+    assert ring.read(16, align=2) == b'\x01\x02'
+    assert len(ring) == 1
+
+def test_ring_buffer_write_blocks_until_read():
+    ring = RingBuffer(4)
+    writer = threading.Thread(target=ring.write, args=(b'12345678',))
+    writer.start()
+    received = b''
+    while len(received) < 8:
+        received += ring.read(4)
+    writer.join(timeout=1)
+    assert received == b'12345678'
+
+def test_ring_buffer_write_stops_when_requested():
+    ring = RingBuffer(2)
+    ring.write(b'1234', should_stop=lambda: True)
+    assert ring.read(4) == b'12'
+
+VOICE_CONFIG = {
+    'base_url': 'http://localhost:8000/v1',
+    'api_key': 'sk-test',
+    'model': 'tts-1',
+    'voice': 'alloy',
+    'audio': {'sample_rate': 16000, 'buffer_size': 512, 'stream_chunk_size': 4096, 'format': 'pcm'},
+}
+
+def make_voice():
+    with patch('openai.OpenAI'), patch('word_app.utils.voice.get_voice_config', return_value=VOICE_CONFIG):
+        voice = Voice()
+    voice._ensure_worker = lambda: None
+    return voice
+
+def test_voice_queue_orders_feedback_first():
+    voice = make_voice()
+    voice.speak("An explanation.")
+    voice.speak("Correct!", PRIORITY_FEEDBACK)
+    assert [u.text for u in sorted(voice._queue)] == ["Correct!", "An explanation."]
+
+def test_voice_queue_coalesces_superseded_output():
+    voice = make_voice()
+    voice.speak("First explanation.")
+    voice.speak("Second explanation.")
+    assert [u.text for u in voice._queue] == ["Second explanation."]
+    assert voice.metrics()['coalesced'] == 1
+
+def test_voice_queue_is_bounded():
+    voice = make_voice()
+    voice.queue_size = 1
+    voice.speak("Correct!", PRIORITY_FEEDBACK)
+    voice.speak("An explanation.")
+    assert [u.text for u in voice._queue] == ["Correct!"]
+    assert voice.metrics()['dropped'] == 1
+
+def test_stop_speaking_cancels_current():
+    voice = make_voice()
+    voice.speak("An explanation.")
+    voice._current = voice._queue.pop()
+    voice.stop_speaking()
+    assert voice._current.cancelled.is_set()
+    assert voice.queue_depth() == 0
+
+def test_pcm_stream_is_timed_at_the_tts_rate():
+    voice = make_voice()
+    voice.sample_rate = 16000
+    assert voice.pcm_sample_rate == 24000
+    assert voice._ms_to_bytes(1000) == 24000 * 2
@@ -0,0 +1,19 @@
+import threading
+from word_app.utils.warmup import Warmup, DONE, FAILED
+
+def test_steps_run_in_background_and_failures_are_reported():
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.add("slow", lambda: release.wait(5))
+    warmup.add("broken", lambda: 1 / 0)
+    assert not warmup.running
+
+    warmup.start()
+    assert warmup.running
+    release.set()
+    warmup.join(5)
+
+    assert not warmup.running
+    assert warmup.status["slow"]["state"] == DONE
+    assert warmup.status["broken"]["state"] == FAILED
+    assert "broken: failed" in warmup.summary()
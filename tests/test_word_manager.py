@@ -1,61 +1,23 @@
 import pytest
+import sqlite3
 from unittest.mock import MagicMock, patch
-from word_app.english.word_manager import WordManager, Word
+from word_app.english.word_manager import WordManager, Word, GrammarTheme, IrregularVerb
+from word_app.english.lookup import lookup_key
+
 
 @pytest.fixture
 def word_manager():
-    with patch('word_app.english.word_manager.sqlite3') as mock_sqlite3:
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
-        mock_sqlite3.connect.return_value = mock_connection
-        mock_connection.cursor.return_value = mock_cursor
-        
-        # Создаем словарь для хранения данных "базы данных"
-        mock_db = {}
-        
-        def mock_execute(query, params=None):
-            nonlocal mock_db
-            params = params or []
-            command = query.split()[0].upper()
-            if command == "INSERT":
-                word_key = params[0]  # для INSERT используем первый элемент как ключ
-                mock_db[word_key] = tuple(params)
-            elif command == "UPDATE":
-                word_key = params[-1]  # для UPDATE используем последний элемент как ключ
-                mock_db[word_key] = tuple(params[:-1])
-            elif command == "SELECT":
-                word_key = params[0]
-                if word_key in mock_db:
-                    mock_cursor.execute.return_value = [mock_db[word_key]]
-                else:
-                    mock_cursor.execute.return_value = [None]
-            elif command == "DELETE":
-                word_key = params[0]
-                if word_key in mock_db:
-                    del mock_db[word_key]
-                    mock_cursor.execute.return_value = True
-                else:
-                    mock_cursor.execute.return_value = False
-        
-        mock_cursor.execute.side_effect = mock_execute
-        
-        def mock_fetchone():
-            rows = mock_cursor.execute.return_value
-            return rows[0] if rows and rows[0] else None
-        
-        def mock_fetchall():
-            return list(mock_db.values())
-
-        mock_cursor.fetchone.side_effect = mock_fetchone
-        mock_cursor.fetchall.side_effect = mock_fetchall
-
-        # Патчим метод get_database_path, чтобы он возвращал фиктивный путь
-        with patch('word_app.english.word_manager.get_database_path', return_value=':memory:'):
-            with patch('os.makedirs', MagicMock()):
-                wm = WordManager()
-                wm.conn = mock_connection
-                wm.cursor = mock_cursor
-                yield wm
+    # The vocabulary and the progress tables are joined in SQL, so the manager runs on an in-memory database
+    WordManager._instance = None
+    with patch('word_app.english.word_manager.get_database_path', return_value=':memory:'), \
+         patch('word_app.english.word_manager.get_streak_threshold', return_value=30), \
+         patch('word_app.english.word_manager.get_profile', return_value='default'), \
+         patch('os.makedirs', MagicMock()):
+        wm = WordManager()
+        yield wm
+    wm.conn.close()
+    WordManager._instance = None
+
 
 def test_insert_and_fetch_word(word_manager):
     word = "test"
@@ -74,6 +36,7 @@ def test_insert_and_fetch_word(word_manager):
     assert fetched_word.ask_counter == 1
     assert fetched_word.state == 0
 
+
 def test_increment_counter(word_manager):
     word = "counter_test"
     word_manager.insert_word(word, "verb", "To test", "Тестировать")
@@ -84,6 +47,7 @@ def test_increment_counter(word_manager):
     updated_word = word_manager.fetch_word(word)
     assert updated_word.ask_counter == initial_count + 1
 
+
 def test_process_state(word_manager):
     word = "state_test"
     word_manager.insert_word(word, "adjective", "Testable", "Тестируемый")
@@ -94,6 +58,7 @@ def test_process_state(word_manager):
     updated_word = word_manager.fetch_word(word)
     assert updated_word.state == initial_state + 1
 
+
 def test_fetch_words_by_category(word_manager):
     word_manager.insert_word("word1", "noun", "Cat", "Кот")
     word_manager.insert_word("word2", "verb", "Run", "Бежать")
@@ -103,6 +68,7 @@ def test_fetch_words_by_category(word_manager):
     assert nouns[0].word == "word1"
     assert nouns[0].category == "noun"
 
+
 def test_delete_word(word_manager):
     word = "delete_test"
     word_manager.insert_word(word, "noun", "Sample", "Образец")
@@ -113,6 +79,7 @@ def test_delete_word(word_manager):
     deleted_word = word_manager.fetch_word(word)
     assert deleted_word is None
 
+
 def test_category_average(word_manager):
     word_manager.insert_word("word1", "noun", "Cat", "Кот")
     word_manager.insert_word("word2", "noun", "Dog", "Собака")
@@ -122,4 +89,166 @@ def test_category_average(word_manager):
     word_manager.process_state("word2", 2)
     
     avg = word_manager.category_average("noun")
-    assert avg == (3 + 2) / 2
\ No newline at end of file
+    assert avg == (3 + 2) / 2
+
+
+def test_learners_share_vocabulary_but_not_progress(word_manager):
+    word_manager.insert_word("resilient", "unit1", "Able to recover", "Стойкий")
+    word_manager.set_word_state("resilient", 4)
+    word_manager.update_streak()
+
+    other = word_manager.for_learner("anna")
+    word = other.fetch_word("resilient")
+    assert word.explanation_en == "Able to recover"
+    assert (word.ask_counter, word.state) == (0, 0)
+    assert other.get_streak() == (0, False)
+
+    other.set_word_state("resilient", 2)
+    assert word_manager.fetch_word("resilient").state == 4
+    assert word_manager.state_counts("unit1")[4] == 1
+    assert other.state_counts()[2] == 1
+    assert other.category_summary() == [("unit1", 1, 2.0)]
+
+
+def test_single_learner_database_is_migrated(tmp_path):
+    db_path = str(tmp_path / "words.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE words (word TEXT PRIMARY KEY, category TEXT, explanation_en TEXT, explanation_ru TEXT, ask_counter INTEGER, state INTEGER)")
+    conn.execute("CREATE TABLE irregular_verbs (base_form TEXT PRIMARY KEY, past_simple TEXT, past_participle TEXT, ask_counter INTEGER, state INTEGER)")
+    conn.execute("CREATE TABLE user_activity (date TEXT PRIMARY KEY, successful_words INTEGER, streak INTEGER)")
+    conn.execute("INSERT INTO words VALUES ('tough', 'unit1', 'Strong', 'Крепкий', 3, 5)")
+    conn.execute("INSERT INTO irregular_verbs VALUES ('go', 'went', 'gone', 2, 1)")
+    conn.execute("INSERT INTO user_activity VALUES ('2024-01-01', 12, 4)")
+    conn.commit()
+    conn.close()
+
+    WordManager._instance = None
+    with patch('word_app.english.word_manager.get_database_path', return_value=db_path), \
+         patch('word_app.english.word_manager.get_streak_threshold', return_value=30), \
+         patch('word_app.english.word_manager.get_profile', return_value='default'):
+        wm = WordManager()
+    try:
+        assert wm.fetch_word("tough") == Word("tough", "unit1", "Strong", "Крепкий", 3, 5)
+        assert wm.get_irregular_verb("go").state == 1
+        assert wm.get_activity('2024-01-01') == (12, 4)
+        assert wm.for_learner("anna").fetch_word("tough").state == 0
+        assert wm.resolve_word("Tough!").word == "tough"
+    finally:
+        wm.conn.close()
+        WordManager._instance = None
+
+
+def test_variants_resolve_to_the_saved_word(word_manager):
+    word_manager.insert_word("run", "verb", "Move fast", "Бежать")
+    word_manager.insert_word("give up", "phrase", "Stop trying", "Сдаться")
+
+    for variant in ("run", "Running", "running ", "ran", "runs"):
+        assert word_manager.resolve_word(variant).word == "run"
+    assert word_manager.resolve_word("Gave up!").word == "give up"
+    assert word_manager.resolve_word("walk") is None
+
+
+def test_distinct_words_keep_distinct_keys():
+    pairs = [("car", "care"), ("hop", "hope"), ("not", "note"), ("plan", "plane"), ("rat", "rate"),
+             ("fin", "fine"), ("pin", "pine"), ("sit", "site"), ("cut", "cute"), ("bar", "bare"),
+             ("unit", "united"), ("left", "leave"), ("saw", "see"), ("lay", "lie"), ("rose", "rise"),
+             ("bit", "bite"), ("better", "good"), ("best", "good"), ("star", "stare"), ("need", "nee")]
+    for first, second in pairs:
+        assert lookup_key(first) != lookup_key(second), (first, second)
+    for variant, word in [("hoping", "hope"), ("hopping", "hop"), ("caring", "care"), ("starring", "star"),
+                          ("agreed", "agree"), ("visited", "visit"), ("dancing", "dance"), ("boxes", "box")]:
+        assert lookup_key(variant) == lookup_key(word), (variant, word)
+
+
+def test_near_misses_are_not_duplicates(word_manager):
+    for word in ("car", "care", "hop", "hope"):
+        word_manager.insert_word(word, "", "", "")
+
+    assert word_manager.find_duplicates() == []
+    assert word_manager.resolve_word("car").word == "car"
+    assert word_manager.resolve_word("Caring").word == "care"
+    assert word_manager.resolve_word("hopping").word == "hop"
+
+
+def test_stale_lookup_keys_are_recomputed(tmp_path):
+    db_path = str(tmp_path / "words.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE words (word TEXT PRIMARY KEY, category TEXT, explanation_en TEXT, explanation_ru TEXT, lookup_key TEXT)")
+    conn.execute("INSERT INTO words VALUES ('care', '', '', '', 'car')")
+    conn.commit()
+    conn.close()
+
+    WordManager._instance = None
+    with patch('word_app.english.word_manager.get_database_path', return_value=db_path), \
+         patch('word_app.english.word_manager.get_streak_threshold', return_value=30), \
+         patch('word_app.english.word_manager.get_profile', return_value='default'):
+        wm = WordManager()
+    try:
+        assert wm.conn.execute("SELECT lookup_key FROM words").fetchone() == ("care",)
+        assert wm.resolve_word("car") is None
+    finally:
+        wm.conn.close()
+        WordManager._instance = None
+
+
+def test_duplicates_are_merged_with_their_progress(word_manager):
+    word_manager.insert_word("Running", "", "Moving fast", "Бег")
+    word_manager.insert_word("run", "verb", "Move fast", "Бежать")
+    word_manager.insert_word("walk", "verb", "Move slowly", "Идти")
+    word_manager.set_word_state("Running", 4)
+    anna = word_manager.for_learner("anna")
+    anna.set_word_state("Running", 2)
+    anna.set_word_state("run", 3)
+
+    assert word_manager.find_duplicates() == [["run", "Running"]]
+    word_manager.merge_words("run", ["Running"])
+
+    assert word_manager.find_duplicates() == []
+    assert word_manager.fetch_word("Running") is None
+    merged = word_manager.fetch_word("run")
+    assert (merged.category, merged.state, merged.ask_counter) == ("verb", 4, 2)
+    assert anna.fetch_word("run").state == 3
+
+
+def test_complete_is_a_case_insensitive_prefix_scan(word_manager):
+    for word in ("Run", "running", "rust", "rv", "apple"):
+        word_manager.insert_word(word, "unit1", "", "")
+    word_manager.add_grammar_theme(GrammarTheme("Present Simple", ""))
+
+    assert word_manager.complete("words", "ru") == ["Run", "running", "rust"]
+    assert word_manager.complete("words", "RUN", limit=1) == ["Run"]
+    assert word_manager.complete("words", "") == []
+    assert word_manager.complete("themes", "present") == ["Present Simple"]
+    assert word_manager.complete("categories", "UN") == ["unit1"]
+    plan = word_manager.conn.execute("EXPLAIN QUERY PLAN SELECT word FROM words WHERE word >= 'a' COLLATE NOCASE AND word < 'b' COLLATE NOCASE").fetchall()
+    assert "words_word_nocase" in plan[0][-1]
+
+
+def test_prefix_completer_completes_input_and_command_arguments(word_manager):
+    from prompt_toolkit.document import Document
+    from word_app.english.completion import PrefixCompleter
+    word_manager.insert_word("give up", "phrase", "", "")
+    completer = PrefixCompleter(word_manager, {'specific': 'words', '/i': 'words'}, ['/i', '/info', 'specific'])
+
+    def complete(text):
+        return [(c.text, c.start_position) for c in completer.get_completions(Document(text), None)]
+
+    assert complete("giv") == [("give up", -3)]
+    assert complete("/i give ") == [("give up", -5)]
+    assert complete("/in") == [("/info", -3)]
+    assert complete("/x gi") == []
+
+
+def test_round_is_saved_in_one_transaction(word_manager):
+    word_manager.insert_word("tough", "unit1", "", "")
+    word_manager.add_irregular_verb(IrregularVerb("go", "went", "gone", 1, 0))
+    statements = []
+    word_manager.conn.set_trace_callback(statements.append)
+
+    word_manager.save_round({"tough": 3}, {"go": 2}, ("2024-01-01", 7, 2))
+
+    word_manager.conn.set_trace_callback(None)
+    assert sum(1 for s in statements if s.startswith("COMMIT")) == 1
+    assert word_manager.fetch_word("tough").state == 3
+    assert word_manager.get_irregular_verb("go").state == 2
+    assert word_manager.get_activity("2024-01-01") == (7, 2)